@@ -22,6 +22,7 @@ NODE_CLASS_MAPPINGS = {
     "LG_CreateAndSaveVideo": LG_CreateAndSaveVideo,
     "LG_ConcatVideoFiles": LG_ConcatVideoFiles,
     "LG_SaveAudioGetPath": LG_SaveAudioGetPath,
+    "LG_StreamingVideoWriter": LG_StreamingVideoWriter,
     "LG_ValueSender": LG_ValueSender,
     "LG_ValueReceiver": LG_ValueReceiver,
     "LG_ClearAccumulatedValues": LG_ClearAccumulatedValues,
@@ -45,6 +46,7 @@ NODE_DISPLAY_NAME_MAPPINGS = {
     "LG_CreateAndSaveVideo": "🎈LG_CreateAndSaveVideo",
     "LG_ConcatVideoFiles": "🎈LG_ConcatVideoFiles",
     "LG_SaveAudioGetPath": "🎈LG_SaveAudioGetPath",
+    "LG_StreamingVideoWriter": "🎈LG_StreamingVideoWriter",
     "LG_ValueSender": "🎈LG_ValueSender",
     "LG_ValueReceiver": "🎈LG_ValueReceiver",
     "LG_ClearAccumulatedValues": "🎈LG_ClearAccumulatedValues",
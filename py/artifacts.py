@@ -0,0 +1,227 @@
+"""
+临时文件管理
+发送/预览节点写入临时目录的文件统一在这里登记：
+1. 按 owner（如 image:1、preview:15）记录文件，最近一次发送的文件集合被固定，等待接收端读取
+2. 接收端读取期间额外加引用，避免读取过程中被回收
+3. 后台线程按总字节数和文件年龄配额回收未被引用的文件
+4. 按内容指纹索引文件，内容相同的输出直接复用已有文件（同名复用或硬链接），跳过编码和写盘
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+DEFAULT_MAX_BYTES = int(float(os.environ.get("LG_ARTIFACT_MAX_MB", 10240)) * 1024 * 1024)
+DEFAULT_MAX_AGE = float(os.environ.get("LG_ARTIFACT_MAX_AGE", 24 * 3600))
+GC_INTERVAL = 30.0
+
+
+class ArtifactManager:
+    """临时文件登记与配额回收"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.lock = threading.RLock()
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        # path -> {"owner", "size", "inode", "created", "refs"}，按登记顺序排列，便于从最旧的开始回收
+        self.files = OrderedDict()
+        # (st_dev, st_ino) -> 指向同一文件的已登记路径；硬链接复用的文件只计一次字节数
+        self.inodes = {}
+        # owner -> 当前固定的文件集合
+        self.live = {}
+        # 内容键 (指纹 + 扩展名) -> 路径
+        self.contents = {}
+        self.total_bytes = 0
+        self.evicted_count = 0
+        self.evicted_bytes = 0
+        self._gc_thread = None
+
+    def register(self, owner, path, content_key=None):
+        """登记一个新写入（或被复用）的文件"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        with self.lock:
+            entry = self.files.get(path)
+            if entry is not None:
+                self._unaccount(path, entry)
+                entry["created"] = time.time()
+                self.files.move_to_end(path)
+            else:
+                entry = {"owner": owner, "created": time.time(), "refs": 0, "content_key": None}
+                self.files[path] = entry
+            entry["size"] = stat.st_size
+            entry["inode"] = (stat.st_dev, stat.st_ino)
+            self._account(path, entry)
+            if content_key is not None:
+                entry["content_key"] = content_key
+                self.contents[content_key] = path
+            over_quota = self.total_bytes > self.max_bytes
+        self._ensure_gc_thread()
+        if over_quota:
+            self.collect()
+
+    def _account(self, path, entry):
+        links = self.inodes.setdefault(entry["inode"], set())
+        if not links:
+            self.total_bytes += entry["size"]
+        links.add(path)
+
+    def _unaccount(self, path, entry):
+        """移除 path 的计数，返回是否是该文件最后一个已登记的路径（即字节真正被释放）"""
+        links = self.inodes.get(entry["inode"])
+        if links is None:
+            return False
+        links.discard(path)
+        if links:
+            return False
+        del self.inodes[entry["inode"]]
+        self.total_bytes -= entry["size"]
+        return True
+
+    def materialize(self, content_key, path):
+        """内容相同的文件已存在时直接复用，返回 True 表示 path 已可用、无需重新编码"""
+        if os.path.exists(path):
+            return True
+        with self.lock:
+            existing = self.contents.get(content_key)
+        if existing is None or not os.path.exists(existing):
+            return False
+        try:
+            os.link(existing, path)
+            return True
+        except OSError:
+            return False
+
+    def set_live(self, owner, paths):
+        """替换 owner 当前固定的文件集合（等待接收端读取的文件）"""
+        paths = set(paths)
+        with self.lock:
+            old = self.live.get(owner, set())
+            for path in old - paths:
+                self._add_ref(path, -1)
+            for path in paths - old:
+                self._add_ref(path, 1)
+            if paths:
+                self.live[owner] = paths
+            else:
+                self.live.pop(owner, None)
+
+    def _add_ref(self, path, delta):
+        entry = self.files.get(path)
+        if entry is not None:
+            entry["refs"] = max(0, entry["refs"] + delta)
+
+    @contextmanager
+    def pinned(self, paths):
+        """接收端读取期间固定文件"""
+        paths = list(paths)
+        with self.lock:
+            for path in paths:
+                self._add_ref(path, 1)
+        try:
+            yield
+        finally:
+            with self.lock:
+                for path in paths:
+                    self._add_ref(path, -1)
+
+    def configure(self, max_bytes=None, max_age=None):
+        with self.lock:
+            if max_bytes is not None:
+                self.max_bytes = max(0, int(max_bytes))
+            if max_age is not None:
+                self.max_age = max(0.0, float(max_age))
+        self.collect()
+
+    def collect(self):
+        """回收超龄和超出字节配额的未引用文件，返回回收的文件数"""
+        now = time.time()
+        victims = []
+        with self.lock:
+            total = self.total_bytes
+            # inode -> 已选中回收的路径数，同一文件的全部路径都被回收时才释放字节
+            chosen = {}
+            for path, entry in self.files.items():
+                if entry["refs"] > 0:
+                    continue
+                expired = self.max_age > 0 and now - entry["created"] > self.max_age
+                if expired or total > self.max_bytes:
+                    victims.append(path)
+                    chosen[entry["inode"]] = chosen.get(entry["inode"], 0) + 1
+                    if chosen[entry["inode"]] == len(self.inodes.get(entry["inode"], ())):
+                        total -= entry["size"]
+                else:
+                    # 按登记顺序遍历，之后的文件更新，不会超龄
+                    break
+
+        removed = 0
+        for path in victims:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                # 文件可能被占用（如 Windows），下次再试
+                continue
+            with self.lock:
+                entry = self.files.pop(path, None)
+                if entry is None:
+                    continue
+                freed = self._unaccount(path, entry)
+                if entry["content_key"] is not None and self.contents.get(entry["content_key"]) == path:
+                    # 仍有其他硬链接时改为指向它们，内容仍可复用
+                    remaining = self.inodes.get(entry["inode"])
+                    if remaining:
+                        self.contents[entry["content_key"]] = next(iter(remaining))
+                    else:
+                        del self.contents[entry["content_key"]]
+                self.evicted_count += 1
+                if freed:
+                    self.evicted_bytes += entry["size"]
+                removed += 1
+        return removed
+
+    def stats(self):
+        with self.lock:
+            pinned = [e for e in self.files.values() if e["refs"] > 0]
+            owners = {}
+            for entry in self.files.values():
+                owner = owners.setdefault(entry["owner"], {"files": 0, "bytes": 0})
+                owner["files"] += 1
+                owner["bytes"] += entry["size"]
+            return {
+                "total_bytes": self.total_bytes,
+                "file_count": len(self.files),
+                "pinned_files": len(pinned),
+                "pinned_bytes": sum(e["size"] for e in pinned),
+                "max_bytes": self.max_bytes,
+                "max_age": self.max_age,
+                "evicted_files": self.evicted_count,
+                "evicted_bytes": self.evicted_bytes,
+                "owners": owners,
+            }
+
+    def _ensure_gc_thread(self):
+        if self._gc_thread is not None:
+            return
+        with self.lock:
+            if self._gc_thread is not None:
+                return
+            self._gc_thread = threading.Thread(target=self._gc_loop, name="lg_artifact_gc", daemon=True)
+            self._gc_thread.start()
+
+    def _gc_loop(self):
+        while True:
+            time.sleep(GC_INTERVAL)
+            try:
+                self.collect()
+            except Exception as e:
+                print(f"[ArtifactManager] 回收临时文件出错: {e}")
+
+
+# 全局临时文件管理器实例
+artifact_manager = ArtifactManager()
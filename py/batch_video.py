@@ -1,18 +1,27 @@
 """
 视频合并节点
-1. CreateAndSaveVideo: 从图片创建视频并保存，返回路径
+1. CreateAndSaveVideo: 从图片创建视频并保存，返回路径（可按 GOP 分块并行编码）
 2. ConcatVideoFiles: 使用 FFmpeg 合并多个视频文件（多行文本输入路径）
 3. SaveAudioGetPath: 保存音频并返回文件路径
+4. StreamingVideoWriter: 按会话保持编码器，跨多次执行把帧追加到同一个分片 MP4
 """
 
 from __future__ import annotations
 
 import os
+import json
+import atexit
+import shutil
 import subprocess
 import tempfile
+import threading
+import wave
+import torch
 import folder_paths
 from fractions import Fraction
 from comfy.cli_args import args
+from .video_io import encode_frames_chunked, build_concat_command, StreamingVideoWriter, AV_AVAILABLE, DEFAULT_CHUNK_SIZE
+from .image_convert import UInt8Buffer
 CATEGORY_TYPE = "🎈LAOGOU/Group"
 
 class LG_CreateAndSaveVideo:
@@ -30,6 +39,12 @@ class LG_CreateAndSaveVideo:
             },
             "optional": {
                 "audio": ("AUDIO",),
+                "encode_mode": (["single", "chunked"], {"default": "single",
+                    "tooltip": "single=单次编码，chunked=按 GOP 切分后多进程并行编码再无损拼接（需要 FFmpeg，帧数多时更快）"}),
+                "workers": ("INT", {"default": 0, "min": 0, "max": 64, "step": 1,
+                    "tooltip": "chunked 模式下并行编码的片段数，0 为按 CPU 核数自动选择"}),
+                "gop": ("INT", {"default": 0, "min": 0, "max": 1000, "step": 1,
+                    "tooltip": "chunked 模式下的关键帧间隔（帧），片段长度为其整数倍，0 为约 2 秒"}),
             },
             "hidden": {
                 "prompt": "PROMPT",
@@ -43,7 +58,7 @@ class LG_CreateAndSaveVideo:
     CATEGORY = CATEGORY_TYPE
     DESCRIPTION = "从图片创建视频并保存，返回文件路径"
 
-    def create_and_save(self, images, fps, filename_prefix, audio=None, prompt=None, extra_pnginfo=None):
+    def create_and_save(self, images, fps, filename_prefix, audio=None, encode_mode="single", workers=0, gop=0, prompt=None, extra_pnginfo=None):
         try:
             from comfy_api.latest._input_impl.video_types import VideoFromComponents
             from comfy_api.latest._util.video_types import VideoComponents, VideoContainer, VideoCodec
@@ -75,6 +90,10 @@ class LG_CreateAndSaveVideo:
         
         file = f"{filename}_{counter:05}_.mp4"
         file_path = os.path.join(full_output_folder, file)
+
+        if encode_mode == "chunked":
+            if self.save_chunked(images, fps, file_path, audio, saved_metadata, workers, gop):
+                return (file_path,)
         
         video.save_to(
             file_path,
@@ -85,6 +104,58 @@ class LG_CreateAndSaveVideo:
         
         return (file_path,)
 
+    def save_chunked(self, images, fps, file_path, audio, metadata, workers, gop):
+        """分块并行编码，条件不满足时返回 False 由调用方回退到单次编码"""
+        width, height = images.shape[2], images.shape[1]
+        if not shutil.which("ffmpeg"):
+            print("[CreateAndSaveVideo] 未找到 FFmpeg，回退为单次编码")
+            return False
+        if width % 2 or height % 2:
+            print("[CreateAndSaveVideo] 宽高不是偶数，回退为单次编码")
+            return False
+        if images.shape[0] <= (gop or round(fps * 2)):
+            return False
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            audio_path = None
+            if audio is not None:
+                audio_path = os.path.join(temp_dir, "audio.wav")
+                _write_wav(audio, audio_path)
+            metadata_path = None
+            if metadata:
+                metadata_path = os.path.join(temp_dir, "metadata.txt")
+                _write_ffmetadata(metadata, metadata_path)
+            segments = encode_frames_chunked(
+                images, file_path, fps, workers=workers, gop=gop,
+                audio_path=audio_path, metadata_path=metadata_path
+            )
+        print(f"[CreateAndSaveVideo] 分 {segments} 段并行编码 {images.shape[0]} 帧: {file_path}")
+        return True
+
+
+def _write_wav(audio, path):
+    """把 AUDIO（waveform [B,C,T]）的第一条写为 16 位 PCM WAV"""
+    waveform = audio["waveform"][0]
+    pcm = (waveform.clamp(-1.0, 1.0) * 32767.0).to(torch.int16).t().contiguous()
+    with wave.open(path, "wb") as f:
+        f.setnchannels(waveform.shape[0])
+        f.setsampwidth(2)
+        f.setframerate(int(audio["sample_rate"]))
+        f.writeframes(pcm.cpu().numpy().tobytes())
+
+
+def _write_ffmetadata(metadata, path):
+    """按 FFMETADATA 格式写入容器元数据，值与 save_to 一致为 JSON 文本"""
+    def escape(text):
+        for ch in ("\\", "=", ";", "#", "\n"):
+            text = text.replace(ch, "\\" + ch)
+        return text
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(";FFMETADATA1\n")
+        for key, value in metadata.items():
+            f.write(f"{escape(key)}={escape(json.dumps(value))}\n")
+
 
 class LG_ConcatVideoFiles:
     """
@@ -170,122 +241,11 @@ class LG_ConcatVideoFiles:
             concat_file = f.name
         
         try:
-            if audio_path:
-                # 有音频输入时，需要两步处理：先合并视频，再添加音频
-                # 创建临时文件用于中间结果
-                temp_video = tempfile.NamedTemporaryFile(suffix='.mp4', delete=False).name
-                
-                # 第一步：合并视频片段
-                if reencode:
-                    cmd1 = [
-                        'ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', concat_file,
-                        '-c:v', 'libx264', '-preset', 'medium', '-crf', '23',
-                        '-an',  # 不包含音频
-                        '-movflags', '+faststart',
-                        temp_video
-                    ]
-                else:
-                    cmd1 = [
-                        'ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', concat_file,
-                        '-c:v', 'copy', '-an',
-                        '-movflags', '+faststart',
-                        temp_video
-                    ]
-                
-                result = subprocess.run(cmd1, capture_output=True, text=True)
-                if result.returncode != 0:
-                    raise RuntimeError(f"FFmpeg 合并视频错误:\n{result.stderr}")
-                
-                # 第二步：添加音频
-                if audio_mode == "mix":
-                    # 混合模式：先合并带原音频的视频，再混合新音频
-                    # 重新合并带音频的视频
-                    temp_video_with_audio = tempfile.NamedTemporaryFile(suffix='.mp4', delete=False).name
-                    if reencode:
-                        cmd_audio = [
-                            'ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', concat_file,
-                            '-c:v', 'libx264', '-preset', 'medium', '-crf', '23',
-                            '-c:a', 'aac', '-b:a', '128k',
-                            '-movflags', '+faststart',
-                            temp_video_with_audio
-                        ]
-                    else:
-                        cmd_audio = [
-                            'ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', concat_file,
-                            '-c', 'copy',
-                            '-movflags', '+faststart',
-                            temp_video_with_audio
-                        ]
-                    result = subprocess.run(cmd_audio, capture_output=True, text=True)
-                    if result.returncode != 0:
-                        raise RuntimeError(f"FFmpeg 合并音频错误:\n{result.stderr}")
-                    
-                    # 混合两个音频
-                    cmd2 = [
-                        'ffmpeg', '-y',
-                        '-i', temp_video_with_audio,
-                        '-i', audio_path,
-                        '-filter_complex', f'[0:a][1:a]amix=inputs=2:duration=first:dropout_transition=2,volume={audio_volume}[a]',
-                        '-map', '0:v', '-map', '[a]',
-                        '-c:v', 'copy',
-                        '-c:a', 'aac', '-b:a', '128k',
-                        '-movflags', '+faststart',
-                        '-shortest',
-                        output_file
-                    ]
-                    try:
-                        result = subprocess.run(cmd2, capture_output=True, text=True)
-                        if result.returncode != 0:
-                            raise RuntimeError(f"FFmpeg 混合音频错误:\n{result.stderr}")
-                    finally:
-                        if os.path.exists(temp_video_with_audio):
-                            os.unlink(temp_video_with_audio)
-                else:
-                    # 替换模式：直接用新音频替换
-                    volume_filter = f'volume={audio_volume}' if audio_volume != 1.0 else None
-                    cmd2 = [
-                        'ffmpeg', '-y',
-                        '-i', temp_video,
-                        '-i', audio_path,
-                        '-map', '0:v', '-map', '1:a',
-                        '-c:v', 'copy',
-                    ]
-                    if volume_filter:
-                        cmd2.extend(['-af', volume_filter])
-                    cmd2.extend([
-                        '-c:a', 'aac', '-b:a', '128k',
-                        '-movflags', '+faststart',
-                        '-shortest',
-                        output_file
-                    ])
-                    result = subprocess.run(cmd2, capture_output=True, text=True)
-                    if result.returncode != 0:
-                        raise RuntimeError(f"FFmpeg 添加音频错误:\n{result.stderr}")
-                
-                # 清理临时文件
-                if os.path.exists(temp_video):
-                    os.unlink(temp_video)
-            else:
-                # 无音频输入，原有逻辑
-                if reencode:
-                    cmd = [
-                        'ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', concat_file,
-                        '-c:v', 'libx264', '-preset', 'medium', '-crf', '23',
-                        '-c:a', 'aac', '-b:a', '128k',
-                        '-movflags', '+faststart',
-                        output_file
-                    ]
-                else:
-                    cmd = [
-                        'ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', concat_file,
-                        '-c', 'copy',
-                        '-movflags', '+faststart',
-                        output_file
-                    ]
-                
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                if result.returncode != 0:
-                    raise RuntimeError(f"FFmpeg 错误:\n{result.stderr}")
+            # 拼接、（可选）重新编码、音频替换/混合与音量调整编译为一次 FFmpeg 调用，不产生中间文件
+            cmd = build_concat_command(concat_file, output_file, reencode, audio_path, audio_mode, audio_volume)
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise RuntimeError(f"FFmpeg 错误:\n{result.stderr}")
         finally:
             if os.path.exists(concat_file):
                 os.unlink(concat_file)
@@ -460,3 +420,159 @@ class LG_SaveAudioGetPath:
             return {"ui": {"audio": []}, "result": ("",)}
 
 
+class _VideoSession:
+    """一个打开的流式写入会话"""
+
+    def __init__(self, writer, file_path, subfolder, width, height, fps):
+        self.writer = writer
+        self.file_path = file_path
+        self.subfolder = subfolder
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.buffer = UInt8Buffer()
+
+
+_sessions_lock = threading.Lock()
+# session_key -> _VideoSession
+_sessions = {}
+
+
+def _close_session(key):
+    with _sessions_lock:
+        session = _sessions.pop(key, None)
+    if session is not None:
+        session.writer.close()
+    return session
+
+
+@atexit.register
+def _close_all_sessions():
+    with _sessions_lock:
+        keys = list(_sessions)
+    for key in keys:
+        try:
+            _close_session(key)
+        except Exception as e:
+            print(f"[StreamingVideoWriter] 关闭会话 {key} 时出错: {e}")
+
+
+class LG_StreamingVideoWriter:
+    """
+    跨多次执行追加写入同一个视频文件
+    同一 session_key 的每次执行把帧（和可选音频）追加到已打开的编码器，finalize=True 时关闭文件；
+    输出为分片 MP4，中途中断时已写出的部分仍可播放。
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "images": ("IMAGE",),
+                "fps": ("FLOAT", {"default": 30.0, "min": 1.0, "max": 120.0, "step": 1.0}),
+                "filename_prefix": ("STRING", {"default": "video/stream"}),
+                "session_key": ("STRING", {"default": "default",
+                    "tooltip": "会话标识，相同标识的多次执行写入同一个文件"}),
+            },
+            "optional": {
+                "audio": ("AUDIO",),
+                "finalize": ("BOOLEAN", {"default": False,
+                    "tooltip": "写入本次的帧后关闭文件，下一次执行会开始新文件"}),
+                "crf": ("INT", {"default": 19, "min": 0, "max": 51, "step": 1,
+                    "tooltip": "H.264 质量，越小质量越高"}),
+                "gop": ("INT", {"default": 0, "min": 0, "max": 1000, "step": 1,
+                    "tooltip": "关键帧间隔（帧），也是中断时最多丢失的帧数，0 为约 1 秒"}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING", "INT")
+    RETURN_NAMES = ("file_path", "frame_count")
+    OUTPUT_NODE = True
+    FUNCTION = "append"
+    CATEGORY = CATEGORY_TYPE
+    DESCRIPTION = "跨多次执行（如组重复执行）把帧追加到同一个分片 MP4，finalize 时关闭文件"
+
+    @classmethod
+    def IS_CHANGED(cls, **kwargs):
+        # 每次执行都要追加，不能被缓存跳过
+        return float("NaN")
+
+    def append(self, images, fps, filename_prefix, session_key, audio=None, finalize=False, crf=19, gop=0):
+        if images.ndim == 3:
+            images = images.unsqueeze(0)
+        width, height = images.shape[2], images.shape[1]
+
+        with _sessions_lock:
+            session = _sessions.get(session_key)
+        if session is not None and (session.width, session.height, session.fps) != (width, height, fps):
+            print(f"[StreamingVideoWriter] 会话 {session_key} 的尺寸或帧率变化，关闭旧文件并开始新文件")
+            _close_session(session_key)
+            session = None
+        if session is None:
+            session = self.open_session(images, fps, filename_prefix, session_key, audio, crf, gop)
+
+        writer = session.writer
+        try:
+            for start in range(0, images.shape[0], DEFAULT_CHUNK_SIZE):
+                chunk = images[start:start + DEFAULT_CHUNK_SIZE, ..., :3]
+                writer.write(session.buffer.convert(chunk))
+            if writer.audio_rate:
+                self.write_audio(writer, audio)
+        except Exception:
+            # 编码器出错后会话不可再用，关闭以保留已写出的部分
+            _close_session(session_key)
+            raise
+
+        frame_count = writer.frame_count
+        print(f"[StreamingVideoWriter] 会话 {session_key} 追加 {images.shape[0]} 帧，共 {frame_count} 帧")
+        if not finalize:
+            return {"result": (session.file_path, frame_count)}
+
+        _close_session(session_key)
+        print(f"[StreamingVideoWriter] 会话 {session_key} 已完成: {session.file_path}")
+        video = {"filename": os.path.basename(session.file_path), "subfolder": session.subfolder, "type": "output", "format": "mp4"}
+        return {"ui": {"videos": [video]}, "result": (session.file_path, frame_count)}
+
+    def open_session(self, images, fps, filename_prefix, session_key, audio, crf, gop):
+        width, height = images.shape[2], images.shape[1]
+        output_dir = folder_paths.get_output_directory()
+        full_output_folder, filename, counter, subfolder, _ = folder_paths.get_save_image_path(
+            filename_prefix, output_dir, width, height
+        )
+        file_path = os.path.join(full_output_folder, f"{filename}_{counter:05}_.mp4")
+
+        audio_rate, audio_channels = 0, 2
+        if audio is not None:
+            if AV_AVAILABLE:
+                audio_rate = int(audio["sample_rate"])
+                audio_channels = min(2, audio["waveform"].shape[1])
+            else:
+                print("[StreamingVideoWriter] 写入音轨需要 PyAV，忽略音频")
+
+        writer = StreamingVideoWriter(
+            file_path, width, height, fps, codec="h264", crf=crf,
+            gop=gop or max(1, round(fps)), fragmented=True,
+            audio_rate=audio_rate, audio_channels=audio_channels
+        )
+        session = _VideoSession(writer, file_path, subfolder, width, height, fps)
+        with _sessions_lock:
+            _sessions[session_key] = session
+        print(f"[StreamingVideoWriter] 会话 {session_key} 开始写入: {file_path}")
+        return session
+
+    def write_audio(self, writer, audio):
+        """按视频时间线对齐写入音频：本次音频截断或补静音到与已写入的帧时长一致"""
+        target = round(writer.frame_count / writer.fps * writer.audio_rate) - writer.audio_samples
+        if target <= 0:
+            return
+        waveform = None
+        if audio is not None:
+            if int(audio["sample_rate"]) == writer.audio_rate:
+                waveform = audio["waveform"][0, :, :target]
+            else:
+                print("[StreamingVideoWriter] 音频采样率与会话不一致，以静音代替")
+        if waveform is None:
+            waveform = torch.zeros((writer.audio_channels, 0))
+        if waveform.shape[1] < target:
+            waveform = torch.nn.functional.pad(waveform.float(), (0, target - waveform.shape[1]))
+        writer.write_audio(waveform)
@@ -0,0 +1,78 @@
+"""
+内容指纹工具
+1. 供发送节点的 IS_CHANGED 使用：对张量字节做抽样/全量哈希，替代 hash(str(tensor))
+2. 全量模式 (full=True) 用于内容寻址去重
+"""
+
+import hashlib
+
+import numpy as np
+import torch
+
+# 小于该字节数的张量做全量哈希，否则做等间隔抽样哈希
+FULL_HASH_MAX_BYTES = 4 * 1024 * 1024
+# 抽样哈希时采样的元素数量
+SAMPLE_ELEMENTS = 64 * 1024
+
+
+def _update_with_tensor(h, tensor, full):
+    h.update(f"T{tuple(tensor.shape)}{tensor.dtype}".encode())
+    t = tensor.detach()
+    if t.numel() == 0:
+        return
+    flat = t.reshape(-1)
+    nbytes = flat.numel() * flat.element_size()
+
+    if not full and nbytes > FULL_HASH_MAX_BYTES:
+        # 在设备上完成抽样，只把采样结果拷回主机
+        step = max(1, flat.numel() // SAMPLE_ELEMENTS)
+        sample = flat[::step]
+        h.update(f"S{step}".encode())
+        flat = torch.cat((sample, flat[-1:]))
+
+    if flat.device.type != "cpu":
+        flat = flat.cpu()
+    # CPU 连续张量按字节视图直接取底层缓冲区，不产生额外拷贝
+    flat = flat.contiguous().view(torch.uint8)
+    h.update(memoryview(flat.numpy()))
+
+
+def _update(h, value, full):
+    if value is None:
+        h.update(b"N")
+    elif isinstance(value, torch.Tensor):
+        _update_with_tensor(h, value, full)
+    elif isinstance(value, np.ndarray):
+        h.update(f"A{value.shape}{value.dtype.str}".encode())
+        h.update(memoryview(np.ascontiguousarray(value)).cast("B"))
+    elif isinstance(value, (list, tuple)):
+        h.update(f"L{len(value)}".encode())
+        for item in value:
+            _update(h, item, full)
+    elif isinstance(value, dict):
+        h.update(f"D{len(value)}".encode())
+        for key in sorted(value, key=str):
+            h.update(str(key).encode())
+            _update(h, value[key], full)
+    elif isinstance(value, bytes):
+        h.update(b"B")
+        h.update(value)
+    else:
+        h.update(f"{type(value).__name__}:".encode())
+        h.update(str(value).encode("utf-8", "surrogatepass"))
+
+
+def fingerprint(*values, full=False):
+    """计算任意输入（张量、列表、字符串等）的内容指纹
+
+    Args:
+        values: 要参与指纹计算的值
+        full: True 时对张量做全量哈希，否则大张量只做等间隔抽样
+
+    Returns:
+        十六进制指纹字符串
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for value in values:
+        _update(h, value, full)
+    return h.hexdigest()
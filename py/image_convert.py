@@ -0,0 +1,84 @@
+"""
+浮点图像到 uint8 的转换
+发送/预览节点共用：整批在张量所在设备上完成缩放、截断和类型转换（float32，不经过 float64 中间结果），
+再一次性拷回主机；UInt8Buffer 可在多次调用之间复用输出缓冲。
+
+基准测试: python py/image_convert.py [batch] [height] [width]
+"""
+
+import torch
+
+
+def to_uint8(images, out=None, invert=False, inplace=False):
+    """将 [0,1] 浮点张量转换为同形状的 uint8 numpy 数组
+
+    Args:
+        images: 任意形状的浮点张量（可以在 GPU 上）
+        out: 可选的 uint8 CPU 张量，形状与 images 相同，结果直接写入其中
+        invert: True 时转换 1 - images（遮罩转 alpha）
+        inplace: True 时直接在 images 上做缩放，省去一份浮点临时张量（调用方须拥有该张量）
+
+    Returns:
+        uint8 numpy 数组；提供 out 时为 out 的视图
+    """
+    t = images.detach()
+    if invert:
+        t = t.mul_(-255.0) if inplace else t.mul(-255.0)
+        t.add_(255.0)
+    else:
+        t = t.mul_(255.0) if inplace else t.mul(255.0)
+    t = t.clamp_(0, 255).to(torch.uint8)
+    if out is None:
+        return t.cpu().numpy()
+    out.copy_(t)
+    return out.numpy()
+
+
+class UInt8Buffer:
+    """跨调用复用的 uint8 输出缓冲
+
+    返回的数组在下一次 convert 时会被覆盖，只适用于同步消费结果的场景（如逐块送入编码器）
+    """
+
+    def __init__(self):
+        self.tensor = None
+
+    def convert(self, images, invert=False, inplace=False):
+        numel = images.numel()
+        if self.tensor is None or self.tensor.numel() < numel:
+            # 从 GPU 拷回时使用锁页内存，加快传输
+            pin = images.is_cuda and torch.cuda.is_available()
+            self.tensor = torch.empty((numel,), dtype=torch.uint8, pin_memory=pin)
+        out = self.tensor[:numel].view(images.shape)
+        return to_uint8(images, out=out, invert=invert, inplace=inplace)
+
+
+def _benchmark(batch=16, height=1024, width=1024, repeat=10):
+    import time
+
+    import numpy as np
+
+    images = torch.rand((batch, height, width, 3), dtype=torch.float32)
+
+    def legacy():
+        return [np.clip(255. * image.cpu().numpy(), 0, 255).astype(np.uint8) for image in images]
+
+    buffer = UInt8Buffer()
+    cases = [
+        ("逐张 numpy (float64)", legacy),
+        ("整批 to_uint8", lambda: to_uint8(images)),
+        ("整批 UInt8Buffer", lambda: buffer.convert(images)),
+    ]
+    print(f"[ImageConvert] 基准测试: {batch}x{height}x{width}x3, 重复 {repeat} 次")
+    for name, fn in cases:
+        fn()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        elapsed = (time.perf_counter() - start) / repeat
+        print(f"[ImageConvert] {name}: {elapsed * 1000:.1f} ms/批")
+
+
+if __name__ == "__main__":
+    import sys
+    _benchmark(*[int(x) for x in sys.argv[1:4]])
@@ -0,0 +1,167 @@
+"""
+图像读取工具
+供 LG_ImageReceiver 等节点共用：线程池并行解码，并可直接写入预分配的批量张量
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+from PIL import Image
+
+_decode_pool = None
+_decode_pool_lock = threading.Lock()
+
+
+def get_decode_pool():
+    """获取共享的解码线程池（PIL 解码与 torch 拷贝都会释放 GIL）"""
+    global _decode_pool
+    with _decode_pool_lock:
+        if _decode_pool is None:
+            workers = min(8, os.cpu_count() or 1)
+            _decode_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lg_image_decode")
+        return _decode_pool
+
+
+def probe_image_size(path):
+    """只读取文件头获取 (宽, 高)，不解码像素"""
+    with Image.open(path) as img:
+        return img.size
+
+
+def decode_image_into(path, image_dst, mask_dst):
+    """解码单个图像文件，直接写入目标缓冲区
+
+    Args:
+        path: 图像文件路径
+        image_dst: [H, W, 3] float32 目标张量
+        mask_dst: [H, W] float32 目标张量（RGBA 时为 1 - alpha，否则为 0）
+    """
+    # np.asarray 得到的是只读数组，torch.from_numpy 会对其发出警告，这里取可写的副本
+    with Image.open(path) as img:
+        if img.mode == 'RGBA':
+            arr = np.array(img)
+            image_dst.copy_(torch.from_numpy(arr[..., :3]))
+            image_dst.div_(255.0)
+            mask_dst.copy_(torch.from_numpy(arr[..., 3]))
+            mask_dst.div_(255.0).neg_().add_(1.0)
+        else:
+            arr = np.array(img.convert('RGB'))
+            image_dst.copy_(torch.from_numpy(arr))
+            image_dst.div_(255.0)
+            mask_dst.zero_()
+
+
+def decode_image(path):
+    """解码单个图像文件，返回 ([1, H, W, 3] 图像, [1, H, W] 遮罩)"""
+    width, height = probe_image_size(path)
+    image = torch.empty((1, height, width, 3), dtype=torch.float32)
+    mask = torch.empty((1, height, width), dtype=torch.float32)
+    decode_image_into(path, image[0], mask[0])
+    return image, mask
+
+
+def decoded_from_arrays(rgb, alpha=None):
+    """由写入 RGBA PNG 前的 uint8 数组直接得到与 decode_image 完全相同的 (图像, 遮罩)
+
+    Args:
+        rgb: [H, W, 3] uint8 数组
+        alpha: [H, W] uint8 alpha 数组，None 表示写入的 alpha 全为 255
+    """
+    image = torch.from_numpy(rgb).unsqueeze(0).float().div_(255.0)
+    if alpha is None:
+        mask = torch.zeros(image.shape[:3], dtype=torch.float32)
+    else:
+        mask = torch.from_numpy(alpha).unsqueeze(0).float().div_(255.0).neg_().add_(1.0)
+    return image, mask
+
+
+def _warm_result(warm, path):
+    """从预热缓存取得已解码的 (图像, 遮罩)（共享张量），未缓存时返回 None"""
+    return warm(path) if warm is not None else None
+
+
+def _decode_or_warm(path, warm):
+    cached = _warm_result(warm, path)
+    if cached is None:
+        return decode_image(path)
+    # 缓存中的张量为共享对象，交给下游的必须是副本
+    return cached[0].clone(), cached[1].clone()
+
+
+def _decode_or_copy_into(path, warm, image_dst, mask_dst):
+    cached = _warm_result(warm, path)
+    if cached is None:
+        decode_image_into(path, image_dst, mask_dst)
+    else:
+        image_dst.copy_(cached[0][0])
+        mask_dst.copy_(cached[1][0])
+
+
+def load_images_as_list(paths, tag="ImageReceiver", warm=None):
+    """并行解码多个文件，按原顺序返回 ([1,H,W,3] 列表, [1,H,W] 列表)，失败的文件被跳过
+
+    warm: 可选的 warm(path) -> (图像, 遮罩) 或 None，命中预热缓存的文件直接复制已解码的张量
+    """
+    pool = get_decode_pool()
+    futures = [pool.submit(_decode_or_warm, p, warm) for p in paths]
+
+    output_images = []
+    output_masks = []
+    for path, future in zip(paths, futures):
+        try:
+            image, mask = future.result()
+        except Exception as e:
+            print(f"[{tag}] 处理文件 {os.path.basename(path)} 时出错: {str(e)}")
+            continue
+        output_images.append(image)
+        output_masks.append(mask)
+    return output_images, output_masks
+
+
+def load_images_as_batch(paths, tag="ImageReceiver", warm=None):
+    """并行解码多个同尺寸文件到预分配的 [N,H,W,3] / [N,H,W] 批量张量，命中预热缓存的文件直接拷贝
+
+    Returns:
+        (images, masks)；尺寸不一致时返回 None，由调用方回退到列表模式。无法读取的文件被跳过
+    """
+    valid_paths = []
+    sizes = []
+    for path in paths:
+        try:
+            sizes.append(probe_image_size(path))
+            valid_paths.append(path)
+        except Exception as e:
+            print(f"[{tag}] 处理文件 {os.path.basename(path)} 时出错: {str(e)}")
+    paths = valid_paths
+    if not paths:
+        return (torch.zeros((0, 64, 64, 3), dtype=torch.float32),
+                torch.zeros((0, 64, 64), dtype=torch.float32))
+    if len(set(sizes)) != 1:
+        return None
+
+    width, height = sizes[0]
+    count = len(paths)
+    images = torch.empty((count, height, width, 3), dtype=torch.float32)
+    masks = torch.empty((count, height, width), dtype=torch.float32)
+
+    pool = get_decode_pool()
+    futures = [pool.submit(_decode_or_copy_into, p, warm, images[i], masks[i]) for i, p in enumerate(paths)]
+
+    failed = []
+    for i, (path, future) in enumerate(zip(paths, futures)):
+        try:
+            future.result()
+        except Exception as e:
+            print(f"[{tag}] 处理文件 {os.path.basename(path)} 时出错: {str(e)}")
+            failed.append(i)
+
+    if failed:
+        keep = torch.tensor([i for i in range(count) if i not in failed], dtype=torch.long)
+        if len(keep) == 0:
+            return images[:0], masks[:0]
+        images = images.index_select(0, keep)
+        masks = masks.index_select(0, keep)
+    return images, masks
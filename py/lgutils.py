@@ -9,36 +9,66 @@ import random
 from aiohttp import web
 import execution
 import nodes
+from .artifacts import artifact_manager
+from . import thumbs
+from .warm_cache import warm_cache
 
 CATEGORY_TYPE = "🎈LAOGOU/Group"
 
 # ============ 后台执行辅助函数 ============
 
-def recursive_add_nodes(node_id, old_output, new_output):
-    """从输出节点递归收集所有依赖节点（与前端 queueManager.recursiveAddNodes 逻辑一致）"""
-    current_id = str(node_id)
-    current_node = old_output.get(current_id)
-    
-    if not current_node:
-        return new_output
-    
-    if current_id not in new_output:
-        new_output[current_id] = current_node
-        inputs = current_node.get("inputs", {})
-        for input_value in inputs.values():
-            if isinstance(input_value, list) and len(input_value) >= 1:
-                # input_value 格式: [source_node_id, output_index]
-                recursive_add_nodes(input_value[0], old_output, new_output)
-    
-    return new_output
-
-def filter_prompt_for_nodes(full_prompt, output_node_ids):
-    """从完整的 API prompt 中筛选出指定输出节点及其依赖"""
+def build_dependency_index(prompt):
+    """建立 节点 ID -> 直接依赖节点 ID 列表 的索引，同一个 prompt 多次筛选时复用"""
+    index = {}
+    for node_id, node in prompt.items():
+        deps = []
+        if isinstance(node, dict):
+            for input_value in (node.get("inputs") or {}).values():
+                # 连接输入的格式: [source_node_id, output_index]
+                if isinstance(input_value, list) and len(input_value) >= 1:
+                    deps.append(str(input_value[0]))
+        index[str(node_id)] = deps
+    return index
+
+def filter_prompt_for_nodes(full_prompt, output_node_ids, dependency_index=None):
+    """从完整的 API prompt 中筛选出指定输出节点及其依赖（与前端 queueManager.recursiveAddNodes 逻辑一致）"""
+    if dependency_index is None:
+        dependency_index = build_dependency_index(full_prompt)
     filtered_prompt = {}
-    for node_id in output_node_ids:
-        recursive_add_nodes(str(node_id), full_prompt, filtered_prompt)
+    stack = [str(node_id) for node_id in output_node_ids]
+    # 迭代遍历，避免深层依赖链超出递归深度
+    while stack:
+        node_id = stack.pop()
+        if node_id in filtered_prompt or node_id not in full_prompt:
+            continue
+        filtered_prompt[node_id] = full_prompt[node_id]
+        stack.extend(dependency_index.get(node_id, ()))
     return filtered_prompt
 
+def filter_group_executor_prompt(json_data):
+    """提交 prompt 时的钩子：工作流中有 GroupExecutorSender 时，只保留它及其依赖节点
+
+    原先由前端包装 api.fetchApi 完成，现在在服务端处理，前端按原样提交 prompt
+    """
+    try:
+        extra_data = json_data.get("extra_data") or {}
+        if extra_data.get("isGroupExecutorRequest"):
+            return json_data
+        prompt = json_data.get("prompt")
+        if not isinstance(prompt, dict):
+            return json_data
+        senders = [node_id for node_id, node in prompt.items()
+                   if isinstance(node, dict) and node.get("class_type") == "GroupExecutorSender"]
+        if not senders:
+            return json_data
+        json_data["prompt"] = filter_prompt_for_nodes(prompt, senders)
+        json_data["extra_data"] = {**extra_data, "isGroupExecutorRequest": True}
+    except Exception as e:
+        print(f"[GroupExecutor] 筛选 prompt 出错: {e}")
+        import traceback
+        traceback.print_exc()
+    return json_data
+
 class GroupExecutorBackend:
     """后台执行管理器"""
     
@@ -82,13 +112,14 @@ class GroupExecutorBackend:
                 if task_info.get("status") == "running" and not task_info.get("cancel"):
                     task_info["cancel"] = True
     
-    def execute_in_background(self, node_id, execution_list, full_api_prompt):
+    def execute_in_background(self, node_id, execution_list, full_api_prompt, client_id=None):
         """启动后台执行线程
         
         Args:
             node_id: 节点 ID
             execution_list: 执行列表，每项包含 group_name, repeat_count, delay_seconds, output_node_ids
             full_api_prompt: 前端生成的完整 API prompt（已经是正确格式）
+            client_id: 发起请求的前端客户端 ID，发送端事件只推送给该客户端
         """
         with self.task_lock:
             if node_id in self.running_tasks and self.running_tasks[node_id].get("status") == "running":
@@ -96,7 +127,7 @@ class GroupExecutorBackend:
             
             thread = threading.Thread(
                 target=self._execute_task,
-                args=(node_id, execution_list, full_api_prompt),
+                args=(node_id, execution_list, full_api_prompt, client_id),
                 daemon=True
             )
             thread.start()
@@ -124,15 +155,18 @@ class GroupExecutorBackend:
                 return True
             return False
     
-    def _execute_task(self, node_id, execution_list, full_api_prompt):
+    def _execute_task(self, node_id, execution_list, full_api_prompt, client_id=None):
         """后台执行任务的核心逻辑
         
         Args:
             node_id: 节点 ID
             execution_list: 执行列表
             full_api_prompt: 前端生成的完整 API prompt
+            client_id: 发起请求的前端客户端 ID
         """
         try:
+            # 完整 prompt 的依赖索引只建立一次，各执行项共用
+            dependency_index = build_dependency_index(full_api_prompt)
             for exec_item in execution_list:
                 # 检查取消标志
                 if self.running_tasks.get(node_id, {}).get("cancel"):
@@ -159,6 +193,19 @@ class GroupExecutorBackend:
                     print(f"[GroupExecutor] 跳过无效执行项: group_name={group_name}, output_node_ids={output_node_ids}")
                     continue
                 
+                # 从完整 prompt 中筛选出该组需要的节点（每个执行项只筛选一次）
+                filtered_prompt = filter_prompt_for_nodes(full_api_prompt, output_node_ids, dependency_index)
+                
+                if not filtered_prompt:
+                    print(f"[GroupExecutor] 筛选 prompt 失败")
+                    continue
+                
+                # 有种子参数（seed / noise_seed）的节点，每次重复时替换为新的随机值
+                seed_nodes = [
+                    node_id_str for node_id_str, node_data in filtered_prompt.items()
+                    if "seed" in node_data.get("inputs", {}) or "noise_seed" in node_data.get("inputs", {})
+                ]
+                
                 # 执行 repeat_count 次
                 for i in range(repeat_count):
                     # 检查取消标志
@@ -168,25 +215,17 @@ class GroupExecutorBackend:
                     if repeat_count > 1:
                         print(f"[GroupExecutor] 执行组 '{group_name}' ({i+1}/{repeat_count})")
                     
-                    # 从完整 prompt 中筛选出该组需要的节点
-                    prompt = filter_prompt_for_nodes(full_api_prompt, output_node_ids)
-                    
-                    if not prompt:
-                        print(f"[GroupExecutor] 筛选 prompt 失败")
-                        continue
-                    
-                    # 处理随机种子：为每个有 seed 参数的节点生成新的随机值
-                    for node_id_str, node_data in prompt.items():
-                        if "seed" in node_data.get("inputs", {}):
-                            new_seed = random.randint(0, 0xffffffffffffffff)
-                            prompt[node_id_str]["inputs"]["seed"] = new_seed
-                        # 也处理 noise_seed（某些节点使用这个名称）
-                        if "noise_seed" in node_data.get("inputs", {}):
-                            new_seed = random.randint(0, 0xffffffffffffffff)
-                            prompt[node_id_str]["inputs"]["noise_seed"] = new_seed
+                    # 只复制需要修改种子的节点，其余节点与筛选结果共享
+                    prompt = dict(filtered_prompt)
+                    for node_id_str in seed_nodes:
+                        inputs = dict(prompt[node_id_str]["inputs"])
+                        for key in ("seed", "noise_seed"):
+                            if key in inputs:
+                                inputs[key] = random.randint(0, 0xffffffffffffffff)
+                        prompt[node_id_str] = {**prompt[node_id_str], "inputs": inputs}
                     
                     # 提交到队列
-                    prompt_id = self._queue_prompt(prompt)
+                    prompt_id = self._queue_prompt(prompt, client_id)
                     
                     if prompt_id:
                         # 等待执行完成（返回是否检测到中断）
@@ -223,7 +262,7 @@ class GroupExecutorBackend:
                     was_cancelled = self.running_tasks[node_id].get("cancel", False)
                     self.running_tasks[node_id]["status"] = "cancelled" if was_cancelled else "completed"
     
-    def _queue_prompt(self, prompt):
+    def _queue_prompt(self, prompt, client_id=None):
         """提交 prompt 到队列"""
         try:
             server = PromptServer.instance
@@ -254,7 +293,9 @@ class GroupExecutorBackend:
             # 获取输出节点列表
             outputs_to_execute = list(valid[2])
             
-            server.prompt_queue.put((number, prompt_id, prompt, {}, outputs_to_execute, {}))
+            # 带上 client_id，执行期间的进度和发送端事件只推送给发起请求的客户端
+            extra_data = {"client_id": client_id} if client_id else {}
+            server.prompt_queue.put((number, prompt_id, prompt, extra_data, outputs_to_execute, {}))
             
             return prompt_id
             
@@ -501,6 +542,7 @@ CONFIG_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "group_co
 os.makedirs(CONFIG_DIR, exist_ok=True)
 
 routes = PromptServer.instance.routes
+PromptServer.instance.add_on_prompt_handler(filter_group_executor_prompt)
 
 @routes.post("/group_executor/execute_backend")
 async def execute_backend(request):
@@ -526,7 +568,8 @@ async def execute_backend(request):
         success = _backend_executor.execute_in_background(
             node_id,
             execution_list,
-            full_api_prompt
+            full_api_prompt,
+            data.get("client_id")
         )
         
         if success:
@@ -540,6 +583,50 @@ async def execute_backend(request):
         traceback.print_exc()
         return web.json_response({"status": "error", "message": str(e)}, status=500)
 
+@routes.get("/group_executor/artifacts")
+async def get_artifact_stats(request):
+    """临时文件占用统计（含接收端预热缓存）"""
+    return web.json_response({"status": "success", "stats": artifact_manager.stats(), "warm": warm_cache.stats()})
+
+@routes.post("/group_executor/artifacts")
+async def configure_artifacts(request):
+    """设置临时文件配额（max_bytes / max_age 秒）并立即回收"""
+    try:
+        data = await request.json()
+        artifact_manager.configure(
+            max_bytes=data.get("max_bytes"),
+            max_age=data.get("max_age")
+        )
+        return web.json_response({"status": "success", "stats": artifact_manager.stats()})
+    except Exception as e:
+        print(f"[GroupExecutor] 设置临时文件配额失败: {e}")
+        return web.json_response({"status": "error", "message": str(e)}, status=400)
+
+@routes.get("/group_executor/thumb")
+async def get_thumbnail(request):
+    """返回缩小后的预览图：filename / subfolder / type 与 /view 相同，size 为长边上限，format 为 webp 或 jpeg"""
+    query = request.rel_url.query
+    source = thumbs.resolve_source(query.get("filename", ""), query.get("subfolder", ""), query.get("type", "temp"))
+    if source is None:
+        return web.Response(status=404)
+    fmt = query.get("format", "webp")
+    try:
+        path = await asyncio.wrap_future(thumbs.get_thumbnail(
+            source,
+            int(query.get("size", thumbs.DEFAULT_SIZE)),
+            fmt,
+            int(query.get("quality", thumbs.DEFAULT_QUALITY))
+        ))
+    except ValueError as e:
+        return web.json_response({"status": "error", "message": str(e)}, status=400)
+    except Exception as e:
+        print(f"[GroupExecutor] 生成缩略图失败: {e}")
+        return web.json_response({"status": "error", "message": str(e)}, status=500)
+    return web.FileResponse(path, headers={
+        "Content-Type": thumbs.content_type(fmt),
+        "Cache-Control": "no-cache"
+    })
+
 @routes.get("/group_executor/configs")
 async def get_configs(request):
     try:
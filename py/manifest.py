@@ -0,0 +1,201 @@
+"""
+发送清单
+发送端把本次要交给接收端的条目（文件名、尺寸、格式、校验值）写成清单文件，
+通过 websocket 只传清单引用；接收端按引用读取清单，并可按索引/切片只加载需要的条目。
+
+清单为 JSON Lines：首行为清单头，之后每行一个条目，只追加不改写。
+引用格式为 <id>@<count>，表示清单的前 count 个条目，累积发送时同一个清单追加新条目、
+引用中的 count 递增，写入量与新增条目数成正比。
+"""
+
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+import folder_paths
+
+from .artifacts import artifact_manager
+from .selector import compile_selector
+
+MANIFEST_PREFIX = "manifest:"
+_CACHE_SIZE = 256
+
+
+def _manifest_dir():
+    path = os.path.join(folder_paths.get_temp_directory(), "lg_manifests")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def parse_reference(ref):
+    """把 <id>@<count> 拆分为 (id, count)，没有 @count 时 count 为 None"""
+    manifest_id, _, count = ref.partition("@")
+    return manifest_id, (int(count) if count else None)
+
+
+class ManifestStore:
+    """清单读写，带内存 LRU 缓存"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # manifest_id -> {"manifest": {...}, "offset": 已读取的文件字节数}
+        self.cache = OrderedDict()
+
+    def path(self, manifest_id):
+        return os.path.join(_manifest_dir(), f"{manifest_id}.jsonl")
+
+    def create(self, kind, link_id, items):
+        """写入新清单，返回清单 ID
+
+        每个 (kind, link_id) 只固定最新的清单，旧清单交给临时文件管理器按配额回收
+        """
+        manifest_id = uuid.uuid4().hex[:16]
+        header = {"id": manifest_id, "kind": kind, "link_id": link_id}
+        manifest = dict(header, items=[])
+        with self.lock:
+            with open(self.path(manifest_id), "wb") as f:
+                f.write(_encode_line(header))
+            self._remember(manifest_id, manifest, 0)
+        self.append(manifest_id, items)
+        return manifest_id
+
+    def append(self, manifest_id, items):
+        """向清单末尾追加条目，返回追加后的条目总数
+
+        清单已被挤出缓存时先从文件重新读取；文件也不存在时抛出 KeyError
+        """
+        path = self.path(manifest_id)
+        data = b"".join(_encode_line(item) for item in items)
+        with self.lock:
+            cached = manifest_id in self.cache
+        if not cached and self.load(manifest_id) is None:
+            raise KeyError(f"清单不存在: {manifest_id}")
+        with self.lock:
+            entry = self.cache.get(manifest_id)
+            if entry is None:
+                raise KeyError(f"清单不存在: {manifest_id}")
+            with open(path, "ab") as f:
+                f.write(data)
+                offset = f.tell()
+            manifest = entry["manifest"]
+            manifest["items"].extend(items)
+            entry["offset"] = offset
+            self.cache.move_to_end(manifest_id)
+            count = len(manifest["items"])
+            kind, link_id = manifest["kind"], manifest["link_id"]
+
+        owner = f"manifest:{kind}:{link_id}"
+        artifact_manager.register(owner, path)
+        artifact_manager.set_live(owner, [path])
+        return count
+
+    def load(self, manifest_id, count=None):
+        """读取清单；count 大于已缓存的条目数时只读取文件中新追加的部分"""
+        path = self.path(manifest_id)
+        with self.lock:
+            entry = self.cache.get(manifest_id)
+            if entry is not None:
+                self.cache.move_to_end(manifest_id)
+                if count is None or count <= len(entry["manifest"]["items"]):
+                    return entry["manifest"]
+            if not os.path.exists(path):
+                return None
+            offset = entry["offset"] if entry is not None else 0
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+            # 只处理完整的行，写入中途的半行留到下次读取
+            complete = data[:data.rfind(b"\n") + 1]
+            lines = [json.loads(line) for line in complete.splitlines() if line.strip()]
+            if entry is None:
+                if not lines:
+                    return None
+                manifest = dict(lines[0], items=lines[1:])
+            else:
+                manifest = entry["manifest"]
+                manifest["items"].extend(lines)
+            self._remember(manifest_id, manifest, offset + len(complete))
+            return manifest
+
+    def _remember(self, manifest_id, manifest, offset):
+        self.cache[manifest_id] = {"manifest": manifest, "offset": offset}
+        self.cache.move_to_end(manifest_id)
+        while len(self.cache) > _CACHE_SIZE:
+            self.cache.popitem(last=False)
+
+
+def _encode_line(obj):
+    return (json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+manifest_store = ManifestStore()
+
+
+class SenderManifest:
+    """发送节点持有的清单状态：非累积发送每次新建清单，累积发送向同一个清单追加新条目"""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.manifest_id = None
+        self.link_id = None
+
+    def publish(self, link_id, new_items, all_items, accumulate):
+        """写入本次发送的条目，返回清单引用 <id>@<count>
+
+        Args:
+            new_items: 本次新增的条目
+            all_items: 本次要交给接收端的全部条目（非累积时与 new_items 相同）
+        """
+        count = None
+        if accumulate and self.manifest_id is not None and self.link_id == link_id:
+            try:
+                count = manifest_store.append(self.manifest_id, new_items)
+            except KeyError:
+                # 清单文件已被回收，改为写入包含全部条目的新清单
+                print(f"[Manifest] 清单 {self.manifest_id} 已失效，重新创建")
+        if count is None:
+            self.manifest_id = manifest_store.create(self.kind, link_id, all_items)
+            self.link_id = link_id
+            count = len(all_items)
+        ref = f"{self.manifest_id}@{count}"
+        if not accumulate:
+            self.manifest_id = None
+        return ref
+
+
+def select_items(items, selection):
+    """按选择表达式选择条目，语法见 selector.py，空表达式为全部"""
+    return compile_selector(selection).select_list(items)
+
+
+def resolve_items(value, selection=""):
+    """解析接收端的输入：清单引用 (manifest:<id>[@<count>]) 或逗号分隔的文件名
+
+    Returns:
+        条目列表，每项至少包含 filename
+    """
+    value = (value or "").strip()
+    if value.startswith(MANIFEST_PREFIX):
+        try:
+            manifest_id, count = parse_reference(value[len(MANIFEST_PREFIX):])
+        except ValueError:
+            print(f"[Manifest] 清单引用格式错误: {value}")
+            return []
+        manifest = manifest_store.load(manifest_id, count)
+        if manifest is None:
+            print(f"[Manifest] 清单不存在: {value}")
+            return []
+        items = manifest["items"]
+        if count is not None:
+            if count > len(items):
+                print(f"[Manifest] 清单 {manifest_id} 只有 {len(items)} 个条目，少于引用的 {count} 个")
+            items = items[:count]
+    else:
+        items = [{"filename": x.strip()} for x in value.split(',') if x.strip()]
+    try:
+        return select_items(items, selection)
+    except ValueError:
+        print(f"[Manifest] 索引格式错误: {selection}")
+        return []
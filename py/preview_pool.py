@@ -0,0 +1,78 @@
+"""
+后台预览编码
+预览节点只负责把图像交给编码线程池并立即返回，编码（可缩小到指定尺寸）完成后
+再通过 executed 消息把预览推送到前端，节点执行时间不再受预览编码影响。
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from PIL import Image
+from server import PromptServer
+
+PREVIEW_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))
+
+_encode_pool = ThreadPoolExecutor(max_workers=PREVIEW_WORKERS, thread_name_prefix="lg_preview")
+# 单线程按提交顺序推送，保证同一节点的预览不会被较早的结果覆盖
+_notify_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lg_preview_notify")
+_lock = threading.Lock()
+_latest = {}
+
+
+def encode_preview(array, path, format, max_size=0, save_kwargs=None):
+    """把 uint8 [H,W,C] 数组编码为预览文件，max_size > 0 时按长边缩小"""
+    img = Image.fromarray(array)
+    # JPEG 不支持透明通道，RGBA/LA 等图像先转换为 RGB
+    if format == "JPEG" and img.mode != "RGB":
+        img = img.convert("RGB")
+    if max_size and max(img.size) > max_size:
+        img.thumbnail((max_size, max_size), Image.BILINEAR)
+    img.save(path, format=format, **(save_kwargs or {}))
+
+
+def _encode_safe(*task):
+    try:
+        encode_preview(*task)
+    except Exception as e:
+        print(f"[Preview] 编码预览 {task[1]} 时出错: {str(e)}")
+        import traceback
+        traceback.print_exc()
+
+
+def submit_previews(node_id, tasks, images, on_done=None):
+    """提交预览编码任务，完成后推送到前端
+
+    Args:
+        node_id: 预览所属节点的 unique_id
+        tasks: [(array, path, format, max_size, save_kwargs), ...]
+        images: 编码完成后推送给前端的预览列表 [{"filename", "subfolder", "type"}, ...]
+        on_done: 编码完成后、推送前在后台线程中调用（如登记临时文件）
+    """
+    prompt_id = getattr(PromptServer.instance, "last_prompt_id", None)
+    futures = [_encode_pool.submit(_encode_safe, *task) for task in tasks]
+    with _lock:
+        token = _latest.get(node_id, 0) + 1
+        _latest[node_id] = token
+    _notify_pool.submit(_notify, node_id, token, futures, images, prompt_id, on_done)
+
+
+def _notify(node_id, token, futures, images, prompt_id, on_done):
+    wait(futures)
+    try:
+        if on_done is not None:
+            on_done()
+        with _lock:
+            if _latest.get(node_id) != token:
+                # 已有更新的预览排在后面，跳过这次推送
+                return
+        if node_id is None:
+            return
+        PromptServer.instance.send_sync("executed", {
+            "node": node_id,
+            "display_node": node_id,
+            "output": {"images": images},
+            "prompt_id": prompt_id,
+        })
+    except Exception as e:
+        print(f"[Preview] 推送预览时出错: {str(e)}")
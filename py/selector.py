@@ -0,0 +1,89 @@
+"""
+索引选择表达式
+语法（逗号分隔，可组合）:
+  3 / -1            单个索引，支持负索引
+  2:10 / -5: / ::4  Python 切片（起:止:步长）
+  every 4           每 4 个取一个，等价于 ::4
+  every 4 from 1    从第 1 个开始每 4 个取一个，等价于 1::4
+表达式编译一次后缓存；单个正向切片以视图实现（不拷贝），其余情况用一次 index_select。
+"""
+
+import re
+from functools import lru_cache
+
+import torch
+
+_EVERY = re.compile(r"^every\s+(\d+)(?:\s+from\s+(-?\d+))?$", re.IGNORECASE)
+
+
+class Selector:
+    """编译后的选择表达式"""
+
+    def __init__(self, parts):
+        # int 或 slice 组成的元组
+        self.parts = parts
+
+    def indices(self, length):
+        """按长度展开为索引列表，越界的单个索引被忽略"""
+        result = []
+        for part in self.parts:
+            if isinstance(part, slice):
+                result.extend(range(*part.indices(length)))
+            elif -length <= part < length:
+                result.append(part % length)
+        return result
+
+    @property
+    def is_view(self):
+        """是否可以直接用切片视图实现"""
+        if len(self.parts) != 1 or not isinstance(self.parts[0], slice):
+            return False
+        step = self.parts[0].step
+        return step is None or step > 0
+
+    def select_list(self, items):
+        return [items[i] for i in self.indices(len(items))]
+
+    def select_batch(self, tensor):
+        """在第 0 维上选择，返回单个张量"""
+        if self.is_view:
+            return tensor[self.parts[0]]
+        index = torch.tensor(self.indices(tensor.shape[0]), dtype=torch.long, device=tensor.device)
+        return tensor.index_select(0, index)
+
+    def split_batch(self, tensor):
+        """在第 0 维上选择，每项为保留批次维度的 [1, ...] 视图"""
+        return [tensor[i:i + 1] for i in self.indices(tensor.shape[0])]
+
+
+@lru_cache(maxsize=256)
+def compile_selector(text):
+    """编译选择表达式，空表达式表示全部
+
+    Raises:
+        ValueError: 表达式格式错误
+    """
+    parts = []
+    for token in (text or "").split(","):
+        token = token.strip()
+        if not token:
+            continue
+        match = _EVERY.match(token)
+        if match:
+            step = int(match.group(1))
+            if step <= 0:
+                raise ValueError(f"步长必须大于 0: {token}")
+            parts.append(slice(int(match.group(2) or 0), None, step))
+        elif ":" in token:
+            fields = token.split(":")
+            if len(fields) > 3:
+                raise ValueError(f"无效的切片: {token}")
+            values = [int(f) if f.strip() else None for f in fields]
+            if len(values) == 3 and values[2] == 0:
+                raise ValueError(f"步长不能为 0: {token}")
+            parts.append(slice(*values))
+        else:
+            parts.append(int(token))
+    if not parts:
+        parts.append(slice(None))
+    return Selector(tuple(parts))
@@ -0,0 +1,358 @@
+"""
+共享内存传输
+同一台机器上的多个 ComfyUI 进程之间通过命名共享内存传递张量：
+1. 发送端把张量写入共享内存段，并在目录中登记 link_id -> 代(generation) 描述
+2. 接收端按 link_id 查找最新的代，直接映射共享内存为张量（不经过 PNG/MP4 编解码）
+3. 描述文件中记录引用进程，被替换且无引用的代、以及所有者进程已退出的代会被回收
+4. 接收端的每个映射由映射出的张量持有，最后一个引用它的张量释放后才关闭映射；
+   回收只删除共享内存段的名字，已映射的内存在关闭映射前始终有效
+"""
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+import torch
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+SHM_DIR = os.environ.get("LG_SHM_DIR", os.path.join(tempfile.gettempdir(), "lg_group_executor_shm"))
+_LOCK_PATH = os.path.join(SHM_DIR, ".lock")
+_LOCK_STALE_SECONDS = 10.0
+
+_local_lock = threading.RLock()
+# 本进程创建的代: generation -> [SharedMemory, ...]
+_owned = {}
+# 本进程引用的代: (kind, link_id) -> generation
+_attached = {}
+# 关闭时仍有缓冲区导出、需要稍后重试的映射
+_pending_close = []
+
+
+def _pid_alive(pid):
+    if PSUTIL_AVAILABLE:
+        return psutil.pid_exists(pid)
+    if os.name == "nt":
+        # Windows 上 os.kill 会结束进程，无法用于探测，保守地认为仍存活
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class _DirectoryLock:
+    """跨进程目录锁（基于独占创建锁文件，超时的锁视为崩溃遗留并强制释放）"""
+
+    def __enter__(self):
+        os.makedirs(SHM_DIR, exist_ok=True)
+        while True:
+            try:
+                fd = os.open(_LOCK_PATH, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode())
+                os.close(fd)
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(_LOCK_PATH) > _LOCK_STALE_SECONDS:
+                        os.unlink(_LOCK_PATH)
+                        continue
+                except OSError:
+                    continue
+                time.sleep(0.005)
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            os.unlink(_LOCK_PATH)
+        except OSError:
+            pass
+
+
+def _link_path(link_id, kind):
+    return os.path.join(SHM_DIR, f"link_{kind}_{link_id}.json")
+
+
+def _gen_path(generation):
+    return os.path.join(SHM_DIR, f"gen_{generation}.json")
+
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _open_segment(name):
+    """映射已有的共享内存段，不注册到 resource_tracker（生命周期由本模块管理）"""
+    try:
+        return shared_memory.SharedMemory(name=name, create=False, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name, create=False)
+        _untrack(shm)
+        return shm
+
+
+def _create_segment(size):
+    name = f"lg_{uuid.uuid4().hex[:20]}"
+    try:
+        return shared_memory.SharedMemory(name=name, create=True, size=max(1, size), track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name, create=True, size=max(1, size))
+        _untrack(shm)
+        return shm
+
+
+def _untrack(shm):
+    if os.name == "nt":
+        return
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+def _close_segment(shm, unlink=False):
+    if unlink:
+        _unlink_by_name(shm.name)
+    try:
+        shm.close()
+    except BufferError:
+        # 仍有张量引用该映射，稍后再关闭
+        _pending_close.append(shm)
+
+
+def _close_mapping(shm):
+    """映射出的数组被回收时调用，此时已没有张量引用该映射"""
+    try:
+        shm.close()
+    except BufferError:
+        with _local_lock:
+            _pending_close.append(shm)
+
+
+def _map_tensor(item):
+    """为一个条目单独映射共享内存段，映射的生命周期与返回的张量绑定"""
+    shm = _open_segment(item["segment"])
+    array = np.ndarray(tuple(item["shape"]), dtype=np.dtype(item["dtype"]), buffer=shm.buf)
+    # torch.from_numpy 得到的张量（及其切片视图）持有 array，array 被回收时才关闭映射
+    weakref.finalize(array, _close_mapping, shm)
+    return torch.from_numpy(array)
+
+
+def _unlink_by_name(name):
+    """删除共享内存段的名字，已建立的映射不受影响
+
+    不经过 SharedMemory.unlink：旧版本 Python 中它会再次向 resource_tracker 注销已注销的段。
+    Windows 上段在最后一个句柄关闭时由系统释放，无需删除
+    """
+    if os.name == "nt":
+        return
+    import _posixshmem
+    try:
+        _posixshmem.shm_unlink("/" + name.lstrip("/"))
+    except (FileNotFoundError, OSError):
+        pass
+
+
+def publish(link_id, items, kind="image"):
+    """发布一组张量到共享内存
+
+    Args:
+        link_id: 连接 ID
+        items: [(role, tensor), ...]，例如 [("images", t0), ("masks", m0)]
+        kind: 数据类型标记（image / video）
+
+    Returns:
+        新的代 ID
+    """
+    generation = uuid.uuid4().hex
+    segments = []
+    descriptors = []
+    try:
+        for role, tensor in items:
+            array = tensor.detach().cpu().contiguous().numpy()
+            shm = _create_segment(array.nbytes)
+            segments.append(shm)
+            np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+            descriptors.append({
+                "role": role,
+                "segment": shm.name,
+                "shape": list(array.shape),
+                "dtype": array.dtype.str,
+            })
+    except Exception:
+        for shm in segments:
+            _close_segment(shm, unlink=True)
+        raise
+
+    with _local_lock:
+        _owned[generation] = segments
+
+    with _DirectoryLock():
+        _write_json(_gen_path(generation), {
+            "generation": generation,
+            "link_id": link_id,
+            "kind": kind,
+            "owner_pid": os.getpid(),
+            "created": time.time(),
+            "items": descriptors,
+            "refs": [],
+        })
+        _write_json(_link_path(link_id, kind), {"link_id": link_id, "kind": kind, "generation": generation})
+
+    collect_garbage()
+    return generation
+
+
+def current_generation(link_id, kind="image"):
+    """返回 link_id 当前的代 ID，不存在时返回 None"""
+    pointer = _read_json(_link_path(link_id, kind))
+    return pointer.get("generation") if pointer else None
+
+
+def attach(link_id, kind="image"):
+    """映射 link_id 最新一代的张量（零拷贝）
+
+    Returns:
+        (generation, [(role, tensor), ...])；不存在时返回 (None, [])
+    """
+    pid = os.getpid()
+    with _DirectoryLock():
+        generation = current_generation(link_id, kind)
+        desc = _read_json(_gen_path(generation)) if generation else None
+        if not desc:
+            return None, []
+        if pid not in desc["refs"]:
+            desc["refs"].append(pid)
+            _write_json(_gen_path(generation), desc)
+
+    tensors = [(item["role"], _map_tensor(item)) for item in desc["items"]]
+
+    with _local_lock:
+        previous = _attached.get((kind, link_id))
+        _attached[(kind, link_id)] = generation
+    if previous is not None and previous != generation:
+        # 旧代的张量各自持有映射，这里只撤销本进程的引用，让旧代可以被回收
+        _release(previous)
+        collect_garbage()
+    return generation, tensors
+
+
+def _release(generation):
+    pid = os.getpid()
+    with _DirectoryLock():
+        desc = _read_json(_gen_path(generation))
+        if desc and pid in desc["refs"]:
+            desc["refs"] = [p for p in desc["refs"] if p != pid]
+            _write_json(_gen_path(generation), desc)
+
+
+def collect_garbage():
+    """回收被替换且无人引用的代，以及所有者进程已退出的孤立代"""
+    if not os.path.isdir(SHM_DIR):
+        return
+    removed = []
+    with _DirectoryLock():
+        for filename in os.listdir(SHM_DIR):
+            if not (filename.startswith("gen_") and filename.endswith(".json")):
+                continue
+            desc = _read_json(os.path.join(SHM_DIR, filename))
+            if not desc:
+                continue
+            generation = desc["generation"]
+            refs = [p for p in desc.get("refs", []) if _pid_alive(p)]
+            owner_alive = _pid_alive(desc["owner_pid"])
+            link_path = _link_path(desc["link_id"], desc["kind"])
+            pointer = _read_json(link_path)
+            is_current = pointer is not None and pointer.get("generation") == generation
+
+            if refs != desc.get("refs", []):
+                desc["refs"] = refs
+                _write_json(os.path.join(SHM_DIR, filename), desc)
+
+            if refs or (is_current and owner_alive):
+                continue
+            # 无引用：被替换的代，或所有者已退出的孤立代
+            for item in desc["items"]:
+                _unlink_by_name(item["segment"])
+            try:
+                os.unlink(os.path.join(SHM_DIR, filename))
+            except OSError:
+                pass
+            if is_current:
+                try:
+                    os.unlink(link_path)
+                except OSError:
+                    pass
+            removed.append(generation)
+
+    with _local_lock:
+        for generation in removed:
+            for shm in _owned.pop(generation, []):
+                _close_segment(shm)
+        for shm in list(_pending_close):
+            try:
+                shm.close()
+                _pending_close.remove(shm)
+            except BufferError:
+                pass
+
+
+@atexit.register
+def _shutdown():
+    """进程退出时释放本进程的引用，并回收本进程创建且无人引用的代"""
+    try:
+        with _local_lock:
+            attached = list(_attached.values())
+            _attached.clear()
+        for generation in attached:
+            _release(generation)
+
+        pid = os.getpid()
+        with _DirectoryLock():
+            for generation in list(_owned):
+                desc = _read_json(_gen_path(generation))
+                if not desc:
+                    continue
+                if [p for p in desc.get("refs", []) if p != pid and _pid_alive(p)]:
+                    # 其他进程仍在引用，所有者退出后由它们的 collect_garbage 回收
+                    continue
+                for item in desc["items"]:
+                    _unlink_by_name(item["segment"])
+                try:
+                    os.unlink(_gen_path(generation))
+                except OSError:
+                    pass
+                link_path = _link_path(desc["link_id"], desc["kind"])
+                pointer = _read_json(link_path)
+                if pointer and pointer.get("generation") == generation:
+                    try:
+                        os.unlink(link_path)
+                    except OSError:
+                        pass
+    except Exception as e:
+        print(f"[SharedMemory] 退出清理失败: {e}")
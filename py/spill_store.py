@@ -0,0 +1,171 @@
+"""
+可溢出到磁盘的累积存储
+累积节点的张量先保存在内存中，超过内存预算后，最旧的条目被写入内存映射文件（按块分配），
+之后以映射视图的形式返回，由操作系统在下游节点读取时按需分页载入；
+支持只保留最近 N 条（环形缓冲），所有条目被丢弃的块文件会被删除。
+"""
+
+import os
+import threading
+import uuid
+
+import numpy as np
+import torch
+
+# 每个映射块文件的大小，单个条目超过该大小时独占一个块
+CHUNK_BYTES = 256 * 1024 * 1024
+_ALIGN = 64
+
+
+def _aligned(nbytes):
+    return (nbytes + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class _Chunk:
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+        self.used = 0
+        self.live = 0
+        self.buffer = np.memmap(path, dtype=np.uint8, mode="w+", shape=(size,))
+
+    def alloc(self, nbytes):
+        offset = self.used
+        self.used += _aligned(nbytes)
+        return offset
+
+    def free(self):
+        """释放映射并删除文件（仍被张量引用的映射会在张量释放后解除）"""
+        self.buffer = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class SpillStore:
+    """按条目累积张量，超出内存预算的旧条目溢出到内存映射文件
+
+    每个条目是一组张量（可以为 None）加任意附加信息，例如 ([image, mask], info)
+    """
+
+    def __init__(self, directory, ram_budget=2048 * 1024 * 1024, keep_last=0):
+        self.directory = directory
+        self.ram_budget = ram_budget
+        self.keep_last = keep_last
+        self.lock = threading.Lock()
+        # 每个条目: {"tensors": [...], "meta": ..., "chunk": _Chunk 或 None, "nbytes": int}
+        self.entries = []
+        # 下一个尚未溢出的条目下标（更早的条目都已在磁盘上）
+        self.ram_start = 0
+        self.ram_bytes = 0
+        self.chunk = None
+        self.prefix = f"spill_{uuid.uuid4().hex[:12]}"
+        self.chunk_serial = 0
+        self.disk_bytes = 0
+
+    def configure(self, ram_budget=None, keep_last=None):
+        with self.lock:
+            if ram_budget is not None:
+                self.ram_budget = max(0, int(ram_budget))
+            if keep_last is not None:
+                self.keep_last = max(0, int(keep_last))
+            self._trim()
+            self._spill()
+
+    def append(self, tensors, meta=None):
+        tensors = [t.detach() if t is not None else None for t in tensors]
+        nbytes = sum(t.numel() * t.element_size() for t in tensors if t is not None)
+        with self.lock:
+            self.entries.append({"tensors": tensors, "meta": meta, "chunk": None, "nbytes": nbytes})
+            self.ram_bytes += nbytes
+            self._trim()
+            self._spill()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def snapshot(self):
+        """返回当前所有条目的 (tensors, meta) 列表；已溢出的张量为映射视图，访问时才载入"""
+        with self.lock:
+            return [(list(e["tensors"]), e["meta"]) for e in self.entries]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "count": len(self.entries),
+                "ram_bytes": self.ram_bytes,
+                "spilled": self.ram_start,
+                "disk_bytes": self.disk_bytes,
+            }
+
+    def clear(self):
+        with self.lock:
+            chunks = {id(e["chunk"]): e["chunk"] for e in self.entries if e["chunk"] is not None}
+            if self.chunk is not None:
+                chunks[id(self.chunk)] = self.chunk
+            self.entries = []
+            self.ram_start = 0
+            self.ram_bytes = 0
+            self.chunk = None
+            for chunk in chunks.values():
+                chunk.free()
+            self.disk_bytes = 0
+
+    def __del__(self):
+        try:
+            self.clear()
+        except Exception:
+            pass
+
+    def _trim(self):
+        """环形缓冲：只保留最近 keep_last 个条目"""
+        if not self.keep_last or len(self.entries) <= self.keep_last:
+            return
+        dropped = self.entries[:len(self.entries) - self.keep_last]
+        self.entries = self.entries[len(dropped):]
+        for entry in dropped:
+            chunk = entry["chunk"]
+            if chunk is None:
+                self.ram_bytes -= entry["nbytes"]
+                continue
+            chunk.live -= 1
+            if chunk.live == 0 and chunk is not self.chunk:
+                self._free_chunk(chunk)
+        self.ram_start = max(0, self.ram_start - len(dropped))
+
+    def _spill(self):
+        """把最旧的内存条目写入映射块，直到内存占用回到预算以内"""
+        while self.ram_bytes > self.ram_budget and self.ram_start < len(self.entries):
+            entry = self.entries[self.ram_start]
+            # 同一条目的张量写入同一个块，块的引用计数按条目计
+            need = sum(_aligned(t.numel() * t.element_size()) for t in entry["tensors"] if t is not None)
+            if self.chunk is None or self.chunk.used + need > self.chunk.size:
+                self._new_chunk(max(CHUNK_BYTES, need))
+            entry["tensors"] = [self._write(t) if t is not None else None for t in entry["tensors"]]
+            entry["chunk"] = self.chunk
+            self.chunk.live += 1
+            self.ram_bytes -= entry["nbytes"]
+            self.ram_start += 1
+
+    def _write(self, tensor):
+        array = tensor.cpu().contiguous().numpy()
+        nbytes = array.nbytes
+        offset = self.chunk.alloc(nbytes)
+        view = self.chunk.buffer[offset:offset + nbytes].view(array.dtype).reshape(array.shape)
+        view[...] = array
+        return torch.from_numpy(view)
+
+    def _new_chunk(self, size):
+        previous = self.chunk
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{self.prefix}_{self.chunk_serial:05}.bin")
+        self.chunk = _Chunk(path, size)
+        self.chunk_serial += 1
+        self.disk_bytes += size
+        if previous is not None and previous.live == 0:
+            self._free_chunk(previous)
+
+    def _free_chunk(self, chunk):
+        chunk.free()
+        self.disk_bytes -= chunk.size
@@ -0,0 +1,117 @@
+"""
+预览缩略图
+前端节点预览只需要很小的图像，/group_executor/thumb 按长边缩小源图像并编码为 WebP/JPEG：
+1. 缩略图在线程池中生成，不阻塞服务器事件循环
+2. 按 (源路径, mtime, 文件大小, 尺寸, 格式, 质量) 缓存到临时目录，同一文件的重复请求直接返回缓存
+3. 缓存文件登记到临时文件管理器，按配额回收
+"""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from PIL import Image, ImageOps
+
+import folder_paths
+
+from .artifacts import artifact_manager
+
+DEFAULT_SIZE = 256
+# LG_ImageSender 节点自身预览（JPEG）的长边上限
+SENDER_PREVIEW_SIZE = 1024
+MAX_SIZE = 2048
+DEFAULT_QUALITY = 80
+THUMB_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))
+
+FORMATS = {
+    "webp": ("WEBP", "image/webp", ".webp"),
+    "jpeg": ("JPEG", "image/jpeg", ".jpg"),
+}
+
+_pool = ThreadPoolExecutor(max_workers=THUMB_WORKERS, thread_name_prefix="lg_thumb")
+_lock = threading.RLock()
+# 缓存键 -> 正在生成的 Future，同一缩略图的并发请求共用一次生成
+_inflight = {}
+
+
+def _thumb_dir():
+    path = os.path.join(folder_paths.get_temp_directory(), "lg_thumbs")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def resolve_source(filename, subfolder="", type="temp"):
+    """按 /view 的规则解析源文件路径，越出目录或不存在时返回 None"""
+    base = folder_paths.get_directory_by_type(type)
+    if base is None or not filename:
+        return None
+    base = os.path.abspath(base)
+    path = os.path.abspath(os.path.join(base, subfolder or "", filename))
+    if os.path.commonpath((base, path)) != base or not os.path.isfile(path):
+        return None
+    return path
+
+
+def make_thumbnail(image, max_size):
+    """按长边缩小到 max_size 以内，返回适合 WebP/JPEG 编码的新图像"""
+    image = ImageOps.exif_transpose(image)
+    if max(image.size) > max_size:
+        image.thumbnail((max_size, max_size), Image.BILINEAR)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    return image
+
+
+def _generate(source, target, max_size, fmt, quality):
+    pil_format = FORMATS[fmt][0]
+    with Image.open(source) as img:
+        img.draft("RGB", (max_size, max_size))
+        thumb = make_thumbnail(img, max_size)
+    if pil_format == "JPEG" and thumb.mode != "RGB":
+        thumb = thumb.convert("RGB")
+    tmp = f"{target}.{threading.get_ident()}.tmp"
+    thumb.save(tmp, format=pil_format, quality=quality)
+    os.replace(tmp, target)
+    artifact_manager.register("thumb", target)
+    return target
+
+
+def get_thumbnail(source, max_size=DEFAULT_SIZE, fmt="webp", quality=DEFAULT_QUALITY):
+    """返回缩略图路径的 Future，缓存命中时为已完成的 Future
+
+    Args:
+        source: 源图像路径（已通过 resolve_source 校验）
+        max_size: 长边上限，限制在 [16, MAX_SIZE]
+        fmt: "webp" 或 "jpeg"
+        quality: 编码质量 1-100
+    """
+    fmt = fmt if fmt in FORMATS else "webp"
+    max_size = max(16, min(MAX_SIZE, int(max_size)))
+    quality = max(1, min(100, int(quality)))
+    stat = os.stat(source)
+    key = hashlib.sha1(
+        f"{source}|{stat.st_mtime_ns}|{stat.st_size}|{max_size}|{fmt}|{quality}".encode("utf-8")
+    ).hexdigest()
+    target = os.path.join(_thumb_dir(), key + FORMATS[fmt][2])
+
+    with _lock:
+        future = _inflight.get(key)
+        if future is None:
+            future = Future()
+            if os.path.exists(target):
+                future.set_result(target)
+            else:
+                future = _pool.submit(_generate, source, target, max_size, fmt, quality)
+                _inflight[key] = future
+                future.add_done_callback(lambda _: _forget(key))
+    return future
+
+
+def _forget(key):
+    with _lock:
+        _inflight.pop(key, None)
+
+
+def content_type(fmt):
+    return FORMATS.get(fmt, FORMATS["webp"])[1]
@@ -2,7 +2,6 @@ from server import PromptServer
 import os
 import sys
 import torch
-import numpy as np
 from PIL import Image
 import folder_paths
 import random
@@ -10,8 +9,20 @@ from nodes import SaveImage
 import json
 from comfy.cli_args import args
 from PIL.PngImagePlugin import PngInfo
-import time
-import cv2  # 视频处理所需
+from .image_io import load_images_as_list, load_images_as_batch, decoded_from_arrays
+from .image_convert import to_uint8
+from .fingerprint import fingerprint
+from .video_io import encode_frames, read_video_frames, video_extension, VIDEO_CODECS, DEFAULT_CODEC, PREVIEWABLE_EXTENSIONS
+from . import shm_transport
+from .artifacts import artifact_manager
+from .manifest import SenderManifest, resolve_items
+from .spill_store import SpillStore
+from .preview_pool import submit_previews
+from .thumbs import make_thumbnail, SENDER_PREVIEW_SIZE
+from .selector import compile_selector
+from . import ws_delivery
+from .value_store import value_store, is_handle, summarize, ValueAccumulator, SKIP
+from .warm_cache import warm_cache
 
 CATEGORY_TYPE = "🎈LAOGOU/Group"
 class AnyType(str):
@@ -30,6 +41,8 @@ class LG_ImageSender:
         self.type = "temp"
         self.compress_level = 1
         self.accumulated_results = []  
+        self.manifest = SenderManifest("image")
+        self.accumulated_shm_items = []
         
     @classmethod
     def INPUT_TYPES(s):
@@ -43,7 +56,9 @@ class LG_ImageSender:
             },
             "optional": {
                 "masks": ("MASK", {"tooltip": "要发送的遮罩"}),
-                "signal_opt": (any_typ, {"tooltip": "信号输入，将在处理完成后原样输出"})
+                "signal_opt": (any_typ, {"tooltip": "信号输入，将在处理完成后原样输出"}),
+                "transport": (["file", "shm"], {"default": "file",
+                    "tooltip": "file=写入临时目录的 PNG，shm=写入共享内存，可供同一主机上的其他 ComfyUI 进程直接映射"}),
             },
             "hidden": {"prompt": "PROMPT", "extra_pnginfo": "EXTRA_PNGINFO"},
         }
@@ -57,57 +72,85 @@ class LG_ImageSender:
     OUTPUT_NODE = True
 
     @classmethod
-    def IS_CHANGED(s, images, filename_prefix, link_id, accumulate, preview_rgba, masks=None, prompt=None, extra_pnginfo=None):
+    def IS_CHANGED(s, images, filename_prefix, link_id, accumulate, preview_rgba, masks=None, signal_opt=None, transport=None, prompt=None, extra_pnginfo=None):
         if isinstance(accumulate, list):
             accumulate = accumulate[0]
         
         if accumulate:
             return float("NaN") 
         
-        # 非积累模式下计算hash
-        hash_value = hash(str(images) + str(masks))
-        return hash_value
+        # 非积累模式下计算内容指纹
+        return fingerprint(images, masks)
 
-    def save_images(self, images, filename_prefix, link_id, accumulate, preview_rgba, masks=None, prompt=None, extra_pnginfo=None):
-        timestamp = int(time.time() * 1000)
+    def save_images(self, images, filename_prefix, link_id, accumulate, preview_rgba, masks=None, signal_opt=None, transport=None, prompt=None, extra_pnginfo=None):
         results = list()
 
         filename_prefix = filename_prefix[0] if isinstance(filename_prefix, list) else filename_prefix
         link_id = link_id[0] if isinstance(link_id, list) else link_id
         accumulate = accumulate[0] if isinstance(accumulate, list) else accumulate
         preview_rgba = preview_rgba[0] if isinstance(preview_rgba, list) else preview_rgba
+        transport = transport[0] if isinstance(transport, list) and transport else (transport or "file")
+
+        if transport == "shm":
+            return self.send_shm(images, masks, link_id, accumulate)
         
+        owner = f"image:{link_id}"
+        sent_results = []
+        preview_paths = []
         for idx, image_batch in enumerate(images):
             try:
                 image = image_batch.squeeze()
-                rgb_image = Image.fromarray(np.clip(255. * image.cpu().numpy(), 0, 255).astype(np.uint8))
-
+                rgb_array = to_uint8(image)
+                mask_array = None
                 if masks is not None and idx < len(masks):
                     mask = masks[idx].squeeze()
-                    mask_img = Image.fromarray(np.clip(255. * (1 - mask.cpu().numpy()), 0, 255).astype(np.uint8))
-                else:
-                    mask_img = Image.new('L', rgb_image.size, 255)
-
-                r, g, b = rgb_image.convert('RGB').split()
-                rgba_image = Image.merge('RGBA', (r, g, b, mask_img))
+                    mask_array = to_uint8(mask, invert=True)
 
-                # 保存RGBA格式，这是实际要发送的文件
-                filename = f"{filename_prefix}_{link_id}_{timestamp}_{idx}.png"
+                # 按内容命名，内容相同的图像复用已有文件，跳过编码和写盘
+                digest = fingerprint(rgb_array, mask_array, full=True)
+                filename = f"{filename_prefix}_{digest}.png"
                 file_path = os.path.join(self.output_dir, filename)
-                rgba_image.save(file_path, compress_level=self.compress_level)
+
+                rgb_image = None
+                if not artifact_manager.materialize(f"{digest}.png", file_path):
+                    rgb_image = Image.fromarray(rgb_array)
+                    if mask_array is not None:
+                        mask_img = Image.fromarray(mask_array)
+                    else:
+                        mask_img = Image.new('L', rgb_image.size, 255)
+
+                    r, g, b = rgb_image.convert('RGB').split()
+                    rgba_image = Image.merge('RGBA', (r, g, b, mask_img))
+
+                    # 保存RGBA格式，这是实际要发送的文件
+                    rgba_image.save(file_path, compress_level=self.compress_level)
+                artifact_manager.register(owner, file_path, content_key=f"{digest}.png")
+                # 接收端通常稍后在同一进程中执行，直接登记内存中的图像，省去重新解码 PNG
+                if rgb_array.ndim == 3 and rgb_array.shape[2] == 3:
+                    warm_cache.put("image", file_path, decoded_from_arrays(rgb_array, mask_array))
                 
-                # 准备要发送的数据项
+                # 准备要发送的数据项（同时作为清单条目）
                 original_result = {
                     "filename": filename,
                     "subfolder": "",
-                    "type": self.type
+                    "type": self.type,
+                    "format": "png",
+                    "shape": list(rgb_array.shape[:2]) + [4],
+                    "checksum": digest
                 }
                 
                 # 如果是要显示RGB预览
                 if not preview_rgba:
-                    preview_filename = f"{filename_prefix}_{link_id}_{timestamp}_{idx}_preview.jpg"
+                    # 节点预览按长边缩小，不必输出全分辨率图像
+                    preview_filename = f"{filename_prefix}_{digest}_preview{SENDER_PREVIEW_SIZE}.jpg"
                     preview_path = os.path.join(self.output_dir, preview_filename)
-                    rgb_image.save(preview_path, format="JPEG", quality=95)
+                    preview_key = f"{digest}_preview{SENDER_PREVIEW_SIZE}.jpg"
+                    if not artifact_manager.materialize(preview_key, preview_path):
+                        if rgb_image is None:
+                            rgb_image = Image.fromarray(rgb_array)
+                        make_thumbnail(rgb_image.convert('RGB'), SENDER_PREVIEW_SIZE).save(preview_path, format="JPEG", quality=90)
+                    artifact_manager.register(owner, preview_path, content_key=preview_key)
+                    preview_paths.append(preview_path)
                     # 将预览图添加到UI显示结果中
                     results.append({
                         "filename": preview_filename,
@@ -118,6 +161,7 @@ class LG_ImageSender:
                     # 显示RGBA
                     results.append(original_result)
 
+                sent_results.append(original_result)
                 # 累积的始终是原始图像结果
                 if accumulate:
                     self.accumulated_results.append(original_result)
@@ -129,37 +173,64 @@ class LG_ImageSender:
                 continue
 
         # 获取实际要发送的结果
-        if accumulate:
-            send_results = self.accumulated_results
-        else:
-            # 创建一个包含原始文件名的列表用于发送
-            send_results = []
-            for idx in range(len(results)):
-                original_filename = f"{filename_prefix}_{link_id}_{timestamp}_{idx}.png"
-                send_results.append({
-                    "filename": original_filename,
-                    "subfolder": "",
-                    "type": self.type
-                })
+        send_results = self.accumulated_results if accumulate else sent_results
+
+        # 固定本次发送的文件，直到下一次发送替换它们
+        artifact_manager.set_live(owner, [os.path.join(self.output_dir, r["filename"]) for r in send_results] + preview_paths)
         
         if send_results:
-            print(f"[ImageSender] 发送 {len(send_results)} 张图像")
-            PromptServer.instance.send_sync("img-send", {
+            # 条目写入清单（累积时只追加新条目），websocket 只传清单引用和本次新增的条目（用于预览）
+            manifest_ref = self.manifest.publish(link_id, sent_results, send_results, accumulate)
+            print(f"[ImageSender] 发送 {len(send_results)} 张图像 (manifest={manifest_ref})")
+            ws_delivery.send("img-send", {
                 "link_id": link_id,
-                "images": send_results
-            })
+                "manifest": manifest_ref,
+                "count": len(send_results),
+                "images": sent_results,
+                "delta": bool(accumulate)
+            }, "images")
         if not accumulate:
             self.accumulated_results = []
-        
+
         return { "ui": { "images": results } }
 
+    def send_shm(self, images, masks, link_id, accumulate):
+        """通过共享内存发送，跳过 PNG 编码"""
+        items = []
+        for idx, image in enumerate(images):
+            items.append(("images", image))
+            if masks is not None and idx < len(masks):
+                items.append(("masks", masks[idx]))
+            else:
+                items.append(("masks", None))
+
+        if accumulate:
+            self.accumulated_shm_items.extend(items)
+            items = self.accumulated_shm_items
+        else:
+            self.accumulated_shm_items = []
+
+        # 没有遮罩的图像用空张量占位，保持图像与遮罩一一对应
+        payload = [(role, tensor if tensor is not None else torch.zeros((0,), dtype=torch.float32)) for role, tensor in items]
+        generation = shm_transport.publish(link_id, payload, kind="image")
+        print(f"[ImageSender] 通过共享内存发送 {len(items) // 2} 组图像 (generation={generation[:8]})")
+        return { "ui": { "images": [] } }
+
 class LG_ImageReceiver:
     @classmethod
     def INPUT_TYPES(s):
         return {
             "required": {
-                "image": ("STRING", {"default": "", "multiline": False, "tooltip": "多个文件名用逗号分隔"}),
+                "image": ("STRING", {"default": "", "multiline": False, "tooltip": "发送端的清单 (manifest:<id>)，或用逗号分隔的多个文件名"}),
                 "link_id": ("INT", {"default": 1, "min": 0, "max": sys.maxsize, "step": 1, "tooltip": "发送端连接ID"}),
+            },
+            "optional": {
+                "select": ("STRING", {"default": "", "multiline": False,
+                    "tooltip": "按索引选择要加载的条目，留空为全部。例如 0 / -1 / 2:10 / ::4 / every 4 / 0,3,5:8"}),
+                "output_mode": (["list", "batch"], {"default": "list",
+                    "tooltip": "list=每张图像单独输出，batch=尺寸一致时输出单个 [N,H,W,C] 批量（尺寸不一致时回退为 list）"}),
+                "transport": (["file", "shm"], {"default": "file",
+                    "tooltip": "file=读取临时目录中的文件，shm=直接映射发送端写入的共享内存"}),
             }
         }
 
@@ -170,12 +241,56 @@ class LG_ImageReceiver:
     OUTPUT_IS_LIST = (True, True)
     FUNCTION = "load_image"
 
-    def load_image(self, image, link_id):
-        image_files = [x.strip() for x in image.split(',') if x.strip()]
-        print(f"[ImageReceiver] 加载图像: {image_files}")
-        
+    @classmethod
+    def IS_CHANGED(s, image, link_id, select="", output_mode="list", transport="file"):
+        if transport == "shm":
+            # 共享内存模式下以当前代 ID 判断是否有新数据
+            return shm_transport.current_generation(link_id, "image") or ""
+        return f"{image}|{select}"
+
+    def load_shm(self, link_id, output_mode):
+        generation, tensors = shm_transport.attach(link_id, "image")
+        if generation is None:
+            print(f"[ImageReceiver] link_id={link_id} 没有共享内存数据")
+            return ([], [])
+
         output_images = []
         output_masks = []
+        for (_, image), (_, mask) in zip(tensors[0::2], tensors[1::2]):
+            if image.ndim == 3:
+                image = image.unsqueeze(0)
+            if mask.numel() == 0:
+                mask = torch.zeros(image.shape[:3], dtype=torch.float32)
+            elif mask.ndim == 2:
+                mask = mask.unsqueeze(0)
+            if output_mode == "batch":
+                output_images.append(image)
+                output_masks.append(mask)
+            else:
+                # 按帧切分为视图，不产生拷贝
+                output_images.extend(image.split(1))
+                output_masks.extend(mask.split(1))
+
+        if output_mode == "batch" and len(output_images) > 1:
+            if len({tuple(t.shape[1:]) for t in output_images}) == 1:
+                return ([torch.cat(output_images)], [torch.cat(output_masks)])
+            print("[ImageReceiver] 图像尺寸不一致，回退为列表输出")
+            output_images = [t for image in output_images for t in image.split(1)]
+            output_masks = [t for mask in output_masks for t in mask.split(1)]
+        return (output_images, output_masks)
+
+    def load_image(self, image, link_id, select="", output_mode="list", transport="file"):
+        if transport == "shm":
+            try:
+                return self.load_shm(link_id, output_mode)
+            except Exception as e:
+                print(f"[ImageReceiver] 读取共享内存时出错: {str(e)}")
+                import traceback
+                traceback.print_exc()
+                return ([], [])
+
+        image_files = [item["filename"] for item in resolve_items(image, select)]
+        print(f"[ImageReceiver] 加载 {len(image_files)} 张图像")
         
         if not image_files:
             empty_image = torch.zeros((1, 64, 64, 3), dtype=torch.float32)
@@ -185,42 +300,36 @@ class LG_ImageReceiver:
         try:
             temp_dir = folder_paths.get_temp_directory()
             
+            img_paths = []
             for img_file in image_files:
-                try:
-                    img_path = os.path.join(temp_dir, img_file)
-                    
-                    if not os.path.exists(img_path):
-                        print(f"[ImageReceiver] 文件不存在: {img_path}")
-                        continue
-                    
-                    img = Image.open(img_path)
-                    
-                    if img.mode == 'RGBA':
-                        r, g, b, a = img.split()
-                        rgb_image = Image.merge('RGB', (r, g, b))
-                        image = np.array(rgb_image).astype(np.float32) / 255.0
-                        image = torch.from_numpy(image)[None,]
-                        mask = np.array(a).astype(np.float32) / 255.0
-                        mask = torch.from_numpy(mask)[None,]
-                        mask = 1.0 - mask
-                    else:
-                        image = np.array(img.convert('RGB')).astype(np.float32) / 255.0
-                        image = torch.from_numpy(image)[None,]
-                        mask = torch.zeros((1, image.shape[1], image.shape[2]), dtype=torch.float32, device="cpu")
-                    
-                    output_images.append(image)
-                    output_masks.append(mask)
-                    
-                except Exception as e:
-                    print(f"[ImageReceiver] 处理文件 {img_file} 时出错: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
+                img_path = os.path.join(temp_dir, img_file)
+                if not os.path.exists(img_path):
+                    print(f"[ImageReceiver] 文件不存在: {img_path}")
                     continue
-            
+                img_paths.append(img_path)
+
+            if not img_paths:
+                return ([], [])
+
+            # 读取期间固定文件，避免被临时文件管理器回收
+            with artifact_manager.pinned(img_paths):
+                warm = lambda path: warm_cache.get("image", path)
+                if output_mode == "batch":
+                    batch = load_images_as_batch(img_paths, warm=warm)
+                    if batch is not None:
+                        images, masks = batch
+                        if images.shape[0] == 0:
+                            return ([], [])
+                        return ([images], [masks])
+                    print("[ImageReceiver] 图像尺寸不一致，回退为列表输出")
+
+                output_images, output_masks = load_images_as_list(img_paths, warm=warm)
             return (output_images, output_masks)
 
         except Exception as e:
             print(f"[ImageReceiver] 处理图像时出错: {str(e)}")
+            import traceback
+            traceback.print_exc()
             return ([], [])
 
 # ==========================================
@@ -231,6 +340,8 @@ class LG_VideoSender:
         self.output_dir = folder_paths.get_temp_directory()
         self.type = "temp"
         self.accumulated_results = []
+        self.manifest = SenderManifest("video")
+        self.accumulated_shm_items = []
         
     @classmethod
     def INPUT_TYPES(s):
@@ -243,7 +354,14 @@ class LG_VideoSender:
                 "accumulate": ("BOOLEAN", {"default": False, "tooltip": "开启后将累积所有视频一起发送"}),
             },
             "optional": {
-                "signal_opt": (any_typ, {"tooltip": "信号输入，将在处理完成后原样输出"})
+                "signal_opt": (any_typ, {"tooltip": "信号输入，将在处理完成后原样输出"}),
+                "codec": (list(VIDEO_CODECS.keys()), {"default": DEFAULT_CODEC,
+                    "tooltip": "mp4v=OpenCV 编码，无需额外依赖；h264=体积小，需要 PyAV 或 FFmpeg（缺少时回退为 mp4v）；"
+                               "ffv1=无损，rawvideo=不压缩，这两种只用于传输，节点上不显示预览"}),
+                "encoder_threads": ("INT", {"default": 0, "min": 0, "max": 64, "step": 1,
+                    "tooltip": "编码线程数，0 为自动"}),
+                "transport": (["file", "shm"], {"default": "file",
+                    "tooltip": "file=编码为视频文件，shm=写入共享内存，可供同一主机上的其他 ComfyUI 进程直接映射"}),
             },
             "hidden": {"prompt": "PROMPT", "extra_pnginfo": "EXTRA_PNGINFO"},
         }
@@ -257,13 +375,12 @@ class LG_VideoSender:
     OUTPUT_NODE = True
 
     @classmethod
-    def IS_CHANGED(s, frames, filename_prefix, link_id, fps, accumulate, signal_opt=None, prompt=None, extra_pnginfo=None):
+    def IS_CHANGED(s, frames, filename_prefix, link_id, fps, accumulate, signal_opt=None, codec=None, encoder_threads=None, transport=None, prompt=None, extra_pnginfo=None):
         if isinstance(accumulate, list): accumulate = accumulate[0]
         if accumulate: return float("NaN")
-        return hash(str(frames))
+        return fingerprint(frames, fps)
 
-    def save_video(self, frames, filename_prefix, link_id, fps, accumulate, signal_opt=None, prompt=None, extra_pnginfo=None):
-        timestamp = int(time.time() * 1000)
+    def save_video(self, frames, filename_prefix, link_id, fps, accumulate, signal_opt=None, codec=None, encoder_threads=None, transport=None, prompt=None, extra_pnginfo=None):
         results = []
 
         # 处理列表输入
@@ -271,39 +388,45 @@ class LG_VideoSender:
         link_id = link_id[0] if isinstance(link_id, list) else link_id
         fps = fps[0] if isinstance(fps, list) else fps
         accumulate = accumulate[0] if isinstance(accumulate, list) else accumulate
+        codec = codec[0] if isinstance(codec, list) and codec else (codec or DEFAULT_CODEC)
+        encoder_threads = encoder_threads[0] if isinstance(encoder_threads, list) and encoder_threads else (encoder_threads or 0)
+        transport = transport[0] if isinstance(transport, list) and transport else (transport or "file")
+
+        if transport == "shm":
+            # 共享内存模式：跳过视频编码，直接发布帧张量
+            items = [("frames", f if f.ndim == 4 else f.unsqueeze(0)) for f in frames]
+            if accumulate:
+                self.accumulated_shm_items.extend(items)
+                items = self.accumulated_shm_items
+            else:
+                self.accumulated_shm_items = []
+            generation = shm_transport.publish(link_id, items, kind="video")
+            print(f"[VideoSender] 通过共享内存发送 {len(items)} 个视频 (generation={generation[:8]})")
+            return { "ui": { "videos": [] } }
 
         for idx, frame_batch in enumerate(frames):
             try:
-                # 转换张量为numpy数组 (Batch, H, W, 3) -> (H, W, 3) * Batch
-                frame_np = frame_batch.cpu().numpy()
-                frame_np = np.clip(255. * frame_np, 0, 255).astype(np.uint8)
-                
-                if frame_np.ndim == 3:  # 单帧图像
-                    frame_np = frame_np[np.newaxis, ...]
-
-                # 获取视频尺寸
-                num_frames, H, W, _ = frame_np.shape
-                
-                # 准备写入器
-                filename = f"{filename_prefix}_{link_id}_{timestamp}_{idx}.mp4"
+                # 按内容命名，相同的帧序列与编码参数复用已有文件
+                digest = fingerprint(frame_batch, fps, codec, full=True)
+                content_key = f"{digest}{video_extension(codec)}"
+                filename = f"{filename_prefix}_{content_key}"
                 file_path = os.path.join(self.output_dir, filename)
-                
-                # 使用MP4V编码
-                fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-                out = cv2.VideoWriter(file_path, fourcc, fps, (W, H))
-
-                # 逐帧写入
-                for i in range(num_frames):
-                    # RGB -> BGR
-                    frame_bgr = cv2.cvtColor(frame_np[i], cv2.COLOR_RGB2BGR)
-                    out.write(frame_bgr)
-                
-                out.release()
+
+                if not artifact_manager.materialize(content_key, file_path):
+                    # 分块转换并流式编码，内存占用与帧数无关
+                    encode_frames(frame_batch, file_path, fps, codec=codec, threads=encoder_threads)
+                artifact_manager.register(f"video:{link_id}", file_path, content_key=content_key)
+                # 接收端通常稍后才执行，按接收端默认参数（全部帧、原尺寸）在后台预先解码；
+                # 解码结果大小由帧序列形状得出，放不进预热预算时不解码
+                warm_cache.warm("video", file_path, read_video_frames, frame_batch.numel() * 4)
 
                 video_result = {
                     "filename": filename,
                     "subfolder": "",
-                    "type": self.type
+                    "type": self.type,
+                    "format": video_extension(codec).lstrip("."),
+                    "shape": list(frame_batch.shape),
+                    "checksum": digest
                 }
                 results.append(video_result)
 
@@ -317,26 +440,43 @@ class LG_VideoSender:
                 continue
 
         send_results = self.accumulated_results if accumulate else results
+        artifact_manager.set_live(f"video:{link_id}", [os.path.join(self.output_dir, r["filename"]) for r in send_results])
         
         if send_results:
-            print(f"[VideoSender] 发送 {len(send_results)} 个视频")
-            PromptServer.instance.send_sync("video-send", {
+            manifest_ref = self.manifest.publish(link_id, results, send_results, accumulate)
+            print(f"[VideoSender] 发送 {len(send_results)} 个视频 (manifest={manifest_ref})")
+            ws_delivery.send("video-send", {
                 "link_id": link_id,
-                "videos": send_results
-            })
+                "manifest": manifest_ref,
+                "count": len(send_results),
+                "videos": results,
+                "delta": bool(accumulate)
+            }, "videos")
         
         if not accumulate:
             self.accumulated_results = []
-        
-        return { "ui": { "videos": results } }
+
+        # .mkv / .avi 浏览器无法播放，只作为传输文件
+        return { "ui": { "videos": results if video_extension(codec) in PREVIEWABLE_EXTENSIONS else [] } }
 
 class LG_VideoReceiver:
     @classmethod
     def INPUT_TYPES(s):
         return {
             "required": {
-                "video": ("STRING", {"default": "", "multiline": False, "tooltip": "多个视频文件名用逗号分隔"}),
+                "video": ("STRING", {"default": "", "multiline": False, "tooltip": "发送端的清单 (manifest:<id>)，或用逗号分隔的多个视频文件名"}),
                 "link_id": ("INT", {"default": 1, "min": 0, "max": sys.maxsize, "step": 1, "tooltip": "发送端连接ID"}),
+            },
+            "optional": {
+                "select": ("STRING", {"default": "", "multiline": False,
+                    "tooltip": "按索引选择要加载的视频，留空为全部。例如 0 / -1 / 2:10 / ::4 / every 4 / 0,3,5:8"}),
+                "start_frame": ("INT", {"default": 0, "min": 0, "max": sys.maxsize, "step": 1, "tooltip": "起始帧序号"}),
+                "frame_count": ("INT", {"default": 0, "min": 0, "max": sys.maxsize, "step": 1, "tooltip": "读取帧数，0 表示读取到结尾"}),
+                "stride": ("INT", {"default": 1, "min": 1, "max": 1000, "step": 1, "tooltip": "每隔多少帧取一帧"}),
+                "width": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 8, "tooltip": "输出宽度，0 表示保持原尺寸"}),
+                "height": ("INT", {"default": 0, "min": 0, "max": 16384, "step": 8, "tooltip": "输出高度，0 表示保持原尺寸"}),
+                "transport": (["file", "shm"], {"default": "file",
+                    "tooltip": "file=解码临时目录中的视频文件，shm=直接映射发送端写入的共享内存"}),
             }
         }
 
@@ -346,8 +486,61 @@ class LG_VideoReceiver:
     OUTPUT_IS_LIST = (True,)
     FUNCTION = "load_video"
 
-    def load_video(self, video, link_id):
-        video_files = [x.strip() for x in video.split(',') if x.strip()]
+    @classmethod
+    def IS_CHANGED(s, video, link_id, select="", start_frame=0, frame_count=0, stride=1, width=0, height=0, transport="file"):
+        if transport == "shm":
+            return shm_transport.current_generation(link_id, "video") or ""
+        return f"{video}|{select}"
+
+    def load_shm(self, link_id, start_frame, frame_count, stride, width, height):
+        generation, tensors = shm_transport.attach(link_id, "video")
+        if generation is None:
+            print(f"[VideoReceiver] link_id={link_id} 没有共享内存数据")
+            return []
+
+        output_frames = []
+        for _, frames in tensors:
+            # 帧范围与步长以切片视图实现，不产生拷贝
+            end = start_frame + frame_count * stride if frame_count else None
+            frames = frames[start_frame:end:stride]
+            if len(frames) == 0:
+                continue
+            if width or height:
+                out_w, out_h = width or frames.shape[2], height or frames.shape[1]
+                if not width:
+                    out_w = max(1, round(frames.shape[2] * height / frames.shape[1]))
+                if not height:
+                    out_h = max(1, round(frames.shape[1] * width / frames.shape[2]))
+                frames = torch.nn.functional.interpolate(
+                    frames.movedim(-1, 1), size=(out_h, out_w), mode="area"
+                ).movedim(1, -1)
+            output_frames.append(frames)
+        return output_frames
+
+    def load_warm(self, vid_path, start_frame, frame_count, stride, width, height):
+        """从预热缓存取得整段视频并复制所需的帧；需要缩放或未预热时返回 None"""
+        if width or height:
+            return None
+        frames = warm_cache.get("video", vid_path)
+        if frames is None:
+            return None
+        end = start_frame + frame_count * stride if frame_count else None
+        # 缓存中的张量由多个接收端共享，复制后再交给下游
+        frames = frames[start_frame:end:stride].clone()
+        return frames if len(frames) > 0 else None
+
+    def load_video(self, video, link_id, select="", start_frame=0, frame_count=0, stride=1, width=0, height=0, transport="file"):
+        if transport == "shm":
+            try:
+                output_frames = self.load_shm(link_id, start_frame, frame_count, stride, width, height)
+            except Exception as e:
+                print(f"[VideoReceiver] 读取共享内存时出错: {str(e)}")
+                import traceback
+                traceback.print_exc()
+                output_frames = []
+            return (output_frames if output_frames else [torch.zeros((1, 64, 64, 3), dtype=torch.float32)],)
+
+        video_files = [item["filename"] for item in resolve_items(video, select)]
         print(f"[VideoReceiver] 加载视频: {video_files}")
         
         output_frames = []
@@ -367,23 +560,15 @@ class LG_VideoReceiver:
                         print(f"[VideoReceiver] 文件不存在: {vid_path}")
                         continue
                     
-                    cap = cv2.VideoCapture(vid_path)
-                    frames = []
-                    
-                    while True:
-                        ret, frame = cap.read()
-                        if not ret:
-                            break
-                        # BGR -> RGB
-                        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                        frames.append(frame_rgb)
-                    
-                    cap.release()
-                    
-                    if frames:
-                        # 转换为张量 (Num, H, W, 3)
-                        frames_np = np.stack(frames, axis=0).astype(np.float32) / 255.0
-                        frames_tensor = torch.from_numpy(frames_np)
+                    frames_tensor = self.load_warm(vid_path, start_frame, frame_count, stride, width, height)
+                    if frames_tensor is None:
+                        # 预分配输出张量，只解码所需区间并直接写入
+                        with artifact_manager.pinned([vid_path]):
+                            frames_tensor = read_video_frames(
+                                vid_path, start_frame=start_frame, frame_count=frame_count,
+                                stride=stride, width=width, height=height
+                            )
+                    if frames_tensor is not None:
                         output_frames.append(frames_tensor)
                     
                 except Exception as e:
@@ -406,6 +591,7 @@ class LG_StringSender:
         self.output_dir = folder_paths.get_temp_directory()
         self.type = "temp"
         self.accumulated_results = []
+        self.manifest = SenderManifest("string")
         
     @classmethod
     def INPUT_TYPES(s):
@@ -434,10 +620,9 @@ class LG_StringSender:
     def IS_CHANGED(s, text, filename_prefix, link_id, accumulate, signal_opt=None, prompt=None, extra_pnginfo=None):
         if isinstance(accumulate, list): accumulate = accumulate[0]
         if accumulate: return float("NaN")
-        return hash(str(text))
+        return fingerprint(text)
 
     def save_string(self, text, filename_prefix, link_id, accumulate, signal_opt=None, prompt=None, extra_pnginfo=None):
-        timestamp = int(time.time() * 1000)
         results = []
 
         # 处理列表输入
@@ -451,17 +636,25 @@ class LG_StringSender:
 
         for idx, txt in enumerate(text):
             try:
-                filename = f"{filename_prefix}_{link_id}_{timestamp}_{idx}.txt"
+                # 按内容命名，相同的字符串复用已有文件
+                digest = fingerprint(txt, full=True)
+                content_key = f"{digest}.txt"
+                filename = f"{filename_prefix}_{content_key}"
                 file_path = os.path.join(self.output_dir, filename)
                 
-                # 写入文本文件
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(txt)
+                if not artifact_manager.materialize(content_key, file_path):
+                    # 写入文本文件
+                    with open(file_path, 'w', encoding='utf-8') as f:
+                        f.write(txt)
+                artifact_manager.register(f"string:{link_id}", file_path, content_key=content_key)
                 
                 text_result = {
                     "filename": filename,
                     "subfolder": "",
-                    "type": self.type
+                    "type": self.type,
+                    "format": "txt",
+                    "shape": [len(txt)],
+                    "checksum": digest
                 }
                 results.append(text_result)
 
@@ -475,17 +668,22 @@ class LG_StringSender:
                 continue
 
         send_results = self.accumulated_results if accumulate else results
+        artifact_manager.set_live(f"string:{link_id}", [os.path.join(self.output_dir, r["filename"]) for r in send_results])
         
         if send_results:
-            print(f"[StringSender] 发送 {len(send_results)} 个字符串文件")
-            PromptServer.instance.send_sync("string-send", {
+            manifest_ref = self.manifest.publish(link_id, results, send_results, accumulate)
+            print(f"[StringSender] 发送 {len(send_results)} 个字符串文件 (manifest={manifest_ref})")
+            ws_delivery.send("string-send", {
                 "link_id": link_id,
-                "strings": send_results
-            })
+                "manifest": manifest_ref,
+                "count": len(send_results),
+                "strings": results,
+                "delta": bool(accumulate)
+            }, "strings")
         
         if not accumulate:
             self.accumulated_results = []
-        
+
         # UI显示文本内容预览
         ui_results = [{"filename": r["filename"], "content": t} for r, t in zip(results, text)]
         return { "ui": { "strings": ui_results } }
@@ -495,8 +693,12 @@ class LG_StringReceiver:
     def INPUT_TYPES(s):
         return {
             "required": {
-                "string": ("STRING", {"default": "", "multiline": False, "tooltip": "多个字符串文件名用逗号分隔"}),
+                "string": ("STRING", {"default": "", "multiline": False, "tooltip": "发送端的清单 (manifest:<id>)，或用逗号分隔的多个字符串文件名"}),
                 "link_id": ("INT", {"default": 1, "min": 0, "max": sys.maxsize, "step": 1, "tooltip": "发送端连接ID"}),
+            },
+            "optional": {
+                "select": ("STRING", {"default": "", "multiline": False,
+                    "tooltip": "按索引选择要加载的字符串，留空为全部。例如 0 / -1 / 2:10 / ::4 / every 4 / 0,3,5:8"}),
             }
         }
 
@@ -506,8 +708,8 @@ class LG_StringReceiver:
     OUTPUT_IS_LIST = (True,)
     FUNCTION = "load_string"
 
-    def load_string(self, string, link_id):
-        string_files = [x.strip() for x in string.split(',') if x.strip()]
+    def load_string(self, string, link_id, select=""):
+        string_files = [item["filename"] for item in resolve_items(string, select)]
         print(f"[StringReceiver] 加载字符串: {string_files}")
         
         output_strings = []
@@ -526,8 +728,9 @@ class LG_StringReceiver:
                         print(f"[StringReceiver] 文件不存在: {str_path}")
                         continue
                     
-                    with open(str_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
+                    with artifact_manager.pinned([str_path]):
+                        with open(str_path, 'r', encoding='utf-8') as f:
+                            content = f.read()
                     
                     output_strings.append(content)
                     
@@ -543,6 +746,54 @@ class LG_StringReceiver:
             print(f"[StringReceiver] 处理字符串时出错: {str(e)}")
             return ([""],)
 
+def _split_tensors(values, indices, output_mode, tag, batch_ndim):
+    """按选择表达式从批量张量或张量列表中选择
+
+    Args:
+        values: 单个批量张量 (ndim == batch_ndim) 的列表，或单项张量列表
+        batch_ndim: 批量张量的维数（图像为 4，遮罩为 3）
+    """
+    if not indices.strip():
+        return []
+    try:
+        selector = compile_selector(indices)
+    except ValueError:
+        print(f"[{tag}] 索引格式错误: {indices}")
+        return []
+
+    if len(values) == 1 and values[0].ndim == batch_ndim:
+        # 批量输入：连续区间为视图，其余为一次 index_select
+        batch = values[0]
+        total = batch.shape[0]
+        if output_mode == "batch":
+            selected = selector.select_batch(batch)
+            count = selected.shape[0]
+            selected = [selected] if count else []
+        else:
+            selected = selector.split_batch(batch)
+            count = len(selected)
+    else:
+        total = len(values)
+        selected = []
+        for value in selector.select_list(values):
+            if value.ndim == batch_ndim - 1:
+                value = value.unsqueeze(0)
+            elif value.ndim != batch_ndim:
+                continue
+            selected.append(value)
+        count = len(selected)
+        if output_mode == "batch" and count > 1:
+            if len({tuple(v.shape[1:]) for v in selected}) == 1:
+                selected = [torch.cat(selected)]
+            else:
+                print(f"[{tag}] 尺寸不一致，回退为列表输出")
+
+    print(f"[{tag}] 输入 {total} 项，选择 {count} 项")
+    return selected
+
+
+_SPLIT_TOOLTIP = "选择表达式，如：0,1,3,4 / 2:10 / -5: / ::2 / every 4 from 1"
+
 class ImageListSplitter:
     @classmethod
     def INPUT_TYPES(cls):
@@ -552,9 +803,13 @@ class ImageListSplitter:
                 "indices": ("STRING", {
                     "default": "", 
                     "multiline": False,
-                    "tooltip": "输入要提取的图片索引，用逗号分隔，如：0,1,3,4"
+                    "tooltip": _SPLIT_TOOLTIP
                 }),
             },
+            "optional": {
+                "output_mode": (["list", "batch"], {"default": "list",
+                    "tooltip": "list=每张图片单独输出，batch=输出单个批量张量"}),
+            },
         }
     
     RETURN_TYPES = ("IMAGE",)
@@ -565,64 +820,21 @@ class ImageListSplitter:
     INPUT_IS_LIST = True
     OUTPUT_IS_LIST = (True,)  # (images,)
 
-    def split_images(self, images, indices):
+    def split_images(self, images, indices, output_mode=None):
         try:
-            # 解析索引字符串
-            try:
-                if isinstance(indices, list):
-                    indices = indices[0] if indices else ""
-                indices = [int(idx.strip()) for idx in indices.split(',') if idx.strip()]
-            except ValueError:
-                print("[ImageSplitter] 索引格式错误，请使用逗号分隔的数字")
-                return ([],)
+            if isinstance(indices, list):
+                indices = indices[0] if indices else ""
+            output_mode = output_mode[0] if isinstance(output_mode, list) and output_mode else (output_mode or "list")
             
             # 确保images是列表
             if not isinstance(images, list):
                 images = [images]
             
-            # 处理批量图片的情况
-            if len(images) == 1 and len(images[0].shape) == 4:  # [B, H, W, C]
-                batch_images = images[0]
-                total_images = batch_images.shape[0]
-                print(f"[ImageSplitter] 检测到批量图片，总数: {total_images}")
-                
-                selected_images = []
-                for idx in indices:
-                    if 0 <= idx < total_images:
-                        # 保持批次维度，使用unsqueeze确保维度为 [1, H, W, C]
-                        img = batch_images[idx].unsqueeze(0)
-                        selected_images.append(img)
-                        print(f"[ImageSplitter] 从批量中选择第 {idx} 张图片")
-                    else:
-                        print(f"[ImageSplitter] 索引 {idx} 超出批量范围 0-{total_images-1}")
-                
-                if not selected_images:
-                    return ([],)
-                return (selected_images,)
-            
-            # 处理图片列表的情况
-            total_images = len(images)
-            print(f"[ImageSplitter] 检测到图片列表，总数: {total_images}")
-            
-            if total_images == 0:
+            if len(images) == 0:
                 print("[ImageSplitter] 没有输入图片")
                 return ([],)
-            
-            selected_images = []
-            for idx in indices:
-                if 0 <= idx < total_images:
-                    selected_image = images[idx]
-                    # 确保输出维度为 [1, H, W, C]
-                    if len(selected_image.shape) == 3:  # [H, W, C]
-                        selected_image = selected_image.unsqueeze(0)
-                    selected_images.append(selected_image)
-                    print(f"[ImageSplitter] 从列表中选择第 {idx} 张图片")
-                else:
-                    print(f"[ImageSplitter] 索引 {idx} 超出列表范围 0-{total_images-1}")
-            
-            if not selected_images:
-                return ([],)
-            return (selected_images,)
+
+            return (_split_tensors(images, indices, output_mode, "ImageSplitter", 4),)
 
         except Exception as e:
             print(f"[ImageSplitter] 处理出错: {str(e)}")
@@ -637,9 +849,13 @@ class MaskListSplitter:
                 "indices": ("STRING", {
                     "default": "", 
                     "multiline": False,
-                    "tooltip": "输入要提取的遮罩索引，用逗号分隔，如：0,1,3,4"
+                    "tooltip": _SPLIT_TOOLTIP
                 }),
             },
+            "optional": {
+                "output_mode": (["list", "batch"], {"default": "list",
+                    "tooltip": "list=每个遮罩单独输出，batch=输出单个批量张量"}),
+            },
         }
     
     RETURN_TYPES = ("MASK",)
@@ -650,69 +866,64 @@ class MaskListSplitter:
     INPUT_IS_LIST = True
     OUTPUT_IS_LIST = (True,)  # (masks,)
 
-    def split_masks(self, masks, indices):
+    def split_masks(self, masks, indices, output_mode=None):
         try:
-            # 解析索引字符串
-            try:
-                if isinstance(indices, list):
-                    indices = indices[0] if indices else ""
-                indices = [int(idx.strip()) for idx in indices.split(',') if idx.strip()]
-            except ValueError:
-                print("[MaskSplitter] 索引格式错误，请使用逗号分隔的数字")
-                return ([],)
+            if isinstance(indices, list):
+                indices = indices[0] if indices else ""
+            output_mode = output_mode[0] if isinstance(output_mode, list) and output_mode else (output_mode or "list")
             
             # 确保masks是列表
             if not isinstance(masks, list):
                 masks = [masks]
             
-            # 处理批量遮罩的情况
-            if len(masks) == 1 and len(masks[0].shape) == 3:  # [B, H, W]
-                batch_masks = masks[0]
-                total_masks = batch_masks.shape[0]
-                print(f"[MaskSplitter] 检测到批量遮罩，总数: {total_masks}")
-                
-                selected_masks = []
-                for idx in indices:
-                    if 0 <= idx < total_masks:
-                        selected_masks.append(batch_masks[idx].unsqueeze(0))
-                        print(f"[MaskSplitter] 从批量中选择第 {idx} 个遮罩")
-                    else:
-                        print(f"[MaskSplitter] 索引 {idx} 超出批量范围 0-{total_masks-1}")
-                
-                if not selected_masks:
-                    return ([],)
-                return (selected_masks,)
-            
-            # 处理遮罩列表的情况
-            total_masks = len(masks)
-            print(f"[MaskSplitter] 检测到遮罩列表，总数: {total_masks}")
-            
-            if total_masks == 0:
+            if len(masks) == 0:
                 print("[MaskSplitter] 没有输入遮罩")
                 return ([],)
-            
-            selected_masks = []
-            for idx in indices:
-                if 0 <= idx < total_masks:
-                    selected_mask = masks[idx]
-                    if len(selected_mask.shape) == 2:  # [H, W]
-                        selected_mask = selected_mask.unsqueeze(0)
-                    elif len(selected_mask.shape) != 3:  # 不是 [B, H, W]
-                        print(f"[MaskSplitter] 不支持的遮罩维度: {selected_mask.shape}")
-                        continue
-                    selected_masks.append(selected_mask)
-                    print(f"[MaskSplitter] 从列表中选择第 {idx} 个遮罩")
-                else:
-                    print(f"[MaskSplitter] 索引 {idx} 超出列表范围 0-{total_masks-1}")
-            
-            if not selected_masks:
-                return ([],)
-            return (selected_masks,)
+
+            return (_split_tensors(masks, indices, output_mode, "MaskSplitter", 3),)
 
         except Exception as e:
             print(f"[MaskSplitter] 处理出错: {str(e)}")
             return ([],)
 
+def _repeat_tensors(values, repeat_times, mode, order, batch_ndim):
+    """按模式重复张量
+
+    Args:
+        mode: list=重复引用组成列表，batch_view=每项输出一个广播视图（单帧时零拷贝），batch=拼接为一个实际复制的批量
+        order: interleave=每项连续重复 (a,a,b,b)，tile=整体重复 (a,b,a,b)
+        batch_ndim: 批量张量的维数（图像为 4，遮罩为 3）
+    """
+    values = [v.unsqueeze(0) if v.ndim == batch_ndim - 1 else v for v in values]
+
+    def materialize(t):
+        if order == "tile":
+            return t.repeat(repeat_times, *[1] * (t.ndim - 1))
+        return t.repeat_interleave(repeat_times, dim=0)
+
+    if mode == "list":
+        if order == "tile":
+            return values * repeat_times
+        return [v for v in values for _ in range(repeat_times)]
+
+    if mode == "batch_view":
+        # 单帧用 expand 广播（步长为 0 的视图），内存不随重复次数增长
+        return [v.expand(repeat_times, *v.shape[1:]) if v.shape[0] == 1 else materialize(v) for v in values]
+
+    if len({tuple(v.shape[1:]) for v in values}) > 1:
+        print("[Repeater] 尺寸不一致，按输入分别输出批量")
+        return [materialize(v) for v in values]
+    batch = torch.cat(values) if len(values) > 1 else values[0]
+    return [materialize(batch)]
+
+
+_REPEAT_INPUTS = {
+    "mode": (["list", "batch_view", "batch"], {"default": "list",
+        "tooltip": "list=重复引用组成列表，batch_view=单帧输入以广播视图输出批量（零拷贝，下游不应原地修改），batch=输出实际复制的单个批量"}),
+    "order": (["interleave", "tile"], {"default": "interleave",
+        "tooltip": "interleave=每项连续重复 (a,a,b,b)，tile=整个序列重复 (a,b,a,b)"}),
+}
+
 class ImageListRepeater:
     @classmethod
     def INPUT_TYPES(cls):
@@ -722,11 +933,12 @@ class ImageListRepeater:
                 "repeat_times": ("INT", {
                     "default": 1,
                     "min": 1,
-                    "max": 100,
+                    "max": 1000000,
                     "step": 1,
                     "tooltip": "每张图片重复的次数"
                 }),
             },
+            "optional": _REPEAT_INPUTS,
         }
     
     RETURN_TYPES = ("IMAGE",)
@@ -737,11 +949,13 @@ class ImageListRepeater:
     INPUT_IS_LIST = True
     OUTPUT_IS_LIST = (True,)
 
-    def repeat_images(self, images, repeat_times):
+    def repeat_images(self, images, repeat_times, mode=None, order=None):
         try:
             # 处理 repeat_times 参数
             if isinstance(repeat_times, list):
                 repeat_times = repeat_times[0] if repeat_times else 1
+            mode = mode[0] if isinstance(mode, list) and mode else (mode or "list")
+            order = order[0] if isinstance(order, list) and order else (order or "interleave")
             
             # 确保images是列表
             if not isinstance(images, list):
@@ -751,14 +965,9 @@ class ImageListRepeater:
                 print("[ImageRepeater] 没有输入图片")
                 return ([],)
             
-            # 创建重复后的图片列表
-            repeated_images = []
-            for idx, img in enumerate(images):
-                for _ in range(int(repeat_times)):  # 确保 repeat_times 是整数
-                    repeated_images.append(img)
-                print(f"[ImageRepeater] 图片 {idx} 重复 {repeat_times} 次")
+            repeated_images = _repeat_tensors(images, int(repeat_times), mode, order, 4)
             
-            print(f"[ImageRepeater] 输入 {len(images)} 张图片，输出 {len(repeated_images)} 张图片")
+            print(f"[ImageRepeater] 输入 {len(images)} 项，每项重复 {repeat_times} 次，输出 {len(repeated_images)} 项 ({mode}, {order})")
             return (repeated_images,)
 
         except Exception as e:
@@ -774,11 +983,12 @@ class MaskListRepeater:
                 "repeat_times": ("INT", {
                     "default": 1,
                     "min": 1,
-                    "max": 100,
+                    "max": 1000000,
                     "step": 1,
                     "tooltip": "每张遮罩重复的次数"
                 }),
             },
+            "optional": _REPEAT_INPUTS,
         }
     
     RETURN_TYPES = ("MASK",)            
@@ -789,11 +999,13 @@ class MaskListRepeater:
     INPUT_IS_LIST = True
     OUTPUT_IS_LIST = (True,)    
 
-    def repeat_masks(self, masks, repeat_times):
+    def repeat_masks(self, masks, repeat_times, mode=None, order=None):
         try:
             # 处理 repeat_times 参数
             if isinstance(repeat_times, list):
                 repeat_times = repeat_times[0] if repeat_times else 1
+            mode = mode[0] if isinstance(mode, list) and mode else (mode or "list")
+            order = order[0] if isinstance(order, list) and order else (order or "interleave")
 
             # 确保masks是列表
             if not isinstance(masks, list):
@@ -803,14 +1015,9 @@ class MaskListRepeater:
                 print("[MaskRepeater] 没有输入遮罩")
                 return ([],)
 
-            # 创建重复后的遮罩列表
-            repeated_masks = []     
-            for idx, mask in enumerate(masks):
-                for _ in range(int(repeat_times)):  # 确保 repeat_times 是整数
-                    repeated_masks.append(mask)
-                print(f"[MaskRepeater] 遮罩 {idx} 重复 {repeat_times} 次")
+            repeated_masks = _repeat_tensors(masks, int(repeat_times), mode, order, 3)
 
-            print(f"[MaskRepeater] 输入 {len(masks)} 个遮罩，输出 {len(repeated_masks)} 个遮罩")
+            print(f"[MaskRepeater] 输入 {len(masks)} 项，每项重复 {repeat_times} 次，输出 {len(repeated_masks)} 项 ({mode}, {order})")
             return (repeated_masks,)    
 
         except Exception as e:
@@ -818,6 +1025,7 @@ class MaskListRepeater:
             return ([],)
 
 
+
     
 class LG_FastPreview(SaveImage):
     def __init__(self):
@@ -832,7 +1040,11 @@ class LG_FastPreview(SaveImage):
                     "format": (["PNG", "JPEG", "WEBP"], {"default": "JPEG"}),
                     "quality": ("INT", {"default": 95, "min": 1, "max": 100, "step": 1}),
                 },
-                "hidden": {"prompt": "PROMPT", "extra_pnginfo": "EXTRA_PNGINFO"},
+                "optional": {
+                    "max_size": ("INT", {"default": 1024, "min": 0, "max": 16384, "step": 64,
+                        "tooltip": "预览图长边的最大尺寸，0 表示保持原尺寸"}),
+                },
+                "hidden": {"prompt": "PROMPT", "extra_pnginfo": "EXTRA_PNGINFO", "unique_id": "UNIQUE_ID"},
                }
     
     RETURN_TYPES = ()
@@ -841,43 +1053,44 @@ class LG_FastPreview(SaveImage):
     CATEGORY = CATEGORY_TYPE
     DESCRIPTION = "快速预览图像,支持多种格式和质量设置"
 
-    def save_images(self, images, format="JPEG", quality=95, prompt=None, extra_pnginfo=None):
+    def save_images(self, images, format="JPEG", quality=95, max_size=1024, prompt=None, extra_pnginfo=None, unique_id=None):
         filename_prefix = "preview"
         filename_prefix += self.prefix_append
         full_output_folder, filename, counter, subfolder, filename_prefix = folder_paths.get_save_image_path(filename_prefix, self.output_dir, images[0].shape[1], images[0].shape[0])
         
+        # 编码参数（包括 PNG 元数据）每次执行只生成一次
+        save_kwargs = {}
+        if format == "PNG":
+            file_extension = ".png"
+
+            compress_level = int(9 * (1 - quality/100)) 
+            save_kwargs["compress_level"] = compress_level
+
+            if not args.disable_metadata:
+                metadata = PngInfo()
+                if prompt is not None:
+                    metadata.add_text("prompt", json.dumps(prompt))
+                if extra_pnginfo is not None:
+                    for x in extra_pnginfo:
+                        metadata.add_text(x, json.dumps(extra_pnginfo[x]))
+                save_kwargs["pnginfo"] = metadata
+        elif format == "JPEG":
+            file_extension = ".jpg"
+            save_kwargs["quality"] = quality
+            save_kwargs["optimize"] = True
+        else:  
+            file_extension = ".webp"
+            save_kwargs["quality"] = quality
+
+        # 整批一次转换；数组交给后台线程编码，不能复用缓冲
+        arrays = to_uint8(images)
+
         results = list()
-        for (batch_number, image) in enumerate(images):
-            i = 255. * image.cpu().numpy()
-            img = Image.fromarray(np.clip(i, 0, 255).astype(np.uint8))
-            save_kwargs = {}
-            if format == "PNG":
-                file_extension = ".png"
-
-                compress_level = int(9 * (1 - quality/100)) 
-                save_kwargs["compress_level"] = compress_level
-
-                if not args.disable_metadata:
-                    metadata = PngInfo()
-                    if prompt is not None:
-                        metadata.add_text("prompt", json.dumps(prompt))
-                    if extra_pnginfo is not None:
-                        for x in extra_pnginfo:
-                            metadata.add_text(x, json.dumps(extra_pnginfo[x]))
-                    save_kwargs["pnginfo"] = metadata
-            elif format == "JPEG":
-                file_extension = ".jpg"
-                save_kwargs["quality"] = quality
-                save_kwargs["optimize"] = True
-            else:  
-                file_extension = ".webp"
-                save_kwargs["quality"] = quality
-                
+        tasks = list()
+        for batch_number in range(len(arrays)):
             filename_with_batch_num = filename.replace("%batch_num%", str(batch_number))
             file = f"{filename_with_batch_num}_{counter:05}_{file_extension}"
-            
-            img.save(os.path.join(full_output_folder, file), format=format, **save_kwargs)
-            
+            tasks.append((arrays[batch_number], os.path.join(full_output_folder, file), format, max_size, save_kwargs))
             results.append({
                 "filename": file,
                 "subfolder": subfolder,
@@ -885,15 +1098,20 @@ class LG_FastPreview(SaveImage):
             })
             counter += 1
 
-        return { "ui": { "images": results } }
+        # 文件名已确定，直接作为节点输出返回（写入历史记录）；只有编码在后台进行，
+        # 编码完成后再推送一次，前端在文件写出前请求失败的预览会随之刷新
+        paths = [task[1] for task in tasks]
+        submit_previews(unique_id, tasks, results,
+                        on_done=lambda: [artifact_manager.register("fast_preview", path) for path in paths])
+        return {"ui": {"images": results}}
     
 class LG_AccumulatePreview(SaveImage):
     def __init__(self):
         self.output_dir = folder_paths.get_temp_directory()
         self.type = "temp"
         self.prefix_append = "_acc_" + ''.join(random.choice("abcdefghijklmnopqrstupvxyz") for x in range(5))
-        self.accumulated_images = []
-        self.accumulated_masks = []
+        # 累积的 [图像, 遮罩] 与预览信息，超出内存预算的部分溢出到磁盘映射文件
+        self.store = SpillStore(os.path.join(self.output_dir, "lg_spill"))
         self.counter = 0
         
     @classmethod
@@ -903,6 +1121,12 @@ class LG_AccumulatePreview(SaveImage):
                 },
                 "optional": {
                     "mask": ("MASK",),
+                    "ram_budget_mb": ("INT", {"default": 2048, "min": 0, "max": 1024 * 1024, "step": 64,
+                        "tooltip": "累积图像占用内存的上限 (MB)，超出后最旧的图像转存到磁盘映射文件，0 表示全部转存"}),
+                    "keep_last": ("INT", {"default": 0, "min": 0, "max": sys.maxsize, "step": 1,
+                        "tooltip": "只保留最近 N 张图像，0 表示不限制"}),
+                    "max_size": ("INT", {"default": 512, "min": 0, "max": 16384, "step": 64,
+                        "tooltip": "预览图长边的最大尺寸，0 表示保持原尺寸"}),
                 },
                 "hidden": {
                     "prompt": "PROMPT", 
@@ -919,9 +1143,11 @@ class LG_AccumulatePreview(SaveImage):
     CATEGORY = CATEGORY_TYPE
     DESCRIPTION = "累计图像预览"
 
-    def accumulate_images(self, images, mask=None, prompt=None, extra_pnginfo=None, unique_id=None):
+    def accumulate_images(self, images, mask=None, ram_budget_mb=2048, keep_last=0, max_size=512, prompt=None, extra_pnginfo=None, unique_id=None):
+        self.store.configure(ram_budget=ram_budget_mb * 1024 * 1024, keep_last=keep_last)
+
         # 添加调试信息
-        print(f"[AccumulatePreview] accumulate_images - 当前累积图片数量: {len(self.accumulated_images)}")
+        print(f"[AccumulatePreview] accumulate_images - 当前累积图片数量: {len(self.store)}")
         print(f"[AccumulatePreview] accumulate_images - 新输入图片数量: {len(images)}")
         print(f"[AccumulatePreview] accumulate_images - unique_id: {unique_id}")
         
@@ -932,55 +1158,61 @@ class LG_AccumulatePreview(SaveImage):
             filename_prefix, self.output_dir, images[0].shape[1], images[0].shape[0]
         )
 
-        for image in images:
-            i = 255. * image.cpu().numpy()
-            img = Image.fromarray(np.clip(i, 0, 255).astype(np.uint8))
-
-            file = f"{filename}_{self.counter:05}.png"
-            img.save(os.path.join(full_output_folder, file), format="PNG")
+        # 整批一次转换；数组交给后台线程编码，不能复用缓冲
+        arrays = to_uint8(images)
+        tasks = []
+        for image, array in zip(images, arrays):
+            # 预览只需缩略图，交给后台线程编码
+            file = f"{filename}_{self.counter:05}.jpg"
+            tasks.append((array, os.path.join(full_output_folder, file), "JPEG", max_size, {"quality": 90}))
 
             if len(image.shape) == 3:
                 image = image.unsqueeze(0) 
-            self.accumulated_images.append({
-                "image": image,
-                "info": {
-                    "filename": file,
-                    "subfolder": subfolder,
-                    "type": self.type
-                }
+            if mask is not None and len(mask.shape) == 2:
+                mask = mask.unsqueeze(0)
+            self.store.append([image, mask], {
+                "filename": file,
+                "subfolder": subfolder,
+                "type": self.type
             })
-
-            if mask is not None:
-                if len(mask.shape) == 2:
-                    mask = mask.unsqueeze(0)
-                self.accumulated_masks.append(mask)
-            else:
-                self.accumulated_masks.append(None)
             
             self.counter += 1
 
-        if not self.accumulated_images:
+        entries = self.store.snapshot()
+        if not entries:
             return {"ui": {"images": []}, "result": ([], [], 0)}
 
-        accumulated_tensors = []
-        for item in self.accumulated_images:
-            img = item["image"]
-            if len(img.shape) == 3:  # [H, W, C]
-                img = img.unsqueeze(0)  # 变成 [1, H, W, C]
-            accumulated_tensors.append(img)
-
-        accumulated_masks = [m for m in self.accumulated_masks if m is not None]
+        # 已转存的图像以映射视图返回，下游读取时才由系统分页载入
+        accumulated_tensors = [tensors[0] for tensors, _ in entries]
+        accumulated_masks = [tensors[1] for tensors, _ in entries if tensors[1] is not None]
         
-        ui_images = [item["info"] for item in self.accumulated_images]
+        stats = self.store.stats()
+        if stats["spilled"]:
+            print(f"[AccumulatePreview] 内存中 {len(entries) - stats['spilled']} 张，"
+                  f"已转存磁盘 {stats['spilled']} 张 ({stats['disk_bytes'] / 1024 / 1024:.0f} MB)")
+
+        ui_images = [info for _, info in entries]
+        live_paths = [os.path.join(self.output_dir, info["subfolder"], info["filename"]) for info in ui_images]
+        new_paths = [task[1] for task in tasks]
+
+        def on_done():
+            owner = f"preview:{unique_id}"
+            for path in new_paths:
+                artifact_manager.register(owner, path)
+            # 累积中的预览文件保持固定，重置节点后由配额回收
+            artifact_manager.set_live(owner, live_paths)
+
+        submit_previews(unique_id, tasks, ui_images, on_done=on_done)
         
         return {
-            "ui": {"images": ui_images},
-            "result": (accumulated_tensors, accumulated_masks, len(self.accumulated_images))
+            "result": (accumulated_tensors, accumulated_masks, len(entries))
         }
 
 class LG_ValueSender:
     """
     发送任意类型的值
+    标量以文本发送；张量、数组、列表、字典等数据值序列化保存在服务端，接收端得到副本；
+    MODEL / CLIP / VAE 等对象及超大的数据值只保存进程内引用，接收端得到同一个对象
     """
     
     @classmethod
@@ -1002,26 +1234,29 @@ class LG_ValueSender:
     RETURN_NAMES = ("signal",)
 
     def doit(self, value, link_id=0, signal_opt=None):
-        # 转换值为可序列化的字符串
+        # 标量直接以文本发送，其余类型保存在服务端（数据值序列化，其他对象保存引用），只发送句柄
+        summary = None
         if value is None:
             send_value = ""
         elif isinstance(value, (str, int, float, bool)):
             send_value = str(value)
-        elif hasattr(value, 'tolist'):
-            # tensor/numpy array
-            send_value = str(value.tolist())
-        elif isinstance(value, (list, tuple)):
-            send_value = str(list(value))
-        elif isinstance(value, dict):
-            send_value = str(value)
         else:
-            send_value = str(value)
+            try:
+                send_value = value_store.put(link_id, value)
+                summary = summarize(value)
+            except Exception as e:
+                print(f"[ValueSender] 无法序列化 {type(value).__name__}，按文本发送: {str(e)}")
+                send_value = str(value.tolist()) if hasattr(value, 'tolist') else str(value)
             
-        print(f"[ValueSender] link_id={link_id}, 发送值: {send_value}")
-        PromptServer.instance.send_sync("value-send-accumulate", {
+        print(f"[ValueSender] link_id={link_id}, 发送值: {summary or send_value}")
+        # 同一次执行中的多个值合并为一条消息
+        ws_delivery.send("value-send-accumulate", {
             "link_id": link_id, 
-            "value": send_value
-        })
+            "value": send_value,
+            "values": [send_value],
+            "summary": summary,
+            "delta": True
+        }, "values")
         
         return (signal_opt,)
 
@@ -1032,7 +1267,7 @@ class LG_ValueReceiver:
     累积多次收到的值成列表
     """
     
-    _accumulated_values = {}  # 类级别存储，按 link_id 分组
+    _accumulator = ValueAccumulator()  # 类级别存储，按 link_id 分组
     
     @classmethod
     def INPUT_TYPES(cls):
@@ -1044,6 +1279,12 @@ class LG_ValueReceiver:
                 "link_id": ("INT", {"default": 0, "min": 0, "max": sys.maxsize, "step": 1}),
                 "accumulate": ("BOOLEAN", {"default": True, "tooltip": "开启后累积所有收到的值"}),
             },
+            "optional": {
+                "max_items": ("INT", {"default": 0, "min": 0, "max": sys.maxsize, "step": 1,
+                    "tooltip": "累积模式下最多保留的值数量（淘汰最早的），0 表示不限制"}),
+                "ttl_seconds": ("INT", {"default": 0, "min": 0, "max": sys.maxsize, "step": 1,
+                    "tooltip": "累积模式下值的保留秒数，0 表示不限制"}),
+            },
         }
 
     FUNCTION = "doit"
@@ -1053,58 +1294,57 @@ class LG_ValueReceiver:
     OUTPUT_IS_LIST = (True, False)
 
     @classmethod
-    def IS_CHANGED(cls, typ, value, link_id, accumulate):
+    def IS_CHANGED(cls, typ, value, link_id, accumulate, max_items=0, ttl_seconds=0):
         if accumulate:
             return float("NaN")  # 累积模式下总是执行
         return hash(str(value))
 
-    def doit(self, typ, value, link_id=0, accumulate=True):
+    @staticmethod
+    def convert(v, typ):
+        """把一行原始文本转换为目标类型"""
+        if is_handle(v):
+            # 句柄对应的值保持发送端的原始类型
+            try:
+                return value_store.get(v)
+            except KeyError:
+                print(f"[ValueReceiver] 值已失效（服务重启或被淘汰）: {v}")
+                return SKIP
+        try:
+            if typ == "INT":
+                return int(v)
+            elif typ == "FLOAT":
+                return float(v)
+            elif typ == "BOOLEAN":
+                return v.lower() in ("true", "1", "yes")
+            return v
+        except (ValueError, TypeError):
+            return v
+
+    def doit(self, typ, value, link_id=0, accumulate=True, max_items=0, ttl_seconds=0):
         # 解析当前收到的值
         current_values = [v.strip() for v in value.strip().split('\n') if v.strip()]
         
         if accumulate:
-            # 累积模式：添加到累积列表
-            if link_id not in LG_ValueReceiver._accumulated_values:
-                LG_ValueReceiver._accumulated_values[link_id] = []
-            
-            for v in current_values:
-                if v not in LG_ValueReceiver._accumulated_values[link_id]:
-                    LG_ValueReceiver._accumulated_values[link_id].append(v)
-            
-            value_list = LG_ValueReceiver._accumulated_values[link_id].copy()
+            # 累积模式：只转换新值，返回不复制的快照
+            result = LG_ValueReceiver._accumulator.add(
+                link_id, current_values, typ, self.convert, max_items=max_items, ttl=ttl_seconds
+            )
         else:
             # 非累积模式：只使用当前值，清空累积
-            LG_ValueReceiver._accumulated_values[link_id] = []
-            value_list = current_values
+            LG_ValueReceiver._accumulator.clear(link_id)
+            result = [v for v in (self.convert(v, typ) for v in current_values) if v is not SKIP]
         
-        if not value_list:
+        if not result:
             return ([], 0)
         
-        # 类型转换
-        result = []
-        for v in value_list:
-            try:
-                if typ == "INT":
-                    result.append(int(v))
-                elif typ == "FLOAT":
-                    result.append(float(v))
-                elif typ == "BOOLEAN":
-                    result.append(v.lower() in ("true", "1", "yes"))
-                else:
-                    result.append(v)
-            except (ValueError, TypeError):
-                result.append(v)
-        
         print(f"[ValueReceiver] link_id={link_id}, 输出 {len(result)} 个值")
         return (result, len(result))
     
     @classmethod
     def clear_accumulated(cls, link_id=None):
         """清空累积的值"""
-        if link_id is None:
-            cls._accumulated_values.clear()
-        elif link_id in cls._accumulated_values:
-            cls._accumulated_values[link_id] = []
+        cls._accumulator.clear(link_id)
+        value_store.clear(link_id)
 
 
 class LG_ClearAccumulatedValues:
@@ -0,0 +1,278 @@
+"""
+类型化值通道
+1. ValueStore: LG_ValueSender 的非标量值保存在服务端，websocket 只传句柄和简短摘要，
+   LG_ValueReceiver 按句柄取回原始类型的对象：
+   - 数据值（张量、numpy 数组、标量、字符串、bytes 及由它们组成的列表/元组/字典），
+     不超过 MAX_VALUE_BYTES 时序列化保存，接收端每次得到独立的副本；句柄由内容指纹生成，相同的值只保存一次
+   - 其他对象（MODEL / CLIP / VAE 等）及超出上限的数据值保存为进程内引用，接收端得到同一个对象，
+     不做序列化；每个 link_id 只保留最近 MAX_REFS_PER_LINK 个引用
+2. ValueAccumulator: LG_ValueReceiver 的累积存储，按插入顺序的哈希索引去重，插入时完成类型转换
+"""
+
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import torch
+
+from .fingerprint import fingerprint
+
+HANDLE_PREFIX = "lgv:"
+# 每个 link_id 最多保留的值数量（累积模式下接收端会引用多个句柄）
+MAX_VALUES_PER_LINK = 1024
+# 单个数据值序列化保存的字节上限，超出时改为保存引用
+MAX_VALUE_BYTES = int(float(os.environ.get("LG_VALUE_MAX_MB", 256)) * 1024 * 1024)
+# 每个 link_id 最多保留的对象引用数量（引用会让模型等对象保持在内存中）
+MAX_REFS_PER_LINK = 8
+
+
+def is_handle(text):
+    return isinstance(text, str) and text.startswith(HANDLE_PREFIX)
+
+
+def summarize(value):
+    """生成值的简短描述，用于日志和前端显示"""
+    if isinstance(value, torch.Tensor):
+        return f"Tensor{list(value.shape)} {str(value.dtype).replace('torch.', '')}"
+    if hasattr(value, "shape") and hasattr(value, "dtype"):
+        return f"{type(value).__name__}{list(value.shape)} {value.dtype}"
+    if isinstance(value, (list, tuple, set)):
+        return f"{type(value).__name__}[{len(value)}]"
+    if isinstance(value, dict):
+        return f"dict{{{len(value)}}}"
+    return type(value).__name__
+
+
+def _is_plain(value):
+    """值能否不经序列化直接由 fingerprint 区分（CPU 张量、数组、标量及其列表）"""
+    if value is None or type(value) in (str, int, float, bool, bytes):
+        return True
+    if type(value) is np.ndarray:
+        return not value.dtype.hasobject
+    if type(value) is torch.Tensor:
+        return value.device.type == "cpu"
+    if type(value) is list:
+        return all(_is_plain(v) for v in value)
+    return False
+
+
+def _data_bytes(value):
+    """数据值的大致字节数；含有其他类型的对象时返回 None"""
+    if value is None or type(value) in (int, float, bool):
+        return 8
+    if type(value) in (str, bytes):
+        return len(value)
+    if isinstance(value, torch.Tensor):
+        return value.nbytes
+    if type(value) is np.ndarray:
+        return None if value.dtype.hasobject else value.nbytes
+    if type(value) in (list, tuple):
+        items = value
+    elif type(value) is dict:
+        if not all(type(k) in (str, int, float, bool) for k in value):
+            return None
+        items = value.values()
+    else:
+        return None
+    total = 0
+    for item in items:
+        size = _data_bytes(item)
+        if size is None:
+            return None
+        total += size
+    return total
+
+
+def _serialize(value):
+    buffer = io.BytesIO()
+    torch.save(value, buffer)
+    return buffer.getvalue()
+
+
+class ValueStore:
+    """按 link_id 分组保存序列化后的数据值和进程内对象引用"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # link_id -> OrderedDict(handle -> bytes)
+        self.values = {}
+        # link_id -> OrderedDict(handle -> 对象)
+        self.refs = {}
+        # handle -> link_id
+        self.index = {}
+
+    def put(self, link_id, value):
+        """保存值并返回句柄，已保存过的值直接复用
+
+        数据值序列化保存，句柄由内容指纹生成；元组、字典等结构 fingerprint 无法完整区分
+        （元组与列表、键的类型和顺序），这类值先序列化再对字节做指纹。
+        其他对象和超出 MAX_VALUE_BYTES 的数据值只保存引用，句柄由对象标识生成。
+        """
+        size = _data_bytes(value)
+        if size is None or size > MAX_VALUE_BYTES:
+            return self._put_ref(link_id, value)
+        data = None
+        if _is_plain(value):
+            key = fingerprint(value, full=True)
+        else:
+            data = _serialize(value)
+            key = fingerprint(data)
+        handle = f"{HANDLE_PREFIX}{link_id}:{key}"
+        with self.lock:
+            values = self.values.setdefault(link_id, OrderedDict())
+            if handle in values:
+                values.move_to_end(handle)
+                return handle
+        if data is None:
+            data = _serialize(value)
+        with self.lock:
+            values = self.values.setdefault(link_id, OrderedDict())
+            values[handle] = data
+            self.index[handle] = link_id
+            while len(values) > MAX_VALUES_PER_LINK:
+                evicted, _ = values.popitem(last=False)
+                self.index.pop(evicted, None)
+        return handle
+
+    def _put_ref(self, link_id, value):
+        # 引用期间对象不会被回收，id 不会被复用
+        handle = f"{HANDLE_PREFIX}{link_id}:ref{id(value):x}"
+        with self.lock:
+            refs = self.refs.setdefault(link_id, OrderedDict())
+            refs[handle] = value
+            refs.move_to_end(handle)
+            self.index[handle] = link_id
+            while len(refs) > MAX_REFS_PER_LINK:
+                evicted, _ = refs.popitem(last=False)
+                self.index.pop(evicted, None)
+        return handle
+
+    def get(self, handle):
+        """按句柄取回值：数据值每次返回新的副本，引用返回原对象；句柄不存在时抛出 KeyError"""
+        with self.lock:
+            link_id = self.index[handle]
+            refs = self.refs.get(link_id)
+            if refs is not None and handle in refs:
+                return refs[handle]
+            data = self.values[link_id][handle]
+        return torch.load(io.BytesIO(data), weights_only=False)
+
+    def clear(self, link_id=None):
+        with self.lock:
+            if link_id is None:
+                self.values.clear()
+                self.refs.clear()
+                self.index.clear()
+            else:
+                for handle in self.values.pop(link_id, {}):
+                    self.index.pop(handle, None)
+                for handle in self.refs.pop(link_id, {}):
+                    self.index.pop(handle, None)
+
+
+# 全局值存储实例
+value_store = ValueStore()
+
+
+# convert 返回该值时表示跳过（如句柄已失效）
+SKIP = object()
+
+
+class _LinkValues:
+    def __init__(self, typ):
+        self.typ = typ
+        # 原始文本 -> (转换后的值, 插入时间)，按插入顺序排列
+        self.entries = OrderedDict()
+        # 与 entries 顺序一致的转换后值列表
+        self.values = []
+        # values 已交给调用方，修改前需要先复制（写时复制）
+        self.shared = False
+        # 已淘汰的原始文本：前端缓存仍会重复发送它们，不能再次插入
+        self.evicted = set()
+
+
+class ValueAccumulator:
+    """按 link_id 累积去重的值，线程安全"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.links = {}
+
+    def add(self, link_id, raws, typ, convert, max_items=0, ttl=0):
+        """插入新值并返回当前快照
+
+        Args:
+            raws: 原始文本列表，已存在的会被忽略
+            typ: 目标类型，变化时对已累积的值重新转换
+            convert: convert(raw, typ) -> 值，返回 SKIP 时不插入
+            max_items: 最多保留的值数量，0 为不限制
+            ttl: 值的保留秒数，0 为不限制
+
+        Returns:
+            值列表快照（调用方不应修改）
+        """
+        now = time.time()
+        with self.lock:
+            link = self.links.get(link_id)
+            if link is None:
+                link = self.links[link_id] = _LinkValues(typ)
+            elif link.typ != typ:
+                self._retype(link, typ, convert)
+
+            # 前端不再持有的原始文本无需继续记录
+            link.evicted.intersection_update(raws)
+            appended = []
+            for raw in raws:
+                if raw in link.entries or raw in link.evicted:
+                    continue
+                value = convert(raw, typ)
+                if value is SKIP:
+                    continue
+                link.entries[raw] = (value, now)
+                appended.append(value)
+
+            if self._expire(link, now, max_items, ttl):
+                link.values = [value for value, _ in link.entries.values()]
+            elif appended:
+                if link.shared:
+                    link.values = list(link.values)
+                link.values.extend(appended)
+            link.shared = True
+            return link.values
+
+    def clear(self, link_id=None):
+        with self.lock:
+            if link_id is None:
+                self.links.clear()
+            else:
+                self.links.pop(link_id, None)
+
+    def _retype(self, link, typ, convert):
+        entries = OrderedDict()
+        for raw, (_, inserted) in link.entries.items():
+            value = convert(raw, typ)
+            if value is not SKIP:
+                entries[raw] = (value, inserted)
+        link.typ = typ
+        link.entries = entries
+        link.values = [value for value, _ in entries.values()]
+        link.shared = False
+
+    def _expire(self, link, now, max_items, ttl):
+        """按插入顺序从最旧的开始淘汰并记录到 link.evicted，返回淘汰的数量"""
+        removed = 0
+        entries = link.entries
+        if ttl:
+            while entries and now - next(iter(entries.values()))[1] > ttl:
+                raw, _ = entries.popitem(last=False)
+                link.evicted.add(raw)
+                removed += 1
+        if max_items:
+            while len(entries) > max_items:
+                raw, _ = entries.popitem(last=False)
+                link.evicted.add(raw)
+                removed += 1
+        return removed
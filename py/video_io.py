@@ -0,0 +1,695 @@
+"""
+视频读写工具
+1. StreamingVideoWriter: 分块流式编码，支持 PyAV / FFmpeg 管道 / OpenCV 三种后端
+2. encode_frames: 将 [N,H,W,3] 浮点帧张量按固定大小的块转换并写入编码器，内存占用与视频长度无关
+   encode_frames_chunked: 按 GOP 对齐切片后由多个 FFmpeg 进程并行编码，再无损拼接
+   build_concat_command: 生成拼接视频文件（可附加或混合音频）的单次 FFmpeg 命令
+3. read_video_frames: 预分配输出张量，逐帧解码并直接写入对应位置，支持帧范围、步长与缩放
+4. get_keyframe_index: 按文件缓存的关键帧索引，用于基于 seek 的区间解码
+"""
+
+import os
+import bisect
+import queue
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict
+from fractions import Fraction
+
+import numpy as np
+import torch
+import cv2
+
+from .image_convert import UInt8Buffer
+
+try:
+    import av
+    AV_AVAILABLE = True
+except ImportError:
+    AV_AVAILABLE = False
+
+# 每次转换并送入编码器的帧数
+DEFAULT_CHUNK_SIZE = 16
+
+# 编码器配置: 容器扩展名, PyAV/FFmpeg 编码器名, 像素格式
+# mp4v 只依赖 OpenCV，始终可用；ffv1 / rawvideo 为无损传输格式，浏览器无法直接播放
+VIDEO_CODECS = {
+    "mp4v": {"ext": ".mp4", "encoder": None, "pix_fmt": None},
+    "h264": {"ext": ".mp4", "encoder": "libx264", "pix_fmt": "yuv420p"},
+    "ffv1": {"ext": ".mkv", "encoder": "ffv1", "pix_fmt": "bgr0"},
+    "rawvideo": {"ext": ".avi", "encoder": "rawvideo", "pix_fmt": "bgr24"},
+}
+DEFAULT_CODEC = "mp4v"
+# 前端 <video> 可以播放的容器
+PREVIEWABLE_EXTENSIONS = (".mp4",)
+
+
+def video_extension(codec):
+    return VIDEO_CODECS.get(codec, VIDEO_CODECS[DEFAULT_CODEC])["ext"]
+
+
+def h264_available():
+    return AV_AVAILABLE or shutil.which("ffmpeg") is not None
+
+
+def even_size(width, height):
+    """yuv420p 要求宽高为偶数，返回向上补齐后的 (宽, 高)"""
+    return width + width % 2, height + height % 2
+
+
+def pad_to_even(frames):
+    """把 [N,H,W,3] uint8 帧的宽高补齐为偶数（复制最后一行/列），已是偶数时原样返回"""
+    pad_h, pad_w = frames.shape[1] % 2, frames.shape[2] % 2
+    if not (pad_h or pad_w):
+        return frames
+    return np.pad(frames, ((0, 0), (0, pad_h), (0, pad_w), (0, 0)), mode="edge")
+
+
+# 分片 MP4：每个关键帧开始新的片段，进程中断时已写出的片段仍可播放
+FRAGMENTED_MOVFLAGS = "frag_keyframe+empty_moov+default_base_moof"
+
+
+class StreamingVideoWriter:
+    """流式视频写入器，逐块接收 RGB uint8 帧 [N,H,W,3]
+
+    fragmented=True 时输出分片 MP4（仅 h264）；audio_rate > 0 时附带 AAC 音轨，通过 write_audio 写入（需要 PyAV）
+    """
+
+    def __init__(self, path, width, height, fps, codec=DEFAULT_CODEC, threads=0, crf=19,
+                 gop=0, fragmented=False, audio_rate=0, audio_channels=2):
+        if codec not in VIDEO_CODECS:
+            raise ValueError(f"不支持的编码格式: {codec}")
+        if fragmented and codec != "h264":
+            raise ValueError("分片 MP4 只支持 h264")
+        if audio_rate and not AV_AVAILABLE:
+            raise RuntimeError("写入音轨需要 PyAV")
+        if codec == "h264" and not fragmented and not h264_available():
+            print("[VideoIO] 未安装 PyAV 或 FFmpeg，h264 改用 OpenCV mp4v 编码")
+            codec = "mp4v"
+        self.path = path
+        self.width = int(width)
+        self.height = int(height)
+        self.fps = fps
+        self.codec = codec
+        self.threads = int(threads)
+        self.crf = crf
+        self.gop = int(gop)
+        self.fragmented = fragmented
+        self.audio_rate = int(audio_rate)
+        self.audio_channels = int(audio_channels)
+        self.frame_count = 0
+        self.audio_samples = 0
+        self._audio_stream = None
+
+        self._container = None
+        self._stream = None
+        self._proc = None
+        self._cv_writer = None
+
+        config = VIDEO_CODECS[codec]
+        self.pix_fmt = config["pix_fmt"]
+        # yuv420p 要求宽高为偶数：奇数尺寸补齐一行/列，保持浏览器可播放的像素格式
+        self.pad_even = self.pix_fmt == "yuv420p"
+        if self.pad_even:
+            self.width, self.height = even_size(self.width, self.height)
+
+        if codec == "mp4v":
+            self.backend = "cv2"
+            self._open_cv2()
+        elif AV_AVAILABLE:
+            self.backend = "av"
+            self._open_av(config["encoder"])
+        elif shutil.which("ffmpeg"):
+            self.backend = "ffmpeg"
+            self._open_ffmpeg(config["encoder"])
+        else:
+            raise RuntimeError(f"编码 {codec} 需要 PyAV 或 FFmpeg")
+
+    def _open_cv2(self):
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        self._cv_writer = cv2.VideoWriter(self.path, fourcc, self.fps, (self.width, self.height))
+        if not self._cv_writer.isOpened():
+            raise RuntimeError(f"无法创建视频文件: {self.path}")
+
+    def _open_av(self, encoder):
+        options = {"movflags": FRAGMENTED_MOVFLAGS} if self.fragmented else {}
+        self._container = av.open(self.path, mode="w", format="mp4" if self.fragmented else None, options=options)
+        stream = self._container.add_stream(encoder, rate=Fraction(self.fps).limit_denominator(1001))
+        stream.width = self.width
+        stream.height = self.height
+        stream.pix_fmt = self.pix_fmt
+        stream.codec_context.thread_count = self.threads
+        stream.codec_context.thread_type = "AUTO"
+        if self.gop:
+            stream.codec_context.gop_size = self.gop
+        if self.codec == "h264":
+            stream.options = {"crf": str(self.crf), "preset": "veryfast"}
+        self._stream = stream
+        if self.audio_rate:
+            layout = "mono" if self.audio_channels == 1 else "stereo"
+            self._audio_stream = self._container.add_stream("aac", rate=self.audio_rate, layout=layout)
+
+    def _open_ffmpeg(self, encoder):
+        cmd = [
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+            '-s', f'{self.width}x{self.height}', '-r', str(self.fps),
+            '-i', '-',
+            '-c:v', encoder, '-pix_fmt', self.pix_fmt,
+            '-threads', str(self.threads),
+        ]
+        if self.codec == "h264":
+            cmd.extend(['-crf', str(self.crf), '-preset', 'veryfast'])
+        if self.gop:
+            cmd.extend(['-g', str(self.gop)])
+        if self.fragmented:
+            cmd.extend(['-movflags', FRAGMENTED_MOVFLAGS, '-f', 'mp4'])
+        cmd.append(self.path)
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def write(self, frames):
+        """写入一块 RGB uint8 帧 [N,H,W,3]"""
+        if frames.ndim == 3:
+            frames = frames[np.newaxis, ...]
+        if self.pad_even:
+            frames = pad_to_even(frames)
+
+        if self.backend == "av":
+            for frame in frames:
+                video_frame = av.VideoFrame.from_ndarray(frame, format="rgb24")
+                for packet in self._stream.encode(video_frame):
+                    self._container.mux(packet)
+        elif self.backend == "ffmpeg":
+            self._proc.stdin.write(memoryview(np.ascontiguousarray(frames)))
+        else:
+            # 整块一次完成 RGB -> BGR
+            frames_bgr = np.ascontiguousarray(frames[..., ::-1])
+            for frame in frames_bgr:
+                self._cv_writer.write(frame)
+
+        self.frame_count += len(frames)
+
+    def write_audio(self, waveform):
+        """写入一段音频 [C,T] 浮点张量，声道数不一致时取前几个声道或复制单声道"""
+        if self._audio_stream is None:
+            raise RuntimeError("写入器未启用音轨")
+        waveform = waveform.detach().float().cpu()
+        if waveform.shape[0] < self.audio_channels:
+            waveform = waveform.expand(self.audio_channels, -1)
+        samples = np.ascontiguousarray(waveform[:self.audio_channels].numpy())
+        frame = av.AudioFrame.from_ndarray(samples, format="fltp",
+                                           layout="mono" if self.audio_channels == 1 else "stereo")
+        frame.sample_rate = self.audio_rate
+        frame.time_base = Fraction(1, self.audio_rate)
+        frame.pts = self.audio_samples
+        for packet in self._audio_stream.encode(frame):
+            self._container.mux(packet)
+        self.audio_samples += samples.shape[1]
+
+    def close(self):
+        if self.backend == "av" and self._container is not None:
+            for packet in self._stream.encode():
+                self._container.mux(packet)
+            if self._audio_stream is not None:
+                for packet in self._audio_stream.encode():
+                    self._container.mux(packet)
+            self._container.close()
+            self._container = None
+        elif self.backend == "ffmpeg" and self._proc is not None:
+            self._proc.stdin.close()
+            stderr = self._proc.stderr.read()
+            returncode = self._proc.wait()
+            self._proc = None
+            if returncode != 0:
+                raise RuntimeError(f"FFmpeg 编码错误:\n{stderr.decode(errors='replace')}")
+        elif self._cv_writer is not None:
+            self._cv_writer.release()
+            self._cv_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def encode_frames(frames, path, fps, codec=DEFAULT_CODEC, threads=0, chunk_size=DEFAULT_CHUNK_SIZE):
+    """将 [N,H,W,3] 浮点帧张量分块转换并编码到文件
+
+    每次只转换 chunk_size 帧，峰值内存与视频长度无关
+    """
+    if frames.ndim == 3:
+        frames = frames.unsqueeze(0)
+    num_frames, height, width = frames.shape[0], frames.shape[1], frames.shape[2]
+
+    # 编码器同步消费每一块，转换缓冲可以在块之间复用
+    buffer = UInt8Buffer()
+    with StreamingVideoWriter(path, width, height, fps, codec=codec, threads=threads) as writer:
+        for start in range(0, num_frames, chunk_size):
+            chunk = frames[start:start + chunk_size, ..., :3]
+            writer.write(buffer.convert(chunk))
+    return num_frames
+
+
+def _ffmpeg_rate(fps):
+    rate = Fraction(fps).limit_denominator(1001)
+    return f"{rate.numerator}/{rate.denominator}"
+
+
+def _plan_segments(num_frames, workers, gop):
+    """按 GOP 对齐切分 [0, num_frames)，返回 [(start, end), ...]"""
+    per_worker = -(-num_frames // workers)
+    length = max(gop, -(-per_worker // gop) * gop)
+    return [(start, min(start + length, num_frames)) for start in range(0, num_frames, length)]
+
+
+def _encode_segment(frames, path, fps, gop, crf, preset, threads, chunk_size):
+    """在 FFmpeg 子进程中编码一个片段，由调用线程分块转换并写入管道"""
+    width, height = even_size(frames.shape[2], frames.shape[1])
+    cmd = [
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+        '-s', f'{width}x{height}', '-r', _ffmpeg_rate(fps),
+        '-i', '-',
+        '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
+        '-crf', str(crf), '-preset', preset,
+        '-g', str(gop), '-x264-params', 'open-gop=0',
+        '-threads', str(threads),
+        path
+    ]
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    # stderr 在单独的线程中读取，避免管道写满后子进程阻塞
+    stderr = []
+    reader = threading.Thread(target=lambda: stderr.append(proc.stderr.read()), daemon=True)
+    reader.start()
+    buffer = UInt8Buffer()
+    try:
+        for start in range(0, frames.shape[0], chunk_size):
+            chunk = frames[start:start + chunk_size, ..., :3]
+            proc.stdin.write(memoryview(np.ascontiguousarray(pad_to_even(buffer.convert(chunk)))))
+    except BrokenPipeError:
+        pass
+    finally:
+        proc.stdin.close()
+        returncode = proc.wait()
+        reader.join()
+    if returncode != 0:
+        raise RuntimeError(f"FFmpeg 编码片段错误:\n{(stderr[0] if stderr else b'').decode(errors='replace')}")
+
+
+def encode_frames_chunked(frames, path, fps, workers=0, gop=0, crf=23, preset="medium",
+                          audio_path=None, metadata_path=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """把 [N,H,W,3] 浮点帧张量切成按 GOP 对齐的片段并行编码为 H.264，再无损拼接为一个 MP4
+
+    每个片段由一个 FFmpeg 子进程编码，各线程直接从同一个帧张量分块转换后写入对应子进程（不复制整段帧）。
+    片段都以 IDR 帧开始且编码参数相同，拼接时 -c copy 即可得到与单次编码相同结构的 H.264 码流。
+
+    Args:
+        workers: 并行编码的片段数，0 为按 CPU 核数自动选择
+        gop: 关键帧间隔（帧），0 为约 2 秒
+        audio_path: 可选的音频文件，拼接时编码为 AAC 并入
+        metadata_path: 可选的 FFMETADATA 文件，拼接时写入容器元数据
+
+    Returns:
+        片段数
+    """
+    if not shutil.which("ffmpeg"):
+        raise RuntimeError("分块编码需要 FFmpeg")
+    if frames.ndim == 3:
+        frames = frames.unsqueeze(0)
+    num_frames = frames.shape[0]
+    cpu_count = os.cpu_count() or 1
+    workers = workers or max(2, min(8, cpu_count // 4))
+    gop = gop or max(1, round(fps * 2))
+    segments = _plan_segments(num_frames, workers, gop)
+    threads = max(1, cpu_count // len(segments))
+
+    segment_dir = f"{path}.segments"
+    os.makedirs(segment_dir, exist_ok=True)
+    segment_paths = [os.path.join(segment_dir, f"{i:04d}.mp4") for i in range(len(segments))]
+    try:
+        errors = []
+
+        def run(index):
+            start, end = segments[index]
+            try:
+                _encode_segment(frames[start:end], segment_paths[index], fps, gop, crf, preset, threads, chunk_size)
+            except Exception as e:
+                errors.append(e)
+
+        encoders = [threading.Thread(target=run, args=(i,), daemon=True) for i in range(len(segments))]
+        for t in encoders:
+            t.start()
+        for t in encoders:
+            t.join()
+        if errors:
+            raise errors[0]
+
+        list_path = os.path.join(segment_dir, "list.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            for segment_path in segment_paths:
+                escaped_path = segment_path.replace("'", "'\\''")
+                f.write(f"file '{escaped_path}'\n")
+
+        cmd = ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_path]
+        maps = ['-map', '0:v']
+        next_input = 1
+        if audio_path:
+            cmd.extend(['-i', audio_path])
+            maps.extend(['-map', f'{next_input}:a'])
+            next_input += 1
+        if metadata_path:
+            cmd.extend(['-f', 'ffmetadata', '-i', metadata_path])
+            maps.extend(['-map_metadata', str(next_input)])
+        cmd.extend(maps + ['-c:v', 'copy'])
+        if audio_path:
+            cmd.extend(['-c:a', 'aac', '-b:a', '192k', '-shortest'])
+        # 自定义元数据键（prompt / workflow）需要 use_metadata_tags 才会写入 MP4
+        movflags = '+faststart+use_metadata_tags' if metadata_path else '+faststart'
+        cmd.extend(['-movflags', movflags, path])
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"FFmpeg 拼接片段错误:\n{result.stderr}")
+    finally:
+        shutil.rmtree(segment_dir, ignore_errors=True)
+    return len(segments)
+
+
+def build_concat_command(concat_file, output_file, reencode=False, audio_path=None, audio_mode="replace", audio_volume=1.0):
+    """生成单次 FFmpeg 拼接命令
+
+    输入 0 为 concat 列表，输入 1 为可选的音频文件：
+    - 无音频: 拼接（复制或重新编码）原有音视频流
+    - replace: 视频取自拼接结果，音频取自音频文件（可调音量）
+    - mix: 拼接结果的音频与音频文件 amix 后调整音量
+    """
+    cmd = ['ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', concat_file]
+    if audio_path:
+        cmd.extend(['-i', audio_path])
+
+    if reencode:
+        video_codec = ['-c:v', 'libx264', '-preset', 'medium', '-crf', '23']
+    else:
+        video_codec = ['-c:v', 'copy']
+    audio_codec = ['-c:a', 'aac', '-b:a', '128k']
+
+    if not audio_path:
+        if reencode:
+            cmd.extend(video_codec + audio_codec)
+        else:
+            cmd.extend(['-c', 'copy'])
+    else:
+        if audio_mode == "mix":
+            graph = f'[0:a][1:a]amix=inputs=2:duration=first:dropout_transition=2,volume={audio_volume}[a]'
+        elif audio_volume != 1.0:
+            graph = f'[1:a]volume={audio_volume}[a]'
+        else:
+            graph = None
+        if graph:
+            cmd.extend(['-filter_complex', graph, '-map', '0:v', '-map', '[a]'])
+        else:
+            cmd.extend(['-map', '0:v', '-map', '1:a'])
+        cmd.extend(video_codec + audio_codec + ['-shortest'])
+
+    cmd.extend(['-movflags', '+faststart', output_file])
+    return cmd
+
+
+class _FrameBuffer:
+    """预分配的 [N,H,W,3] float32 输出缓冲，帧数估计不足时按比例扩容"""
+
+    def __init__(self, count, height, width):
+        self.height = height
+        self.width = width
+        self.tensor = torch.empty((max(1, count), height, width, 3), dtype=torch.float32)
+        self.array = self.tensor.numpy()
+        self.length = 0
+
+    def put(self, frame_rgb):
+        """写入一帧 RGB uint8（可以是非连续视图），在写入时完成归一化"""
+        if self.length >= self.tensor.shape[0]:
+            grown = torch.empty((int(self.tensor.shape[0] * 1.25) + 1, self.height, self.width, 3), dtype=torch.float32)
+            grown[:self.length] = self.tensor[:self.length]
+            self.tensor = grown
+            self.array = grown.numpy()
+        np.divide(frame_rgb, np.float32(255.0), out=self.array[self.length], dtype=np.float32)
+        self.length += 1
+
+    def result(self):
+        if self.length == 0:
+            return None
+        if self.length == self.tensor.shape[0]:
+            return self.tensor
+        if self.length < self.tensor.shape[0] // 2:
+            # 帧数估计严重偏大时释放多余空间
+            return self.tensor[:self.length].clone()
+        return self.tensor[:self.length]
+
+
+def _probe_av_stream(stream):
+    fps = float(stream.average_rate) if stream.average_rate else 0.0
+    count = stream.frames
+    if not count and stream.duration and stream.time_base and fps:
+        count = int(stream.duration * stream.time_base * fps + 0.5)
+    return int(count or 0), stream.codec_context.width, stream.codec_context.height, fps
+
+
+def probe_video(path):
+    """获取视频的 (帧数, 宽, 高, 帧率)，帧数可能是容器给出的估计值"""
+    if AV_AVAILABLE:
+        with av.open(path) as container:
+            return _probe_av_stream(container.streams.video[0])
+
+    cap = cv2.VideoCapture(path)
+    try:
+        count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = float(cap.get(cv2.CAP_PROP_FPS))
+    finally:
+        cap.release()
+    return max(0, count), width, height, fps
+
+
+class FrameSelection:
+    """要解码的帧范围：从 start 开始每隔 stride 取一帧，最多 count 帧（0 表示直到结尾）"""
+
+    def __init__(self, start=0, count=0, stride=1, width=0, height=0):
+        self.start = max(0, int(start))
+        self.count = max(0, int(count))
+        self.stride = max(1, int(stride))
+        self.width = max(0, int(width))
+        self.height = max(0, int(height))
+
+    def estimate(self, total):
+        """根据总帧数估计输出帧数"""
+        available = max(0, (total - self.start + self.stride - 1) // self.stride) if total else 0
+        if self.count:
+            return min(self.count, available) if available else self.count
+        return available
+
+    def output_size(self, width, height):
+        """计算输出尺寸，只指定宽或高时保持宽高比"""
+        if self.width and self.height:
+            return self.width, self.height
+        if self.width:
+            return self.width, max(1, round(height * self.width / width))
+        if self.height:
+            return max(1, round(width * self.height / height)), self.height
+        return width, height
+
+
+_keyframe_cache = OrderedDict()
+_keyframe_cache_lock = threading.Lock()
+_KEYFRAME_CACHE_SIZE = 64
+
+
+def _frame_index(pts, start_pts, time_base, fps):
+    return int(round(float((pts - start_pts) * time_base) * fps))
+
+
+def get_keyframe_index(path):
+    """获取视频的关键帧索引（只解封装不解码），按 路径/修改时间/大小 缓存
+
+    Returns:
+        {"frames": [关键帧序号...], "pts": [对应 pts...]}；无法建立时返回 None
+    """
+    if not AV_AVAILABLE:
+        return None
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _keyframe_cache_lock:
+        if key in _keyframe_cache:
+            _keyframe_cache.move_to_end(key)
+            return _keyframe_cache[key]
+
+    with av.open(path) as container:
+        stream = container.streams.video[0]
+        fps = float(stream.average_rate) if stream.average_rate else 0.0
+        if not fps or stream.time_base is None:
+            return None
+        start_pts = stream.start_time or 0
+        keyframes = []
+        for packet in container.demux(stream):
+            if packet.pts is not None and packet.is_keyframe:
+                keyframes.append((_frame_index(packet.pts, start_pts, stream.time_base, fps), packet.pts))
+    keyframes.sort()
+    index = {"frames": [k[0] for k in keyframes], "pts": [k[1] for k in keyframes]}
+
+    with _keyframe_cache_lock:
+        _keyframe_cache[key] = index
+        while len(_keyframe_cache) > _KEYFRAME_CACHE_SIZE:
+            _keyframe_cache.popitem(last=False)
+    return index
+
+
+def _keyframe_before(index, frame):
+    """返回不晚于 frame 的最近关键帧 (序号, pts)"""
+    if not index or not index["frames"]:
+        return None
+    pos = bisect.bisect_right(index["frames"], frame) - 1
+    if pos < 0:
+        return None
+    return index["frames"][pos], index["pts"][pos]
+
+
+def _read_av(path, threads, selection):
+    index = get_keyframe_index(path) if (selection.start or selection.stride > 1) else None
+
+    with av.open(path) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        stream.codec_context.thread_count = threads
+        total, width, height, fps = _probe_av_stream(stream)
+        out_width, out_height = selection.output_size(width, height)
+        resize = (out_width, out_height) != (width, height)
+        buffer = _FrameBuffer(selection.estimate(total), out_height, out_width)
+
+        start_pts = stream.start_time or 0
+        time_base = stream.time_base
+        target = selection.start
+        position = -1
+        seek_to = _keyframe_before(index, target) if target else None
+
+        while True:
+            if seek_to is not None:
+                container.seek(int(seek_to[1]), stream=stream, backward=True, any_frame=False)
+                position = seek_to[0] - 1
+            seek_to = None
+
+            for frame in container.decode(stream):
+                if frame.pts is not None and fps and time_base is not None:
+                    position = _frame_index(frame.pts, start_pts, time_base, fps)
+                else:
+                    position += 1
+                # 目标之前的帧只解码（参考帧需要），不做颜色转换
+                if position < target:
+                    continue
+
+                if resize:
+                    frame = frame.reformat(width=out_width, height=out_height, format="rgb24")
+                buffer.put(frame.to_ndarray(format="rgb24"))
+                if selection.count and buffer.length >= selection.count:
+                    return buffer.result()
+
+                target = position + selection.stride
+                # 下一目标之前存在更近的关键帧时直接跳转，跳过中间帧的解码
+                keyframe = _keyframe_before(index, target)
+                if keyframe is not None and keyframe[0] > position + 1:
+                    seek_to = keyframe
+                    break
+            else:
+                break
+        return buffer.result()
+
+
+def _open_capture(path, threads):
+    if hasattr(cv2, "CAP_PROP_N_THREADS"):
+        try:
+            cap = cv2.VideoCapture(path, cv2.CAP_FFMPEG, [cv2.CAP_PROP_N_THREADS, threads])
+            if cap.isOpened():
+                return cap
+        except cv2.error:
+            pass
+    return cv2.VideoCapture(path)
+
+
+def _read_cv2(path, threads, selection):
+    cap = _open_capture(path, threads)
+    if not cap.isOpened():
+        raise RuntimeError(f"无法打开视频: {path}")
+
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    out_width, out_height = selection.output_size(width, height)
+    resize = (out_width, out_height) != (width, height)
+    buffer = _FrameBuffer(selection.estimate(total), out_height, out_width)
+
+    if selection.start:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, selection.start)
+
+    # 解码线程与转换并行（cv2 解码时会释放 GIL），队列有界以限制内存
+    frames = queue.Queue(maxsize=8)
+    stop = threading.Event()
+
+    def producer():
+        try:
+            produced = 0
+            while not stop.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frames.put(frame)
+                produced += 1
+                if selection.count and produced >= selection.count:
+                    break
+                # 步长之间的帧只 grab（解码但不取回），省去颜色转换
+                for _ in range(selection.stride - 1):
+                    if not cap.grab():
+                        return
+        finally:
+            frames.put(None)
+
+    thread = threading.Thread(target=producer, daemon=True)
+    thread.start()
+    try:
+        while True:
+            frame = frames.get()
+            if frame is None:
+                break
+            if resize:
+                frame = cv2.resize(frame, (out_width, out_height), interpolation=cv2.INTER_AREA)
+            # BGR -> RGB 通过反向视图完成，直接写入目标位置
+            buffer.put(frame[..., ::-1])
+    finally:
+        stop.set()
+        while thread.is_alive():
+            try:
+                frames.get_nowait()
+            except queue.Empty:
+                thread.join(timeout=0.05)
+        cap.release()
+    return buffer.result()
+
+
+def read_video_frames(path, threads=0, start_frame=0, frame_count=0, stride=1, width=0, height=0):
+    """解码视频为 [N,H,W,3] float32 张量，峰值内存约为最终张量大小
+
+    Args:
+        start_frame: 起始帧序号
+        frame_count: 输出帧数，0 表示直到结尾
+        stride: 帧间隔
+        width/height: 输出尺寸，0 表示保持原尺寸（只指定一个时保持宽高比）
+
+    Returns:
+        帧张量；没有可解码的帧时返回 None
+    """
+    selection = FrameSelection(start_frame, frame_count, stride, width, height)
+    if AV_AVAILABLE:
+        try:
+            return _read_av(path, threads, selection)
+        except Exception as e:
+            print(f"[VideoIO] PyAV 解码失败，改用 OpenCV: {e}")
+    return _read_cv2(path, threads, selection)
@@ -0,0 +1,184 @@
+"""
+接收端预热缓存
+LG_ImageSender 写出 PNG 时把内存中的图像张量登记到缓存；LG_VideoSender 写出视频后在后台解码，
+接收端执行时直接取用，解码不再发生在两个组执行之间的关键路径上。
+1. 按 (类型, 路径, mtime, 文件大小) 索引，文件被覆盖后自动失效
+2. 登记或开始后台解码前已知（预估）张量大小，单个超出预算的值不会进入缓存；按总字节数做 LRU 淘汰，
+   后台解码中的条目预先占用预算，不会被淘汰
+3. LG_WARM_CACHE_MB=0 时关闭预热
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+DEFAULT_BUDGET = int(float(os.environ.get("LG_WARM_CACHE_MB", 2048)) * 1024 * 1024)
+WARM_WORKERS = 1
+
+
+def _tensor_bytes(value):
+    if isinstance(value, torch.Tensor):
+        return value.nbytes
+    if isinstance(value, (list, tuple)):
+        return sum(_tensor_bytes(v) for v in value)
+    return 0
+
+
+def _pending(entry):
+    return entry["done"] is not None and not entry["done"].is_set()
+
+
+def _file_key(kind, path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (kind, path, stat.st_mtime_ns, stat.st_size)
+
+
+class WarmCache:
+    """按字节预算淘汰的已解码张量缓存，线程安全"""
+
+    def __init__(self, budget=DEFAULT_BUDGET):
+        self.lock = threading.Lock()
+        self.budget = budget
+        # key -> {"value", "bytes", "done"}，done 为未触发的 Event 时表示仍在后台解码
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._pool = None
+
+    def put(self, kind, path, value):
+        """登记 path 对应的已解码值（张量或张量元组），登记后调用方不得再修改这些张量
+
+        Args:
+            kind: 缓存分区（如 "image"）
+            path: 已写出的文件路径
+            value: 与接收端解码该文件得到的结果相同的值
+        """
+        nbytes = _tensor_bytes(value)
+        if self.budget <= 0 or nbytes > self.budget:
+            return
+        key = _file_key(kind, path)
+        if key is None:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old["bytes"]
+            self.entries[key] = {"value": value, "bytes": nbytes, "done": None}
+            self.total_bytes += nbytes
+            self._evict(keep=key)
+            if self.total_bytes > self.budget:
+                self._drop(key)
+
+    def warm(self, kind, path, loader, nbytes):
+        """在后台解码 path，预估大小放不进预算时不解码
+
+        Args:
+            kind: 缓存分区（如 "video"）
+            path: 已写出的文件路径
+            loader: loader(path) -> 张量，返回 None 表示没有可用结果
+            nbytes: 解码结果的预估字节数，解码完成后按实际大小修正
+        Returns:
+            是否开始了后台解码
+        """
+        if self.budget <= 0 or nbytes > self.budget:
+            return False
+        key = _file_key(kind, path)
+        if key is None:
+            return False
+        with self.lock:
+            if key in self.entries:
+                return False
+            self.total_bytes += nbytes
+            self._evict()
+            if self.total_bytes > self.budget:
+                # 其余空间被解码中的条目占用
+                self.total_bytes -= nbytes
+                return False
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=WARM_WORKERS, thread_name_prefix="lg_warm")
+            entry = {"value": None, "bytes": nbytes, "done": threading.Event()}
+            self.entries[key] = entry
+            self._pool.submit(self._load, key, entry, loader, path)
+        return True
+
+    def _load(self, key, entry, loader, path):
+        try:
+            value = loader(path)
+        except Exception as e:
+            print(f"[WarmCache] 预热 {os.path.basename(path)} 失败: {e}")
+            value = None
+        with self.lock:
+            try:
+                if self.entries.get(key) is not entry:
+                    return
+                if value is None:
+                    self._drop(key)
+                    return
+                nbytes = _tensor_bytes(value)
+                self.total_bytes += nbytes - entry["bytes"]
+                entry.update(value=value, bytes=nbytes)
+                self._evict(keep=key)
+                if self.total_bytes > self.budget:
+                    # 实际大小超出预估且放不进预算
+                    self._drop(key)
+            finally:
+                entry["done"].set()
+
+    def _evict(self, keep=None):
+        """从最久未使用的已完成条目开始淘汰，直到总字节数不超过预算；调用方需持有锁"""
+        for old_key in list(self.entries):
+            if self.total_bytes <= self.budget:
+                break
+            if old_key != keep and not _pending(self.entries[old_key]):
+                self._drop(old_key)
+
+    def _drop(self, key):
+        entry = self.entries.pop(key)
+        self.total_bytes -= entry["bytes"]
+
+    def get(self, kind, path):
+        """返回缓存的值（共享对象，调用方需复制后再交给下游），未缓存时返回 None；
+        仍在后台解码时等待解码完成
+        """
+        key = _file_key(kind, path)
+        with self.lock:
+            entry = self.entries.get(key) if key is not None else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+        if entry["done"] is not None:
+            entry["done"].wait()
+        with self.lock:
+            if entry["value"] is None or self.entries.get(key) is not entry:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry["value"]
+
+    def clear(self):
+        with self.lock:
+            # 解码中的条目保留，完成后按正常流程登记
+            for key in [k for k, e in self.entries.items() if not _pending(e)]:
+                self._drop(key)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "budget": self.budget,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# 全局预热缓存实例
+warm_cache = WarmCache()
@@ -0,0 +1,115 @@
+"""
+发送端事件投递
+img-send / video-send / string-send / value-send-accumulate 等事件：
+1. 只发给提交当前 prompt 的客户端（不存在时回退为广播）
+2. 同一次执行中多个发送节点的事件先合并（同一 link_id 的累积事件只追加新条目），
+   在 prompt 结束（execution_success / execution_error / execution_interrupted）时统一发出，
+   保证前端收到结束事件前已收到全部发送端事件
+3. 执行时间较长时，待发送的事件超过 FLUSH_WINDOW 秒后随下一条服务端消息（节点开始、进度等）发出
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from server import PromptServer
+
+# 合并窗口（秒）：最早一条待发送事件超过该时长后不再等待 prompt 结束
+FLUSH_WINDOW = 0.5
+# prompt 结束时发出的事件
+END_EVENTS = ("execution_success", "execution_error", "execution_interrupted")
+
+_lock = threading.Lock()
+# (event, link_id, targets) -> 待发送的合并负载
+_pending = OrderedDict()
+# 最早一条待发送事件的时间
+_pending_since = None
+# 安装钩子前的 send_sync，事件经由它发出
+_send_sync = None
+
+
+def _targets():
+    """返回目标客户端元组，None 表示广播"""
+    owner = getattr(PromptServer.instance, "client_id", None)
+    return (owner,) if owner else None
+
+
+def send(event, payload, list_key):
+    """合并事件，等待 prompt 结束或合并窗口到期后发送
+
+    Args:
+        event: 事件名
+        payload: 包含 link_id 的负载；payload["delta"] 为 True 时 list_key 中的条目追加到待发送的负载，
+                 否则替换之前尚未发送的负载
+        list_key: 条目列表所在的字段名（images / videos / strings / values）
+    """
+    global _pending_since
+    link_id = payload.get("link_id")
+    with _lock:
+        key = (event, link_id, _targets())
+        pending = _pending.get(key)
+        if pending is None or not payload.get("delta"):
+            pending = dict(payload)
+            pending[list_key] = list(payload.get(list_key) or [])
+            _pending[key] = pending
+        else:
+            items = pending[list_key]
+            items.extend(payload.get(list_key) or [])
+            pending.update({k: v for k, v in payload.items() if k not in (list_key, "delta")})
+        if _pending_since is None:
+            _pending_since = time.monotonic()
+    if _send_sync is None:
+        # 未挂接 send_sync 时无法得知 prompt 何时结束，直接发出
+        flush()
+
+
+def flush():
+    """发出所有待发送的事件"""
+    global _pending_since
+    with _lock:
+        batch = list(_pending.items())
+        _pending.clear()
+        _pending_since = None
+    send_sync = _send_sync or PromptServer.instance.send_sync
+    for (event, _, targets), payload in batch:
+        try:
+            if targets is None:
+                send_sync(event, payload)
+            else:
+                for client_id in targets:
+                    send_sync(event, payload, client_id)
+        except Exception as e:
+            print(f"[Delivery] 发送 {event} 事件失败: {e}")
+
+
+def _due(event, data):
+    if _pending_since is None:
+        return False
+    if event in END_EVENTS:
+        return True
+    # 旧版前端以 node 为空的 executing 事件表示执行结束
+    if event == "executing" and isinstance(data, dict) and data.get("node") is None:
+        return True
+    return time.monotonic() - _pending_since >= FLUSH_WINDOW
+
+
+def install(server=None):
+    """挂接 send_sync：服务端发出其他消息前先检查是否需要发出待发送的事件"""
+    global _send_sync
+    server = server or PromptServer.instance
+    if _send_sync is not None:
+        return
+    _send_sync = server.send_sync
+
+    def send_sync(event, data, sid=None):
+        if _due(event, data):
+            flush()
+        _send_sync(event, data, sid)
+
+    server.send_sync = send_sync
+
+
+try:
+    install()
+except Exception as e:
+    print(f"[Delivery] 挂接事件投递失败，发送端事件将直接发出: {e}")
@@ -0,0 +1,30 @@
+"""
+测试共用设置
+py/ 目录与 pytest 依赖的 py 模块同名，这里把它注册为 lg_py 包，测试统一从 lg_py 导入被测模块。
+"""
+
+import os
+import sys
+import types
+
+import pytest
+
+PY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "py")
+
+if "lg_py" not in sys.modules:
+    _package = types.ModuleType("lg_py")
+    _package.__path__ = [PY_DIR]
+    sys.modules["lg_py"] = _package
+
+
+@pytest.fixture
+def temp_directory(tmp_path, monkeypatch):
+    """把 folder_paths 的临时目录指向 tmp_path；不在 ComfyUI 环境中时提供只含目录函数的 folder_paths"""
+    try:
+        import folder_paths
+    except ImportError:
+        folder_paths = types.ModuleType("folder_paths")
+        sys.modules["folder_paths"] = folder_paths
+    monkeypatch.setattr(folder_paths, "get_temp_directory", lambda: str(tmp_path), raising=False)
+    monkeypatch.setattr(folder_paths, "get_output_directory", lambda: str(tmp_path), raising=False)
+    return tmp_path
@@ -0,0 +1,57 @@
+import os
+
+from lg_py.artifacts import ArtifactManager
+
+
+def write(path, size):
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    return str(path)
+
+
+def test_hard_links_counted_once(tmp_path):
+    manager = ArtifactManager(max_bytes=10_000, max_age=0)
+    first = write(tmp_path / "a.png", 1000)
+    manager.register("image:1", first, content_key="k.png")
+    second = str(tmp_path / "b.png")
+    assert manager.materialize("k.png", second)
+    manager.register("image:2", second, content_key="k.png")
+    assert manager.total_bytes == 1000
+
+    manager.register("image:2", second)
+    assert manager.total_bytes == 1000
+
+
+def test_quota_frees_bytes_only_with_last_link(tmp_path):
+    manager = ArtifactManager(max_bytes=10_000, max_age=0)
+    first = write(tmp_path / "a.png", 1000)
+    manager.register("image:1", first, content_key="k.png")
+    second = str(tmp_path / "b.png")
+    manager.materialize("k.png", second)
+    manager.register("image:2", second, content_key="k.png")
+    manager.set_live("image:2", [second])
+
+    manager.max_bytes = 500
+    manager.collect()
+    # 未被固定的链接被回收，但文件仍由另一个链接持有
+    assert not os.path.exists(first)
+    assert manager.total_bytes == 1000
+    assert manager.contents["k.png"] == second
+    assert manager.materialize("k.png", str(tmp_path / "c.png"))
+
+    manager.set_live("image:2", [])
+    manager.collect()
+    assert manager.total_bytes == 0
+    assert manager.evicted_bytes == 1000
+
+
+def test_quota_not_exceeded_by_links(tmp_path):
+    manager = ArtifactManager(max_bytes=1500, max_age=0)
+    first = write(tmp_path / "a.png", 1000)
+    manager.register("image:1", first, content_key="k.png")
+    for name in ("b.png", "c.png", "d.png"):
+        path = str(tmp_path / name)
+        manager.materialize("k.png", path)
+        manager.register("image:1", path, content_key="k.png")
+    assert manager.evicted_count == 0
+    assert all(os.path.exists(tmp_path / name) for name in ("a.png", "b.png", "c.png", "d.png"))
@@ -0,0 +1,39 @@
+from lg_py.video_io import build_concat_command
+
+
+def test_copy_without_audio():
+    cmd = build_concat_command("list.txt", "out.mp4")
+    assert cmd == ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", "list.txt",
+                   "-c", "copy", "-movflags", "+faststart", "out.mp4"]
+
+
+def test_reencode_without_audio():
+    cmd = build_concat_command("list.txt", "out.mp4", reencode=True)
+    assert cmd[cmd.index("-c:v") + 1] == "libx264"
+    assert cmd[cmd.index("-c:a") + 1] == "aac"
+    assert cmd.count("-i") == 1
+
+
+def test_replace_audio_is_single_pass():
+    cmd = build_concat_command("list.txt", "out.mp4", audio_path="a.wav")
+    assert cmd.count("-i") == 2
+    assert cmd[cmd.index("-i", cmd.index("-i") + 1) + 1] == "a.wav"
+    assert "-filter_complex" not in cmd
+    assert cmd[cmd.index("-c:v") + 1] == "copy"
+    assert ["-map", "0:v", "-map", "1:a"] == cmd[cmd.index("-map"):cmd.index("-map") + 4]
+    assert "-shortest" in cmd and cmd[-1] == "out.mp4"
+
+
+def test_replace_audio_with_volume():
+    cmd = build_concat_command("list.txt", "out.mp4", audio_path="a.wav", audio_volume=0.5)
+    assert cmd[cmd.index("-filter_complex") + 1] == "[1:a]volume=0.5[a]"
+    assert "[a]" in cmd
+
+
+def test_mix_audio():
+    cmd = build_concat_command("list.txt", "out.mp4", reencode=True, audio_path="a.wav",
+                               audio_mode="mix", audio_volume=2.0)
+    graph = cmd[cmd.index("-filter_complex") + 1]
+    assert graph.startswith("[0:a][1:a]amix=inputs=2:duration=first")
+    assert graph.endswith("volume=2.0[a]")
+    assert cmd[cmd.index("-c:v") + 1] == "libx264"
@@ -0,0 +1,48 @@
+import numpy as np
+import torch
+
+from lg_py.fingerprint import FULL_HASH_MAX_BYTES, fingerprint
+
+
+def test_equal_content_equal_fingerprint():
+    t = torch.rand(2, 8, 8, 3)
+    assert fingerprint(t) == fingerprint(t.clone())
+    assert fingerprint(t, "a", 1) == fingerprint(t.clone(), "a", 1)
+
+
+def test_shape_and_dtype_are_part_of_fingerprint():
+    t = torch.zeros(4, 4)
+    assert fingerprint(t) != fingerprint(t.reshape(2, 8))
+    assert fingerprint(t) != fingerprint(t.double())
+
+
+def test_small_tensor_change_detected():
+    t = torch.zeros(16, 16)
+    changed = t.clone()
+    changed[7, 3] = 1.0
+    assert fingerprint(t) != fingerprint(changed)
+
+
+def test_full_mode_detects_change_missed_by_sampling():
+    elements = FULL_HASH_MAX_BYTES // 4 * 2
+    t = torch.zeros(elements)
+    changed = t.clone()
+    # 抽样步长为 2 以上，奇数位置不会被采样
+    changed[1] = 1.0
+    assert fingerprint(t) == fingerprint(changed)
+    assert fingerprint(t, full=True) != fingerprint(changed, full=True)
+
+
+def test_non_contiguous_tensor_matches_contiguous_copy():
+    t = torch.rand(8, 6).t()
+    assert not t.is_contiguous()
+    assert fingerprint(t) == fingerprint(t.contiguous())
+
+
+def test_numpy_containers_and_scalars():
+    a = np.arange(12, dtype=np.uint8).reshape(3, 4)
+    assert fingerprint(a) == fingerprint(a.copy())
+    assert fingerprint(a) != fingerprint(a.astype(np.int16))
+    assert fingerprint({"b": 1, "a": [1, 2]}) == fingerprint({"a": [1, 2], "b": 1})
+    assert fingerprint(1) != fingerprint("1")
+    assert fingerprint(None) != fingerprint("None")
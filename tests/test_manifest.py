@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+
+@pytest.fixture
+def manifest(temp_directory):
+    from lg_py import manifest
+    manifest.manifest_store.cache.clear()
+    return manifest
+
+
+def items(*names):
+    return [{"filename": name} for name in names]
+
+
+def test_parse_reference(manifest):
+    assert manifest.parse_reference("abc@3") == ("abc", 3)
+    assert manifest.parse_reference("abc") == ("abc", None)
+    with pytest.raises(ValueError):
+        manifest.parse_reference("abc@x")
+
+
+def test_accumulating_sender_appends_to_one_file(manifest, temp_directory):
+    sender = manifest.SenderManifest("image")
+    sent = []
+    refs = []
+    for name in "abcd":
+        sent.append({"filename": name})
+        refs.append(sender.publish(7, [sent[-1]], list(sent), accumulate=True))
+
+    ids = {ref.partition("@")[0] for ref in refs}
+    assert len(ids) == 1
+    assert [ref.partition("@")[2] for ref in refs] == ["1", "2", "3", "4"]
+    assert os.listdir(temp_directory / "lg_manifests") == [f"{ids.pop()}.jsonl"]
+
+    # 较早的引用只看到当时的前 count 个条目
+    assert manifest.resolve_items(f"manifest:{refs[1]}") == items("a", "b")
+    assert manifest.resolve_items(f"manifest:{refs[3]}") == items("a", "b", "c", "d")
+
+
+def test_non_accumulating_sender_creates_new_manifest(manifest):
+    sender = manifest.SenderManifest("video")
+    first = sender.publish(1, items("a"), items("a"), accumulate=False)
+    second = sender.publish(1, items("b"), items("b"), accumulate=False)
+    assert first.partition("@")[0] != second.partition("@")[0]
+    assert manifest.resolve_items(f"manifest:{second}") == items("b")
+
+
+def test_link_change_starts_new_manifest(manifest):
+    sender = manifest.SenderManifest("image")
+    first = sender.publish(1, items("a"), items("a"), accumulate=True)
+    second = sender.publish(2, items("b"), items("a", "b"), accumulate=True)
+    assert first.partition("@")[0] != second.partition("@")[0]
+    assert manifest.resolve_items(f"manifest:{second}") == items("a", "b")
+
+
+def test_load_reads_only_appended_lines(manifest):
+    store = manifest.manifest_store
+    manifest_id = store.create("string", 3, items("a"))
+    store.cache.clear()
+    assert store.load(manifest_id, 1)["items"] == items("a")
+
+    # 半行（写入中途）留到下次读取
+    with open(store.path(manifest_id), "ab") as f:
+        f.write(b'{"filename":"b"}\n{"filename":')
+    assert store.load(manifest_id, 3)["items"] == items("a", "b")
+    with open(store.path(manifest_id), "ab") as f:
+        f.write(b'"c"}\n')
+    assert store.load(manifest_id, 3)["items"] == items("a", "b", "c")
+
+
+def test_resolve_items_selection_and_plain_names(manifest):
+    manifest_id = manifest.manifest_store.create("image", 0, items("a", "b", "c", "d"))
+    assert manifest.resolve_items(f"manifest:{manifest_id}", "1:3") == items("b", "c")
+    assert manifest.resolve_items(f"manifest:{manifest_id}@2", "-1") == items("b")
+    assert manifest.resolve_items("x.png, y.png") == items("x.png", "y.png")
+
+
+def test_resolve_items_bad_references(manifest):
+    assert manifest.resolve_items("manifest:missing@1") == []
+    assert manifest.resolve_items("manifest:abc@x") == []
+    manifest_id = manifest.manifest_store.create("image", 0, items("a"))
+    assert manifest.resolve_items(f"manifest:{manifest_id}", "1:x") == []
+
+
+def test_append_after_cache_eviction(manifest):
+    store = manifest.manifest_store
+    sender = manifest.SenderManifest("image")
+    first = sender.publish(5, items("a"), items("a"), accumulate=True)
+    # 其他发送端的清单把它挤出 LRU 缓存
+    for _ in range(manifest._CACHE_SIZE + 1):
+        store.create("image", 0, items("x"))
+    assert first.partition("@")[0] not in store.cache
+
+    second = sender.publish(5, items("b"), items("a", "b"), accumulate=True)
+    assert second.partition("@")[0] == first.partition("@")[0]
+    assert second.endswith("@2")
+    store.cache.clear()
+    assert manifest.resolve_items(f"manifest:{second}") == items("a", "b")
+
+
+def test_publish_recreates_collected_manifest(manifest):
+    store = manifest.manifest_store
+    sender = manifest.SenderManifest("image")
+    first = sender.publish(5, items("a"), items("a"), accumulate=True)
+    manifest_id = first.partition("@")[0]
+    store.cache.clear()
+    os.remove(store.path(manifest_id))
+
+    second = sender.publish(5, items("b"), items("a", "b"), accumulate=True)
+    assert second.partition("@")[0] != manifest_id
+    assert manifest.resolve_items(f"manifest:{second}") == items("a", "b")
@@ -0,0 +1,59 @@
+import pytest
+import torch
+
+from lg_py.selector import compile_selector
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("", [0, 1, 2, 3, 4, 5, 6, 7, 8, 9]),
+    ("3", [3]),
+    ("-1", [9]),
+    ("2:5", [2, 3, 4]),
+    ("-3:", [7, 8, 9]),
+    ("::4", [0, 4, 8]),
+    ("every 4", [0, 4, 8]),
+    ("every 4 from 1", [1, 5, 9]),
+    ("EVERY 3 FROM -4", [6, 9]),
+    ("0, -1, 2:4", [0, 9, 2, 3]),
+    ("::-3", [9, 6, 3, 0]),
+    ("12, 1", [1]),
+])
+def test_indices(text, expected):
+    assert compile_selector(text).indices(10) == expected
+
+
+@pytest.mark.parametrize("text", ["1:2:3:4", "::0", "every 0", "x", "every"])
+def test_invalid_expressions(text):
+    with pytest.raises(ValueError):
+        compile_selector(text)
+
+
+def test_compiled_selector_is_cached():
+    assert compile_selector("1:3") is compile_selector("1:3")
+
+
+def test_single_forward_slice_is_a_view():
+    batch = torch.arange(24, dtype=torch.float32).reshape(6, 4)
+    selected = compile_selector("1::2").select_batch(batch)
+    assert selected.data_ptr() == batch[1].data_ptr()
+    assert torch.equal(selected, batch[1::2])
+
+
+def test_other_selections_use_index_select():
+    batch = torch.arange(24, dtype=torch.float32).reshape(6, 4)
+    selector = compile_selector("-1, 0")
+    assert not selector.is_view
+    assert torch.equal(selector.select_batch(batch), batch[[5, 0]])
+    assert not compile_selector("::-1").is_view
+
+
+def test_split_batch_keeps_batch_dimension():
+    batch = torch.rand(5, 2, 2, 3)
+    parts = compile_selector("every 2").split_batch(batch)
+    assert [p.shape for p in parts] == [torch.Size([1, 2, 2, 3])] * 3
+    assert parts[1].data_ptr() == batch[2].data_ptr()
+
+
+def test_select_list():
+    assert compile_selector("1, -1").select_list(["a", "b", "c"]) == ["b", "c"]
+    assert compile_selector("5").select_list([]) == []
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from conftest import PY_DIR
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="检查 /dev/shm 中遗留的共享内存段")
+
+# 在子进程中运行：映射被提前关闭时读取旧张量会直接导致段错误
+SCRIPT = textwrap.dedent("""
+    import sys, types
+    package = types.ModuleType("lg_py")
+    package.__path__ = [sys.argv[1]]
+    sys.modules["lg_py"] = package
+
+    import gc
+    import torch
+    from lg_py import shm_transport
+
+    shm_transport.publish(1, [("images", torch.ones(64, 64, 3))])
+    generation, old = shm_transport.attach(1)
+    names = [item["segment"] for item in shm_transport._read_json(shm_transport._gen_path(generation))["items"]]
+    shm_transport.publish(1, [("images", torch.zeros(64, 64, 3))])
+    _, new = shm_transport.attach(1)
+    old_view = old[0][1][:1]
+    del old
+    gc.collect()
+    print(float(old_view.sum()), float(new[0][1].sum()))
+    print(" ".join(names))
+""")
+
+
+def test_old_tensor_survives_republish(tmp_path):
+    env = dict(os.environ, LG_SHM_DIR=str(tmp_path))
+    result = subprocess.run([sys.executable, "-c", SCRIPT, PY_DIR], env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    sums, names = result.stdout.strip().splitlines()
+    assert sums == f"{64 * 3.0} 0.0"
+    # 旧代被替换且引用已撤销，段名在 attach 新代时就被删除
+    if os.path.isdir("/dev/shm"):
+        for name in names.split():
+            assert not os.path.exists(os.path.join("/dev/shm", name))
@@ -0,0 +1,159 @@
+import numpy as np
+import pytest
+import torch
+
+from lg_py.value_store import SKIP, ValueAccumulator, ValueStore, is_handle
+
+
+@pytest.fixture
+def store():
+    return ValueStore()
+
+
+def test_round_trip_returns_fresh_objects(store):
+    value = {"a": torch.rand(2, 3), "b": [1, "x"]}
+    handle = store.put(1, value)
+    assert is_handle(handle)
+    first, second = store.get(handle), store.get(handle)
+    assert torch.equal(first["a"], value["a"]) and first["b"] == value["b"]
+    assert first["a"] is not second["a"]
+
+
+def test_same_content_reuses_handle_and_bytes(store):
+    tensor = torch.rand(4, 4)
+    handle = store.put(1, tensor)
+    data = store.values[1][handle]
+    assert store.put(1, tensor.clone()) == handle
+    assert store.values[1][handle] is data
+    assert len(store.values[1]) == 1
+
+
+def test_different_content_or_link_gets_new_handle(store):
+    tensor = torch.zeros(3)
+    handle = store.put(1, tensor)
+    assert store.put(1, torch.ones(3)) != handle
+    assert store.put(2, tensor) != handle
+
+
+@pytest.mark.parametrize("a, b", [
+    ([1, 2], (1, 2)),
+    ({1: "x"}, {"1": "x"}),
+    (torch.zeros(2), np.zeros(2, dtype=np.float32)),
+])
+def test_values_fingerprint_cannot_tell_apart_get_own_handles(store, a, b):
+    handle_a, handle_b = store.put(1, a), store.put(1, b)
+    assert handle_a != handle_b
+    assert type(store.get(handle_b)) is type(b)
+
+
+def test_clear(store):
+    handle = store.put(1, [1])
+    other = store.put(2, [2])
+    store.clear(1)
+    with pytest.raises(KeyError):
+        store.get(handle)
+    assert store.get(other) == [2]
+    store.clear()
+    with pytest.raises(KeyError):
+        store.get(other)
+
+
+def test_objects_are_kept_as_references(store):
+    class Model:
+        pass
+
+    model = Model()
+    handle = store.put(1, model)
+    assert store.get(handle) is model
+    assert store.put(1, model) == handle
+    assert not store.values.get(1)
+
+
+def test_oversized_data_is_kept_as_reference(store, monkeypatch):
+    import lg_py.value_store as value_store
+    monkeypatch.setattr(value_store, "MAX_VALUE_BYTES", 64)
+    small, large = torch.zeros(4), torch.zeros(64)
+    assert store.get(store.put(1, small)) is not small
+    assert store.get(store.put(1, large)) is large
+
+
+def test_references_are_bounded_per_link(store, monkeypatch):
+    import lg_py.value_store as value_store
+    monkeypatch.setattr(value_store, "MAX_REFS_PER_LINK", 2)
+    objects = [object() for _ in range(3)]
+    handles = [store.put(1, obj) for obj in objects]
+    with pytest.raises(KeyError):
+        store.get(handles[0])
+    assert store.get(handles[2]) is objects[2]
+    store.clear(1)
+    with pytest.raises(KeyError):
+        store.get(handles[2])
+
+
+def identity(raw, typ):
+    return raw
+
+
+def to_typ(raw, typ):
+    return int(raw) if typ == "INT" else raw
+
+
+def test_accumulator_dedupes_and_keeps_order():
+    acc = ValueAccumulator()
+    assert acc.add(1, ["a", "b"], "STRING", identity) == ["a", "b"]
+    assert acc.add(1, ["a", "b", "c", "a"], "STRING", identity) == ["a", "b", "c"]
+
+
+def test_accumulator_skips_values():
+    acc = ValueAccumulator()
+    convert = lambda raw, typ: SKIP if raw == "bad" else raw
+    assert acc.add(1, ["a", "bad", "b"], "STRING", convert) == ["a", "b"]
+
+
+def test_accumulator_snapshot_is_copy_on_write():
+    acc = ValueAccumulator()
+    snapshot = acc.add(1, ["a"], "STRING", identity)
+    acc.add(1, ["a", "b"], "STRING", identity)
+    assert snapshot == ["a"]
+
+
+def test_max_items_does_not_resurrect_evicted_values():
+    # 前端控件保留全部收到的值，每次执行都会重新发送已淘汰的值
+    acc = ValueAccumulator()
+    assert acc.add(1, ["a", "b", "c"], "STRING", identity, max_items=2) == ["b", "c"]
+    assert acc.add(1, ["a", "b", "c", "d"], "STRING", identity, max_items=2) == ["c", "d"]
+    assert acc.add(1, ["a", "b", "c", "d"], "STRING", identity, max_items=0) == ["c", "d"]
+
+
+def test_ttl_does_not_resurrect_expired_values(monkeypatch):
+    import lg_py.value_store as value_store
+    now = [1000.0]
+    monkeypatch.setattr(value_store.time, "time", lambda: now[0])
+    acc = ValueAccumulator()
+    acc.add(1, ["a"], "STRING", identity, ttl=10)
+    now[0] += 20
+    assert acc.add(1, ["a", "b"], "STRING", identity, ttl=10) == ["b"]
+    assert acc.add(1, ["a", "b"], "STRING", identity, ttl=10) == ["b"]
+
+
+def test_tombstone_dropped_once_frontend_forgets_value():
+    acc = ValueAccumulator()
+    acc.add(1, ["a", "b"], "STRING", identity, max_items=1)
+    # 前端清空后重新收到 a，视为新值
+    assert acc.add(1, ["b"], "STRING", identity, max_items=1) == ["b"]
+    assert acc.add(1, ["b", "a"], "STRING", identity, max_items=1) == ["a"]
+
+
+def test_type_change_reconverts_values():
+    acc = ValueAccumulator()
+    assert acc.add(1, ["1", "2"], "STRING", to_typ) == ["1", "2"]
+    assert acc.add(1, ["1", "2"], "INT", to_typ) == [1, 2]
+
+
+def test_clear_forgets_values_and_tombstones():
+    acc = ValueAccumulator()
+    acc.add(1, ["a", "b"], "STRING", identity, max_items=1)
+    acc.add(2, ["x"], "STRING", identity)
+    acc.clear(1)
+    assert acc.add(1, ["a", "b"], "STRING", identity) == ["a", "b"]
+    assert acc.add(2, [], "STRING", identity) == ["x"]
@@ -0,0 +1,65 @@
+import threading
+
+import torch
+
+from lg_py.warm_cache import WarmCache
+
+
+def make_file(tmp_path, name):
+    path = tmp_path / name
+    path.write_bytes(b"x")
+    return str(path)
+
+
+def test_warm_decodes_in_background(tmp_path):
+    cache = WarmCache(budget=1024)
+    path = make_file(tmp_path, "a.mp4")
+    frames = torch.zeros(2, 4, 4, 3)
+    assert cache.warm("video", path, lambda p: frames, frames.nbytes)
+    assert cache.get("video", path) is frames
+    assert cache.stats()["bytes"] == frames.nbytes
+
+
+def test_warm_skips_clips_over_budget_without_decoding(tmp_path):
+    cache = WarmCache(budget=100)
+    path = make_file(tmp_path, "a.mp4")
+    calls = []
+    assert not cache.warm("video", path, calls.append, 101)
+    assert calls == []
+    assert cache.get("video", path) is None
+
+
+def test_pending_decodes_hold_their_budget(tmp_path):
+    cache = WarmCache(budget=100)
+    first, second = make_file(tmp_path, "a.mp4"), make_file(tmp_path, "b.mp4")
+    release = threading.Event()
+
+    def slow(path):
+        release.wait()
+        return torch.zeros(15)
+
+    assert cache.warm("video", first, slow, 60)
+    # 解码中的条目占用的预算不会被淘汰，放不下的视频不开始解码
+    assert not cache.warm("video", second, slow, 60)
+    release.set()
+    assert cache.get("video", first).nbytes == 60
+
+
+def test_actual_size_replaces_estimate(tmp_path):
+    cache = WarmCache(budget=100)
+    first, second = make_file(tmp_path, "a.mp4"), make_file(tmp_path, "b.mp4")
+    assert cache.warm("video", first, lambda p: torch.zeros(5), 80)
+    assert cache.get("video", first).nbytes == 20
+    assert cache.stats()["bytes"] == 20
+    # 预估放得下，实际解码结果超出预算时丢弃
+    assert cache.warm("video", second, lambda p: torch.zeros(40), 40)
+    assert cache.get("video", second) is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_failed_decode_is_dropped(tmp_path):
+    cache = WarmCache(budget=100)
+    path = make_file(tmp_path, "a.mp4")
+    assert cache.warm("video", path, lambda p: None, 10)
+    assert cache.get("video", path) is None
+    assert cache.stats()["bytes"] == 0
@@ -0,0 +1,66 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+
+class FakeServer:
+    def __init__(self):
+        self.client_id = "owner"
+        self.sent = []
+
+    def send_sync(self, event, data, sid=None):
+        self.sent.append((event, data, sid))
+
+
+@pytest.fixture
+def delivery(monkeypatch):
+    """用假的 PromptServer 重新导入 ws_delivery"""
+    server = FakeServer()
+    module = types.ModuleType("server")
+    module.PromptServer = types.SimpleNamespace(instance=server)
+    monkeypatch.setitem(sys.modules, "server", module)
+    monkeypatch.delitem(sys.modules, "lg_py.ws_delivery", raising=False)
+    ws_delivery = importlib.import_module("lg_py.ws_delivery")
+    yield ws_delivery, server
+    sys.modules.pop("lg_py.ws_delivery", None)
+
+
+def sent_events(server):
+    return [event for event, _, _ in server.sent]
+
+
+def test_sends_from_several_nodes_coalesce_until_prompt_ends(delivery):
+    ws_delivery, server = delivery
+    for i in range(3):
+        server.send_sync("executing", {"node": str(i)})
+        ws_delivery.send("value-send-accumulate", {"link_id": 1, "values": [str(i)], "delta": True}, "values")
+    assert sent_events(server) == ["executing"] * 3
+
+    server.send_sync("execution_success", {"prompt_id": "p"})
+    assert sent_events(server)[-2:] == ["value-send-accumulate", "execution_success"]
+    _, payload, sid = server.sent[-2]
+    assert payload["values"] == ["0", "1", "2"]
+    assert sid == "owner"
+
+
+def test_replacing_send_drops_unsent_payload(delivery):
+    ws_delivery, server = delivery
+    ws_delivery.send("video-send", {"link_id": 1, "videos": ["a"], "delta": False}, "videos")
+    ws_delivery.send("video-send", {"link_id": 1, "videos": ["b"], "delta": False}, "videos")
+    ws_delivery.send("video-send", {"link_id": 2, "videos": ["c"], "delta": False}, "videos")
+    server.send_sync("executing", {"node": None})
+    assert [data["videos"] for event, data, _ in server.sent if event == "video-send"] == [["b"], ["c"]]
+
+
+def test_pending_events_flush_after_window(delivery, monkeypatch):
+    ws_delivery, server = delivery
+    now = [100.0]
+    monkeypatch.setattr(ws_delivery.time, "monotonic", lambda: now[0])
+    ws_delivery.send("img-send", {"link_id": 1, "images": ["a"]}, "images")
+    server.send_sync("progress", {"value": 1})
+    assert "img-send" not in sent_events(server)
+    now[0] += ws_delivery.FLUSH_WINDOW
+    server.send_sync("progress", {"value": 2})
+    assert sent_events(server) == ["progress", "img-send", "progress"]
@@ -0,0 +1,235 @@
+import { app } from "../../scripts/app.js";
+
+// 网格单元大小（画布坐标）
+const CELL_SIZE = 512;
+
+// 节点 -> { x, y, w, h, collapsed, bounding, cells, order }
+const entries = new Map();
+// "cx,cy" -> 节点集合
+const grid = new Map();
+// 组 -> { x, y, w, h, version, nodes }
+const memo = new Map();
+// 新增、移动或改变尺寸后等待重新索引的节点
+const dirty = new Set();
+// 已挂上钩子的图与画布
+const hooked = new WeakSet();
+
+let graphRef = null;
+let prototypesHooked = false;
+// 节点加入索引的顺序，与节点加入图的顺序一致
+let nextOrder = 0;
+// 任意节点的位置/尺寸变化、增删时递增，使组的缓存结果失效
+let version = 0;
+
+function cellsOf(bounding) {
+    const keys = [];
+    const x0 = Math.floor(bounding[0] / CELL_SIZE);
+    const y0 = Math.floor(bounding[1] / CELL_SIZE);
+    const x1 = Math.floor((bounding[0] + bounding[2]) / CELL_SIZE);
+    const y1 = Math.floor((bounding[1] + bounding[3]) / CELL_SIZE);
+    for (let cx = x0; cx <= x1; cx++) {
+        for (let cy = y0; cy <= y1; cy++) {
+            keys.push(`${cx},${cy}`);
+        }
+    }
+    return keys;
+}
+
+function removeFromGrid(node, entry) {
+    for (const key of entry.cells) {
+        const cell = grid.get(key);
+        cell?.delete(node);
+        if (cell && cell.size === 0) grid.delete(key);
+    }
+}
+
+function addToGrid(node, entry) {
+    for (const key of entry.cells) {
+        if (!grid.has(key)) grid.set(key, new Set());
+        grid.get(key).add(node);
+    }
+}
+
+function markDirty(node) {
+    if (node) dirty.add(node);
+}
+
+function forget(node) {
+    dirty.delete(node);
+    const entry = entries.get(node);
+    if (!entry) return;
+    removeFromGrid(node, entry);
+    entries.delete(node);
+    version++;
+}
+
+function reset() {
+    entries.clear();
+    grid.clear();
+    memo.clear();
+    dirty.clear();
+    version++;
+}
+
+/**
+ * 在 target[name] 原有实现之后调用 hook，保留其他扩展设置的回调
+ */
+function chain(target, name, hook) {
+    const original = target[name];
+    target[name] = function (...args) {
+        const result = original?.apply(this, args);
+        hook.apply(this, args);
+        return result;
+    };
+}
+
+/**
+ * 节点的尺寸、折叠、移动以及组的拖动都会经过这些方法，调用后把相关节点标记为待更新
+ */
+function hookPrototypes() {
+    if (prototypesHooked) return;
+    prototypesHooked = true;
+    const nodeProto = LiteGraph.LGraphNode?.prototype;
+    for (const name of ["setSize", "collapse", "move"]) {
+        if (typeof nodeProto?.[name] === "function") {
+            chain(nodeProto, name, function () { markDirty(this); });
+        }
+    }
+    const groupProto = LiteGraph.LGraphGroup?.prototype;
+    if (typeof groupProto?.move === "function") {
+        chain(groupProto, "move", function () {
+            for (const node of this._nodes || []) markDirty(node);
+            for (const child of this._children || []) {
+                if (entries.has(child)) markDirty(child);
+            }
+        });
+    }
+}
+
+function attach(graph) {
+    graphRef = graph;
+    reset();
+    hookPrototypes();
+    if (graph && !hooked.has(graph)) {
+        hooked.add(graph);
+        chain(graph, "onNodeAdded", node => markDirty(node));
+        chain(graph, "onNodeRemoved", node => forget(node));
+        // 加载工作流时 clear() 会直接丢弃全部节点，不触发 onNodeRemoved
+        chain(graph, "clear", () => { if (graphRef === graph) reset(); });
+    }
+    const canvas = app.canvas;
+    if (canvas && !hooked.has(canvas)) {
+        hooked.add(canvas);
+        // 拖动结束时回调只给出被拖动的节点，同时被选中的节点也一起移动了
+        chain(canvas, "onNodeMoved", node => {
+            markDirty(node);
+            for (const selected of Object.values(canvas.selected_nodes || {})) markDirty(selected);
+        });
+    }
+    for (const node of graph?._nodes || []) markDirty(node);
+}
+
+/**
+ * 重新索引单个节点，位置、尺寸和折叠状态都未变化时不改动网格
+ */
+function update(node) {
+    if (node.graph !== graphRef || !node.pos) {
+        forget(node);
+        return;
+    }
+    const collapsed = !!node.flags?.collapsed;
+    let entry = entries.get(node);
+    if (entry && entry.x === node.pos[0] && entry.y === node.pos[1] &&
+        entry.w === node.size[0] && entry.h === node.size[1] &&
+        entry.collapsed === collapsed) {
+        return;
+    }
+    if (entry) {
+        removeFromGrid(node, entry);
+    } else {
+        entry = { order: nextOrder++ };
+        entries.set(node, entry);
+    }
+    entry.x = node.pos[0];
+    entry.y = node.pos[1];
+    entry.w = node.size[0];
+    entry.h = node.size[1];
+    entry.collapsed = collapsed;
+    entry.bounding = Array.from(node.getBounding());
+    entry.cells = cellsOf(entry.bounding);
+    addToGrid(node, entry);
+    version++;
+}
+
+/**
+ * 先处理被标记的节点，再逐个比对全部节点的位置、尺寸和折叠状态；
+ * configure、撤销或其他扩展直接改写 pos / size 时不会经过钩子，只有比对才能发现。
+ * 比对只是几次数值比较，未变化的节点不改动网格；图被替换时重新挂钩并把全部节点标记一次
+ */
+function sync() {
+    if (app.graph !== graphRef) attach(app.graph);
+    for (const node of dirty) update(node);
+    dirty.clear();
+    for (const node of graphRef?._nodes || []) update(node);
+}
+
+function collect(b) {
+    const candidates = new Set();
+    for (const key of cellsOf(b)) {
+        const cell = grid.get(key);
+        if (!cell) continue;
+        for (const node of cell) candidates.add(node);
+    }
+    return candidates;
+}
+
+function isOutputNode(node) {
+    return node.mode !== LiteGraph.NEVER && node.constructor.nodeData?.output_node === true;
+}
+
+function resolve(group) {
+    sync();
+    const b = group._bounding;
+    const cached = memo.get(group);
+    if (cached && cached.version === version &&
+        cached.x === b[0] && cached.y === b[1] && cached.w === b[2] && cached.h === b[3]) {
+        return cached;
+    }
+
+    const candidates = collect(b);
+
+    const nodes = [...candidates]
+        .filter(node => LiteGraph.overlapBounding(b, entries.get(node).bounding))
+        .sort((a, c) => entries.get(a).order - entries.get(c).order);
+
+    const result = { x: b[0], y: b[1], w: b[2], h: b[3], version, nodes };
+    memo.set(group, result);
+    return result;
+}
+
+export function findGroup(groupName) {
+    return app.graph._groups.find(g => g.title === groupName);
+}
+
+// LiteGraph 的 recomputeInsideNodes 会原地清空 group._nodes，这里给出副本以免破坏缓存
+function assignNodes(group, nodes) {
+    group._nodes = nodes.slice();
+}
+
+/**
+ * 返回与组范围重叠的全部节点（按加入图的顺序），并同步到 group._nodes
+ */
+export function getGroupNodes(group) {
+    const nodes = resolve(group).nodes;
+    assignNodes(group, nodes);
+    return nodes;
+}
+
+/**
+ * 返回组内未被禁用的输出节点；模式可能被直接改写，每次按当前模式过滤
+ */
+export function getGroupOutputNodes(group) {
+    const nodes = resolve(group).nodes;
+    assignNodes(group, nodes);
+    return nodes.filter(isOutputNode);
+}
@@ -2,6 +2,7 @@ import { app } from "../../scripts/app.js";
 import { ComfyWidgets } from "../../scripts/widgets.js";
 import { api } from "../../scripts/api.js";
 import { queueManager } from "./queue_utils.js";
+import { findGroup, getGroupOutputNodes } from "./group_index.js";
 class BaseNode extends LGraphNode {
     static defaultComfyClass = "BaseNode";
      constructor(title, comfyClass) {
@@ -123,20 +124,12 @@ class GroupExecutorNode extends BaseNode {
         return [...app.graph._groups].map(g => g.title).sort();
     }
     getGroupOutputNodes(groupName) {
-        const group = app.graph._groups.find(g => g.title === groupName);
+        const group = findGroup(groupName);
         if (!group) {
             console.warn(`[GroupExecutor] 未找到名为 "${groupName}" 的组`);
             return [];
         }
-        const groupNodes = [];
-        for (const node of app.graph._nodes) {
-            if (!node || !node.pos) continue;
-            if (LiteGraph.overlapBounding(group._bounding, node.getBounding())) {
-                groupNodes.push(node);
-            }
-        }
-        group._nodes = groupNodes;
-        return this.getOutputNodes(group._nodes);
+        return getGroupOutputNodes(group);
     }
     getOutputNodes(nodes) {
         return nodes.filter((n) => {
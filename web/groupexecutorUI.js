@@ -1,6 +1,7 @@
 import { app } from "../../scripts/app.js";
 import { api } from "../../scripts/api.js";
 import { queueManager } from "./queue_utils.js";
+import { findGroup, getGroupOutputNodes } from "./group_index.js";
 
 class GroupExecutorUI {
     static DOCK_MARGIN_X = 0;
@@ -752,19 +753,11 @@ class GroupExecutorUI {
     }
 
     async executeGroup(groupName) {
-        const group = app.graph._groups.find(g => g.title === groupName);
+        const group = findGroup(groupName);
         if (!group) {
             throw new Error(`未找到名为 "${groupName}" 的组`);
         }
-        const outputNodes = [];
-        for (const node of app.graph._nodes) {
-            if (!node || !node.pos) continue;
-            if (LiteGraph.overlapBounding(group._bounding, node.getBounding())) {
-                if (node.mode !== LiteGraph.NEVER && node.constructor.nodeData?.output_node === true) {
-                    outputNodes.push(node);
-                }
-            }
-        }
+        const outputNodes = getGroupOutputNodes(group);
         if (outputNodes.length === 0) {
             throw new Error(`组 "${groupName}" 中没有找到输出节点`);
         }
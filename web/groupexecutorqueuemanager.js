@@ -1,122 +1,47 @@
 import { app } from "../../scripts/app.js";
 import { api } from "../../scripts/api.js";
+import { getReceivers, loadNodeImages } from "./receiver_index.js";
 
-app.registerExtension({
-    name: "GroupExecutorQueueManager",
-    async beforeRegisterNodeDef(nodeType, nodeData, app) {
-        if (api.fetchApi._isGroupExecutorQueueManager) {
-            return;
-        }
-
-        const originalFetchApi = api.fetchApi;
-
-        function collectRelatedNodes(prompt, nodeId, relevantNodes) {
-            if (!prompt[nodeId] || relevantNodes.has(nodeId)) return;
-            relevantNodes.add(nodeId);
-
-            const node = prompt[nodeId];
-            if (node.inputs) {
-                Object.values(node.inputs).forEach(input => {
-                    if (input && input.length > 0) {
-                        collectRelatedNodes(prompt, input[0], relevantNodes);
-                    }
-                });
-            }
-        }
-
-        const newFetchApi = async function(url, options = {}) {
-
-            if (url === '/prompt' && options.method === 'POST') {
-                const requestData = JSON.parse(options.body);
-
-                if (requestData.extra_data?.isGroupExecutorRequest) {
-                    return originalFetchApi.call(api, url, options);
-                }
-
-                const prompt = requestData.prompt;
-
-                const hasGroupExecutor = Object.values(prompt).some(node => 
-                    node.class_type === "GroupExecutorSender"
-                );
-
-                if (hasGroupExecutor) {
-
-                    const relevantNodes = new Set();
-                    
-                    for (const [nodeId, node] of Object.entries(prompt)) {
-                        if (node.class_type === "GroupExecutorSender") {
-                            collectRelatedNodes(prompt, nodeId, relevantNodes);
-                        }
-                    }
-
-                    const filteredPrompt = {};
-                    for (const nodeId of relevantNodes) {
-                        if (prompt[nodeId]) {
-                            filteredPrompt[nodeId] = prompt[nodeId];
-                        }
-                    }
-
-                    const modifiedOptions = {
-                        ...options,
-                        body: JSON.stringify({
-                            ...requestData,
-                            prompt: filteredPrompt,
-                            extra_data: {
-                                ...requestData.extra_data,
-                                isGroupExecutorRequest: true
-                            }
-                        })
-                    };
-
-                    return originalFetchApi.call(api, url, modifiedOptions);
-                }
-            }
-
-            return originalFetchApi.call(api, url, options);
-        };
-
-        newFetchApi._isGroupExecutorQueueManager = true;
-
-        api.fetchApi = newFetchApi;
-    }
-}); 
-
-
+// 接收节点预览缩略图的长边（CSS 像素）
+const THUMB_SIZE = 384;
 
 api.addEventListener("img-send", async ({ detail }) => {
     if (detail.images.length === 0) return;
 
-    const filenames = detail.images.map(data => data.filename).join(', ');
-
-    for (const node of app.graph._nodes) {
-        if (node.type === "LG_ImageReceiver") {
-            let isLinked = false;
-
-            const linkWidget = node.widgets.find(w => w.name === "link_id");
-            if (linkWidget.value === detail.link_id) {
-                isLinked = true;
-            }
-
-            if (isLinked) {
-                if (node.widgets[0]) {
-                    node.widgets[0].value = filenames;
-                    if (node.widgets[0].callback) {
-                        node.widgets[0].callback(filenames);
-                    }
-                }
-
-                Promise.all(detail.images.map(imageData => {
-                    return new Promise((resolve) => {
-                        const img = new Image();
-                        img.onload = () => resolve(img);
-                        img.src = `/view?filename=${encodeURIComponent(imageData.filename)}&type=${imageData.type}${app.getPreviewFormatParam()}`;
-                    });
-                })).then(loadedImages => {
-                    node.imgs = loadedImages;
-                    app.canvas.setDirty(true);
-                });
+    // 新版发送端只传清单 ID 和本次新增的图像，旧版仍为完整文件名列表
+    const filenames = detail.manifest
+        ? `manifest:${detail.manifest}`
+        : detail.images.map(data => data.filename).join(', ');
+    const isDelta = detail.delta ?? (detail.manifest && detail.count > detail.images.length);
+
+    // 节点预览只需要缩略图，按设备像素比取长边上限，避免下载和解码全分辨率原图
+    const size = Math.round(THUMB_SIZE * Math.min(window.devicePixelRatio || 1, 2));
+    const newUrls = detail.images.map(imageData =>
+        api.apiURL(`/group_executor/thumb?filename=${encodeURIComponent(imageData.filename)}` +
+            `&subfolder=${encodeURIComponent(imageData.subfolder || "")}&type=${imageData.type}&size=${size}`)
+    );
+
+    for (const node of getReceivers("LG_ImageReceiver", detail.link_id)) {
+        if (node.widgets[0]) {
+            node.widgets[0].value = filenames;
+            if (node.widgets[0].callback) {
+                node.widgets[0].callback(filenames);
             }
         }
+
+        // 新的加载会取消尚未完成的旧加载；增量发送时把旧加载中未完成的图像一并带上
+        const pending = node.__lgPendingLoad;
+        const replace = !isDelta || (pending?.replace ?? false);
+        const urls = isDelta && pending ? pending.urls.concat(newUrls) : newUrls;
+        node.__lgPendingLoad = { urls, replace };
+
+        loadNodeImages(node, urls).then(loadedImages => {
+            if (!loadedImages) return;
+            node.__lgPendingLoad = null;
+            // 累积发送时只收到新增图像，追加到已有预览之后
+            node.imgs = !replace && node.imgs ? node.imgs.concat(loadedImages) : loadedImages;
+            app.canvas.setDirty(true);
+        });
     }
 });
 
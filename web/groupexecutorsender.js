@@ -1,6 +1,7 @@
 import { app } from "../../scripts/app.js";
 import { api } from "../../scripts/api.js";
 import { queueManager, getOutputNodes } from "./queue_utils.js";
+import { findGroup, getGroupOutputNodes } from "./group_index.js";
 
 app.registerExtension({
     name: "GroupExecutorSender",
@@ -63,22 +64,13 @@ app.registerExtension({
 
             nodeType.prototype.getGroupOutputNodes = function(groupName) {
 
-                const group = app.graph._groups.find(g => g.title === groupName);
+                const group = findGroup(groupName);
                 if (!group) {
                     console.warn(`[GroupExecutorSender] 未找到名为 "${groupName}" 的组`);
                     return [];
                 }
 
-                const groupNodes = [];
-                for (const node of app.graph._nodes) {
-                    if (!node || !node.pos) continue;
-                    if (LiteGraph.overlapBounding(group._bounding, node.getBounding())) {
-                        groupNodes.push(node);
-                    }
-                }
-                group._nodes = groupNodes;
-
-                return this.getOutputNodes(group._nodes);
+                return getGroupOutputNodes(group);
             };
 
             nodeType.prototype.getOutputNodes = function(nodes) {
@@ -133,7 +125,8 @@ app.registerExtension({
                         body: JSON.stringify({
                             node_id: this.id,
                             execution_list: enrichedExecutionList,
-                            api_prompt: fullApiPrompt
+                            api_prompt: fullApiPrompt,
+                            client_id: api.clientId
                         })
                     });
                     
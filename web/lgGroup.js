@@ -1,5 +1,6 @@
 import { app } from "../../../scripts/app.js";
 import { api } from "../../../scripts/api.js";
+import { getReceivers } from "./receiver_index.js";
 
 // 存储不同 link_id 对应的最新数据
 const linkDataCache = {
@@ -29,24 +30,26 @@ function handleReceiveMessage(event, type, widgetName) {
         string: "LG_StringReceiver"
     };
 
-    for (const node of app.graph._nodes) {
-        if (node.type === nodeTypes[type]) {
-            // 找到节点的 link_id widget
-            const linkIdWidget = node.widgets?.find(w => w.name === "link_id");
-            // 找到目标输入 widget (image, video, or string)
-            const targetWidget = node.widgets?.find(w => w.name === widgetName);
+    // 按 link_id 索引直接取得对应的接收节点，无需遍历整个图
+    for (const node of getReceivers(nodeTypes[type], linkId)) {
+        // 找到目标输入 widget (image, video, or string)
+        const targetWidget = node.widgets?.find(w => w.name === widgetName);
 
-            if (linkIdWidget && targetWidget && linkIdWidget.value === linkId) {
-                // 提取文件名并用逗号连接
+        if (targetWidget) {
+            // 新版发送端只传清单 ID，旧版仍为逗号连接的文件名
+            let value;
+            if (data.manifest) {
+                value = `manifest:${data.manifest}`;
+            } else {
                 const files = (type === 'img' ? data.images : (type === 'video' ? data.videos : data.strings));
-                const filenames = files.map(f => f.filename).join(",");
-                
-                console.log(`[LG Frontend] 自动填充节点 ${node.id} 的 ${widgetName}: ${filenames}`);
-                targetWidget.value = filenames;
-                
-                // 触发节点尺寸重绘（防止文字显示不全）
-                node.setSize(node.computeSize());
+                value = files.map(f => f.filename).join(",");
             }
+            
+            console.log(`[LG Frontend] 自动填充节点 ${node.id} 的 ${widgetName}: ${value}`);
+            targetWidget.value = value;
+            
+            // 触发节点尺寸重绘（防止文字显示不全）
+            node.setSize(node.computeSize());
         }
     }
 }
@@ -61,27 +64,27 @@ function handleValueMessage(event) {
     if (!linkDataCache.value[linkId]) {
         linkDataCache.value[linkId] = [];
     }
-    // 累积模式：添加新值
-    if (data.value && !linkDataCache.value[linkId].includes(data.value)) {
-        linkDataCache.value[linkId].push(data.value);
+    // 累积模式：添加新值（同一次执行的多个值会合并为 values 一起发送）
+    const values = data.values ?? (data.value ? [data.value] : []);
+    for (const value of values) {
+        if (value && !linkDataCache.value[linkId].includes(value)) {
+            linkDataCache.value[linkId].push(value);
+        }
     }
 
     // 查找节点并填充
-    for (const node of app.graph._nodes) {
-        if (node.type === "LG_ValueReceiver") {
-            const linkIdWidget = node.widgets?.find(w => w.name === "link_id");
-            const targetWidget = node.widgets?.find(w => w.name === "value");
-            const accWidget = node.widgets?.find(w => w.name === "accumulate");
+    for (const node of getReceivers("LG_ValueReceiver", linkId)) {
+        const targetWidget = node.widgets?.find(w => w.name === "value");
+        const accWidget = node.widgets?.find(w => w.name === "accumulate");
 
-            if (linkIdWidget && targetWidget && linkIdWidget.value === linkId) {
-                // 如果是累积模式用缓存，否则只用当前值
-                if (accWidget && accWidget.value) {
-                    targetWidget.value = linkDataCache.value[linkId].join("\n");
-                } else {
-                    targetWidget.value = data.value || "";
-                }
-                node.setSize(node.computeSize());
+        if (targetWidget) {
+            // 如果是累积模式用缓存，否则只用当前值
+            if (accWidget && accWidget.value) {
+                targetWidget.value = linkDataCache.value[linkId].join("\n");
+            } else {
+                targetWidget.value = data.value || "";
             }
+            node.setSize(node.computeSize());
         }
     }
 }
@@ -98,13 +101,13 @@ function handleClearValue(event) {
     }
     
     // 清空界面上的输入框
-    for (const node of app.graph._nodes) {
-        if (node.type === "LG_ValueReceiver") {
-            const linkIdWidget = node.widgets?.find(w => w.name === "link_id");
-            const targetWidget = node.widgets?.find(w => w.name === "value");
-            if (linkIdWidget && targetWidget && (data.link_id === -1 || linkIdWidget.value === data.link_id)) {
-                targetWidget.value = "";
-            }
+    const receivers = data.link_id === -1
+        ? getReceivers("LG_ValueReceiver")
+        : getReceivers("LG_ValueReceiver", data.link_id);
+    for (const node of receivers) {
+        const targetWidget = node.widgets?.find(w => w.name === "value");
+        if (targetWidget) {
+            targetWidget.value = "";
         }
     }
 }
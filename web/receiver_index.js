@@ -0,0 +1,183 @@
+import { app } from "../../scripts/app.js";
+
+// 接收节点类型
+const RECEIVER_TYPES = new Set([
+    "LG_ImageReceiver",
+    "LG_VideoReceiver",
+    "LG_StringReceiver",
+    "LG_ValueReceiver"
+]);
+
+// 节点类型 -> (link_id -> 节点集合)
+const index = new Map();
+// 节点 -> 当前登记的 [类型, link_id]
+const tracked = new Map();
+// 节点类型 -> 已登记的节点集合
+const byType = new Map();
+
+function linkIdOf(node) {
+    return node.widgets?.find(w => w.name === "link_id")?.value;
+}
+
+function untrack(node) {
+    const entry = tracked.get(node);
+    if (!entry) return;
+    const [type, linkId] = entry;
+    const bucket = index.get(type)?.get(linkId);
+    bucket?.delete(node);
+    if (bucket && bucket.size === 0) {
+        index.get(type).delete(linkId);
+    }
+    byType.get(type)?.delete(node);
+    tracked.delete(node);
+}
+
+function track(node) {
+    untrack(node);
+    const linkId = linkIdOf(node);
+    if (linkId === undefined) return;
+    if (!index.has(node.type)) index.set(node.type, new Map());
+    const byLink = index.get(node.type);
+    if (!byLink.has(linkId)) byLink.set(linkId, new Set());
+    byLink.get(linkId).add(node);
+    if (!byType.has(node.type)) byType.set(node.type, new Set());
+    byType.get(node.type).add(node);
+    tracked.set(node, [node.type, linkId]);
+}
+
+function isAlive(node) {
+    return app.graph?.getNodeById(node.id) === node;
+}
+
+/**
+ * 重新核对该类型已登记的全部节点：移除已不在图中的节点，
+ * link_id 被直接赋值（未触发 widget 回调，如撤销、脚本修改）的节点移到新的分组
+ */
+function resync(type) {
+    for (const node of [...(byType.get(type) ?? [])]) {
+        if (!isAlive(node)) {
+            untrack(node);
+        } else if (linkIdOf(node) !== tracked.get(node)[1]) {
+            track(node);
+        }
+    }
+}
+
+/**
+ * 返回指定类型、link_id 的接收节点；linkId 省略时返回该类型的全部接收节点
+ * 只遍历该类型的接收节点，不扫描整个图
+ */
+export function getReceivers(type, linkId) {
+    resync(type);
+    const byLink = index.get(type);
+    if (!byLink) return [];
+    const buckets = linkId === undefined ? [...byLink.values()] : [byLink.get(linkId)];
+    return buckets.flatMap(bucket => bucket ? [...bucket] : []);
+}
+
+// ============ 图像加载：并发上限与取消 ============
+
+const MAX_CONCURRENT_LOADS = 4;
+let activeLoads = 0;
+const pendingLoads = [];
+
+function pumpLoads() {
+    while (activeLoads < MAX_CONCURRENT_LOADS && pendingLoads.length > 0) {
+        const task = pendingLoads.shift();
+        if (task.cancelled) continue;
+        activeLoads++;
+        task.start(() => {
+            activeLoads--;
+            pumpLoads();
+        });
+    }
+}
+
+function loadImage(src, job) {
+    return new Promise((resolve) => {
+        const task = {
+            cancelled: false,
+            start(done) {
+                const img = new Image();
+                let finished = false;
+                const finish = (result) => {
+                    if (finished) return;
+                    finished = true;
+                    job.loads.delete(abort);
+                    done();
+                    resolve(result);
+                };
+                // 取消时中止下载并立即释放并发名额
+                const abort = () => {
+                    img.src = "";
+                    finish(null);
+                };
+                img.onload = () => finish(img);
+                img.onerror = () => finish(null);
+                job.loads.add(abort);
+                img.src = src;
+            }
+        };
+        job.tasks.push(task);
+        pendingLoads.push(task);
+        pumpLoads();
+    });
+}
+
+/**
+ * 为节点加载一组预览图像，同一节点新的加载会取消尚未完成的旧加载
+ * @returns {Promise<HTMLImageElement[]|null>} 被取消时返回 null
+ */
+export function loadNodeImages(node, urls) {
+    node.__lgImageJob?.cancel();
+    const job = {
+        cancelled: false,
+        tasks: [],
+        loads: new Set(),
+        cancel() {
+            this.cancelled = true;
+            for (const task of this.tasks) task.cancelled = true;
+            for (const abort of [...this.loads]) abort();
+        }
+    };
+    node.__lgImageJob = job;
+    return Promise.all(urls.map(src => loadImage(src, job))).then(images => {
+        if (job.cancelled) return null;
+        if (node.__lgImageJob === job) node.__lgImageJob = null;
+        return images.filter(img => img);
+    });
+}
+
+app.registerExtension({
+    name: "LG.ReceiverIndex",
+    nodeCreated(node) {
+        if (!RECEIVER_TYPES.has(node.type)) return;
+
+        // 加载工作流或粘贴节点时，widget 值在 configure 中设置
+        const onConfigure = node.onConfigure;
+        node.onConfigure = function () {
+            const r = onConfigure?.apply(this, arguments);
+            track(this);
+            return r;
+        };
+
+        const onRemoved = node.onRemoved;
+        node.onRemoved = function () {
+            untrack(this);
+            this.__lgImageJob?.cancel();
+            return onRemoved?.apply(this, arguments);
+        };
+
+        const linkWidget = node.widgets?.find(w => w.name === "link_id");
+        if (linkWidget) {
+            const callback = linkWidget.callback;
+            linkWidget.callback = function () {
+                const r = callback?.apply(this, arguments);
+                track(node);
+                return r;
+            };
+        }
+
+        track(node);
+    }
+});